@@ -1,73 +1,145 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from datetime import datetime
+from typing import Optional
 from . import schemas
 from ..models import User
+from ..core.bulkhead import bulkhead, bulkhead_route
 from ..core.deps import get_current_user, require_admin
+from ..core.idempotency import IdempotencyStore, get_idempotency_store
 from ..services.service_factory import get_groq_service
-from ..services.groq_service import GroqService
+from ..services.groq_service import FALLBACK_MODEL, GroqService
+from ..services.ai_jobs import AIJobQueue, get_ai_jobs
+from ..services.model_router import ModelRouter, get_model_router
+from ..services.prompt_budget import usage_stats
+from ..services.health_prober import HealthProber, get_health_prober
 from ..core.config import settings
 
-router = APIRouter(prefix="/ai", tags=["ai"])
+router = APIRouter(prefix="/ai", tags=["ai"], route_class=bulkhead_route("crud"))
 
 
 @router.post("/generate-response", response_model=schemas.AIResponseOut)
+@bulkhead("ai")
 def generate_ai_response(
     payload: schemas.AIResponseRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     groq_service: GroqService = Depends(get_groq_service),
-    _: User = Depends(get_current_user)  # Authentication required
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
+    user: User = Depends(get_current_user)  # Authentication required
 ):
     """
     Generate an AI-powered response from title and description
     
     This endpoint allows generating AI responses for support queries using Groq AI.
     Perfect for getting automated responses for tickets or general support questions.
+    Retries sent with the same `Idempotency-Key` get the first response back
+    without another completion.
     
     Access: Any authenticated user
     """
-    ai_response = groq_service.generate_ticket_response(
-        title=payload.title,
-        description=payload.description
-    )
+    def generate() -> schemas.AIResponseOut:
+        ai_response, used_model = groq_service.generate_ticket_completion(
+            title=payload.title,
+            description=payload.description,
+            priority=payload.priority
+        )
+        return schemas.AIResponseOut(
+            response=ai_response,
+            used_model=used_model,
+            generated_at=datetime.now()
+        )
     
-    return schemas.AIResponseOut(
-        response=ai_response,
-        used_model=settings.GROQ_MODEL,
-        generated_at=datetime.now()
-    )
+    if idempotency_key and settings.IDEMPOTENCY_ENABLED:
+        # A fallback answer is not stored, so a retry with the same key tries Groq again
+        return idempotency.respond(f"ai:generate:{user.id}", idempotency_key, payload, generate,
+                                   keep=lambda body: body["used_model"] != FALLBACK_MODEL)
+    return generate()
 
 
 @router.get("/health")
 def ai_health_check(
-    groq_service: GroqService = Depends(get_groq_service),
+    prober: HealthProber = Depends(get_health_prober),
     _: User = Depends(require_admin)  # Admin only
 ):
     """
     Check the health status of the AI service
     
-    Returns the status of the Groq AI integration.
+    Returns the last background probe of the Groq API (a model listing, no
+    tokens spent); the endpoint itself never calls Groq.
     Useful for monitoring and debugging.
     
     Access: Admin only
     """
-    try:
-        is_healthy = groq_service.health_check()
-        
-        if not is_healthy:
-            raise HTTPException(
-                status_code=503,
-                detail="AI service is not responding properly"
-            )
-        
-        return {
-            "status": "healthy",
-            "service": "groq",
-            "model": settings.GROQ_MODEL,
-            "checked_at": datetime.now()
-        }
-        
-    except Exception as e:
+    result = prober.result("groq")
+    if result["status"] != "up":
         raise HTTPException(
             status_code=503,
-            detail=f"AI service health check failed: {str(e)}"
+            detail=f"AI service health check failed: {result.get('error') or result['status']}"
         )
+    
+    return {
+        "status": "healthy",
+        "service": "groq",
+        "model": settings.GROQ_MODEL,
+        "latency_ms": result["latency_ms"],
+        "checked_at": result["checked_at"]
+    }
+
 
+@router.get("/usage")
+def ai_usage(
+    _: User = Depends(require_admin)
+):
+    """
+    Prompt and completion token usage per prompt template version and model
+    
+    Counters are kept in memory since the process started.
+    
+    Access: Admin only
+    """
+    return {"prompt_version": settings.GROQ_PROMPT_VERSION, "usage": usage_stats.snapshot()}
+
+
+@router.get("/models")
+def ai_models(
+    model_router: ModelRouter = Depends(get_model_router),
+    _: User = Depends(require_admin)
+):
+    """
+    Model chain with per-model latency percentiles, error rates and hedging counters
+    
+    Statistics cover the most recent calls of this process.
+    
+    Access: Admin only
+    """
+    return model_router.snapshot()
+
+
+@router.get("/jobs/metrics")
+def ai_job_metrics(
+    ai_jobs: AIJobQueue = Depends(get_ai_jobs),
+    _: User = Depends(require_admin)
+):
+    """
+    Queue depth, throughput and latency of the background AI job pool
+    
+    Access: Admin only
+    """
+    return ai_jobs.metrics()
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.AIJobOut)
+async def get_ai_job(
+    job_id: str,
+    wait: int = Query(0, ge=0, le=settings.AI_JOBS_MAX_WAIT_SECONDS, description="Long-poll up to N seconds"),
+    ai_jobs: AIJobQueue = Depends(get_ai_jobs),
+    user: User = Depends(get_current_user)
+):
+    """
+    Status and result of an asynchronous AI response job
+    
+    With `wait` the request is held until the job finishes or the wait
+    elapses (long-poll).
+    
+    Access: Job owner or admin
+    """
+    return await ai_jobs.wait(job_id, user, wait)
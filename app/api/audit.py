@@ -0,0 +1,48 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Query
+from . import schemas
+from ..models import User
+from ..core.bulkhead import bulkhead_route
+from ..core.deps import require_admin
+from ..database.connection import get_repositories
+from ..database.repository import Repositories
+from ..services.audit_log import AuditLog, get_audit_log
+from ..core.config import settings
+
+router = APIRouter(prefix="/audit", tags=["audit"], route_class=bulkhead_route("crud"))
+
+
+@router.get("/", response_model=schemas.AuditPageOut)
+def list_audit_events(
+    entity: Optional[str] = Query(None, pattern="^(ticket|user)$"),
+    entity_id: Optional[int] = Query(None, gt=0),
+    actor_id: Optional[int] = Query(None, gt=0),
+    action: Optional[str] = Query(None, description="e.g. ticket.updated, ticket.closed, user.deleted"),
+    cursor: Optional[int] = Query(None, gt=0, description="next_cursor from the previous page"),
+    limit: int = Query(settings.AUDIT_PAGE_SIZE, ge=1, le=500),
+    repos: Repositories = Depends(get_repositories),
+    audit: AuditLog = Depends(get_audit_log),
+    _: User = Depends(require_admin)
+):
+    """
+    Who changed what on tickets and users, newest first
+    
+    Events are written in background batches, so the latest ones show up
+    after up to AUDIT_FLUSH_INTERVAL_SECONDS.
+    
+    Access: Admin only
+    """
+    return audit.page(repos, entity, entity_id, actor_id, action, cursor, limit)
+
+
+@router.get("/stats")
+def audit_stats(
+    audit: AuditLog = Depends(get_audit_log),
+    _: User = Depends(require_admin)
+):
+    """
+    Audit pipeline state: queued, written, dropped (queue full) and failed events
+    
+    Access: Admin only
+    """
+    return audit.snapshot()
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from starlette.concurrency import run_in_threadpool
 from . import schemas
-from ..models import User
+from ..models import User, Role
+from ..core.bulkhead import bulkhead, bulkhead_route
 from ..core.deps import get_current_user, require_admin
+from ..core.login_throttle import LoginThrottle, get_login_throttle
 from ..core.security_deps import SecurityValidation, CSRFValidation, get_csrf_token
-from ..services.service_factory import get_auth_service
+from ..services.service_factory import get_auth_service, get_user_importer
 from ..services.auth_service import AuthService
+from ..services.user_import import UserImporter, iter_import_rows
+from ..core.config import settings
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=bulkhead_route("crud"))
 
 @router.get("/csrf-token")
 def get_csrf_token_endpoint(
@@ -18,6 +24,7 @@ def get_csrf_token_endpoint(
 
 
 @router.post("/register", response_model=schemas.UserOut)
+@bulkhead("auth")
 def register(
     payload: schemas.UserCreate, 
     auth_service: AuthService = Depends(get_auth_service)
@@ -26,12 +33,24 @@ def register(
 
 
 @router.post("/login", response_model=schemas.TokenOut)
+@bulkhead("auth")
 def login(
+    request: Request,
     form: schemas.LoginRequest, 
     auth_service: AuthService = Depends(get_auth_service),
     _: bool = SecurityValidation
 ):
-    return auth_service.authenticate_user(form.email, form.password)
+    client_ip = request.client.host if request.client else None
+    return auth_service.authenticate_user(form.email, form.password, client_ip)
+
+
+@router.get("/login/metrics")
+def login_metrics(
+    throttle: LoginThrottle = Depends(get_login_throttle),
+    _: User = Depends(require_admin)
+):
+    """Allowed and shed login attempts, lockouts and tracked keys (admin only)"""
+    return throttle.metrics()
 
 
 @router.get("/users", response_model=list[schemas.UserOut])
@@ -42,6 +61,52 @@ def get_all_users(
     return auth_service.get_all_users()
 
 
+@router.get("/users/directory", response_model=schemas.UserDirectoryOut)
+def get_user_directory(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    q: Optional[str] = Query(None, max_length=100, description="Name or email prefix"),
+    role: Optional[Role] = None,
+    auth_service: AuthService = Depends(get_auth_service),
+    _: User = Depends(require_admin)
+):
+    return auth_service.list_users_page(cursor=cursor, limit=limit, search=q, role=role)
+
+
+@router.post("/users/import", response_model=schemas.UserImportOut)
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults from Content-Type"),
+    importer: UserImporter = Depends(get_user_importer),
+    _: User = Depends(require_admin),
+    __: bool = SecurityValidation,
+    ___: bool = CSRFValidation
+):
+    """
+    Create many users from a CSV (header: name,email,password[,role]) or
+    NDJSON body, processed in batches while it is uploaded
+    
+    Rows that fail validation, repeat an email or match an existing user
+    are skipped and reported by line number.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    batch = []
+    async for row in iter_import_rows(request.stream(), fmt):
+        if importer.rows + len(batch) >= settings.USER_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Import limited to {settings.USER_IMPORT_MAX_ROWS} rows; "
+                       f"{importer.created} user(s) were created before the limit"
+            )
+        batch.append(row)
+        if len(batch) >= settings.USER_IMPORT_BATCH_SIZE:
+            await run_in_threadpool(importer.import_batch, batch)
+            batch = []
+    if batch:
+        await run_in_threadpool(importer.import_batch, batch)
+    return importer.result()
+
+
 @router.get("/users/{user_id}", response_model=schemas.UserOut)
 def get_user_by_id(
     user_id: int,
@@ -55,11 +120,11 @@ def get_user_by_id(
 def delete_user(
     user_id: int,
     auth_service: AuthService = Depends(get_auth_service),
-    _: User = Depends(require_admin),
+    admin: User = Depends(require_admin),
     __: bool = SecurityValidation,
     ___: bool = CSRFValidation
 ):
-    return auth_service.delete_user(user_id)
+    return auth_service.delete_user(user_id, admin)
 
 
 @router.get("/me", response_model=schemas.UserOut)
@@ -71,6 +136,7 @@ def get_me(
 
 
 @router.put("/users/{user_id}", response_model=schemas.UserOut)
+@bulkhead("auth")  # hashes the new password when one is sent
 def update_user(
     user_id: int,
     payload: schemas.UserUpdate,
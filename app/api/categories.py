@@ -1,18 +1,24 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from . import schemas
 from ..models import User
+from ..core.bulkhead import bulkhead_route
 from ..core.deps import require_admin
 from ..services.service_factory import get_category_service
 from ..services.category_service import CategoryService
+from ..core.config import settings
 
-router = APIRouter(prefix="/categories", tags=["categories"])
+router = APIRouter(prefix="/categories", tags=["categories"], route_class=bulkhead_route("crud"))
 
 
 
 @router.get("/", response_model=list[schemas.CategoryOut])
 def list_categories(
+    response: Response,
     category_service: CategoryService = Depends(get_category_service)
 ):
+    # Public and rarely changed: lets browsers/CDNs cache it and the
+    # compression middleware reuse the compressed body
+    response.headers["Cache-Control"] = f"public, max-age={settings.CATEGORIES_MAX_AGE_SECONDS}"
     return category_service.list_categories()
 
 
@@ -95,6 +95,26 @@ class UserOut(UserBase):
         from_attributes = True
 
 
+class UserDirectoryOut(BaseModel):
+    users: list[UserOut]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+class UserImportError(BaseModel):
+    line: int
+    email: Optional[str] = None
+    detail: str
+
+
+class UserImportOut(BaseModel):
+    rows: int
+    created: int
+    failed: int
+    errors: list[UserImportError]
+    errors_truncated: bool = False
+
+
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
@@ -140,6 +160,8 @@ class CategoryCreate(CategoryBase):
 class CategoryOut(CategoryBase):
     id: int
     created_at: datetime
+    ticket_count: int = 0
+    open_ticket_count: int = 0
 
     class Config:
         from_attributes = True
@@ -179,6 +201,18 @@ class TicketUpdate(BaseModel):
     response: Optional[str] = None
 
 
+class TicketCreatorOut(BaseModel):
+    id: int
+    name: str
+    email: str
+
+
+class TicketCategoryOut(BaseModel):
+    id: int
+    name: str
+    color: Optional[str] = None
+
+
 class TicketOut(BaseModel):
     id: int
     title: str
@@ -190,16 +224,78 @@ class TicketOut(BaseModel):
     response: Optional[str] = None
     created_at: datetime
     updated_at: datetime
+    suggested_category_id: Optional[int] = None
+    suggested_priority: Optional[TicketPriority] = None
+    # Filled only when requested with ?expand=creator,category
+    creator: Optional[TicketCreatorOut] = None
+    category: Optional[TicketCategoryOut] = None
 
     class Config:
         from_attributes = True
 
 
+class TicketQueueItem(TicketOut):
+    priority_rank: int
+    age_seconds: int
+    sla_due_at: datetime
+    sla_breached: bool
+
+
+class TicketQueueOut(BaseModel):
+    tickets: list[TicketQueueItem]
+    next_cursor: Optional[str] = None
+    has_more: bool
+
+
+class TicketTombstoneOut(BaseModel):
+    id: int
+    deleted_at: datetime
+
+
+class TicketChangesOut(BaseModel):
+    changes: list[TicketOut]
+    deleted: list[TicketTombstoneOut]
+    next_token: str
+    has_more: bool
+
+
+class AuditEventOut(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    action: str
+    actor_id: Optional[int] = None
+    changes: dict = Field(description="{field: [old, new]} for updates, a snapshot for deletions")
+    created_at: datetime
+
+
+class AuditPageOut(BaseModel):
+    events: list[AuditEventOut]
+    next_cursor: Optional[int] = Field(None, description="Pass as cursor to get the next (older) page")
+
+
+class TicketCountOut(BaseModel):
+    count: int
+    estimated: bool = False
+    created_by: Optional[int] = None
+    category_id: Optional[int] = None
+    status: Optional[TicketStatus] = None
+
+
+class SimilarTicketOut(BaseModel):
+    id: int
+    title: str
+    status: Optional[TicketStatus] = None
+    has_response: bool = False
+    score: float = Field(description="Cosine similarity between 0 and 1")
+
+
 # AI Response Schemas
 class AIResponseRequest(BaseModel):
     """Request schema for AI response generation"""
     title: str = Field(min_length=1, max_length=200, description="Ticket title")
     description: str = Field(min_length=1, max_length=2000, description="Ticket description")
+    priority: Optional[TicketPriority] = Field(None, description="Ticket priority, sizes the response budget")
 
 
 class AIResponseOut(BaseModel):
@@ -207,3 +303,16 @@ class AIResponseOut(BaseModel):
     response: str = Field(description="AI generated response")
     used_model: str = Field(description="AI model used for generation")
     generated_at: datetime = Field(description="Timestamp when response was generated")
+
+
+class AIJobOut(BaseModel):
+    """Status of an asynchronous AI response job"""
+    id: str
+    ticket_id: int
+    status: str = Field(description="pending, running, done or failed")
+    response: Optional[str] = None
+    used_model: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
@@ -1,40 +1,246 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime
+from typing import Iterator, List, Optional
+import asyncio
+import csv
+import io
+import json
 from . import schemas
 from ..models import User
+from ..core.bulkhead import bulkhead, bulkhead_route
 from ..core.deps import get_current_user, require_admin
+from ..core.idempotency import IdempotencyStore, get_idempotency_store
+from ..models import Role
 from ..services.service_factory import get_ticket_service, get_groq_service
-from ..services.ticket_service import TicketService
+from ..services.ticket_service import EXPORT_COLUMNS, TicketService
+from ..services.ticket_events import TicketEventBus, get_ticket_events
+from ..services.ticket_replica import TicketReplica, get_ticket_replica
 from ..services.groq_service import GroqService
+from ..services.ai_jobs import AIJobQueue, get_ai_jobs
+from ..services.similarity_index import SimilarityIndex, get_similarity_index
 from ..core.config import settings
 
-router = APIRouter(prefix="/tickets", tags=["tickets"])
+router = APIRouter(prefix="/tickets", tags=["tickets"], route_class=bulkhead_route("crud"))
+
+EXPANDABLE = ("creator", "category")
+
+
+def ticket_expand(
+    expand: Optional[str] = Query(None, description="Comma-separated relations to embed: creator, category")
+) -> set:
+    fields = {field.strip() for field in (expand or "").split(",") if field.strip()}
+    unknown = fields.difference(EXPANDABLE)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot expand {', '.join(sorted(unknown))}; expected any of: {', '.join(EXPANDABLE)}"
+        )
+    return fields
 
 
 @router.get("/", response_model=list[schemas.TicketOut])
 def list_tickets(
+    expand: set = Depends(ticket_expand),
     ticket_service: TicketService = Depends(get_ticket_service), 
     user: User = Depends(get_current_user)
 ):
-    return ticket_service.list_tickets(user)
+    return ticket_service.expand(ticket_service.list_tickets(user), expand)
 
 
 @router.post("/", response_model=schemas.TicketOut)
 def create_ticket(
     payload: schemas.TicketCreate, 
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     ticket_service: TicketService = Depends(get_ticket_service), 
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
     user: User = Depends(get_current_user)
 ):
+    """
+    Create a ticket
+    
+    Retries sent with the same `Idempotency-Key` get the first response back
+    instead of creating another ticket.
+    """
+    if idempotency_key and settings.IDEMPOTENCY_ENABLED:
+        return idempotency.respond(
+            f"tickets:create:{user.id}", idempotency_key, payload,
+            lambda: ticket_service.create_ticket(payload, user)
+        )
     return ticket_service.create_ticket(payload, user)
 
 
+@router.get("/count", response_model=schemas.TicketCountOut)
+def count_tickets(
+    created_by: Optional[int] = Query(None, gt=0),
+    category_id: Optional[int] = Query(None, gt=0),
+    status: Optional[schemas.TicketStatus] = None,
+    estimated: bool = Query(False, description="Use planner estimates instead of an exact count"),
+    ticket_service: TicketService = Depends(get_ticket_service),
+    user: User = Depends(get_current_user)
+):
+    """
+    Ticket count per user and/or per category
+    
+    Admins may count any user's tickets; users only their own.
+    """
+    return ticket_service.count_tickets(user, created_by, category_id, status, estimated)
+
+
+@router.get("/queue", response_model=schemas.TicketQueueOut)
+def ticket_queue(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    category_id: Optional[int] = Query(None, gt=0),
+    expand: set = Depends(ticket_expand),
+    ticket_service: TicketService = Depends(get_ticket_service),
+    _: User = Depends(require_admin)
+):
+    """
+    Work queue: open tickets, most urgent priority first and oldest first
+    within a priority, each flagged when it is past its SLA
+    (TICKET_SLA_HOURS_HIGH/MEDIUM/LOW after creation)
+    
+    Access: Admin only
+    """
+    page = ticket_service.ticket_queue(cursor, limit, category_id)
+    page.tickets = ticket_service.expand(page.tickets, expand)
+    return page
+
+
+@router.get("/export")
+@bulkhead("crud", deadline=0)  # streams for as long as the export takes
+def export_tickets(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    created_by: Optional[int] = Query(None, gt=0),
+    category_id: Optional[int] = Query(None, gt=0),
+    status: Optional[schemas.TicketStatus] = None,
+    ticket_service: TicketService = Depends(get_ticket_service),
+    user: User = Depends(get_current_user)
+):
+    """
+    Stream tickets as CSV or NDJSON
+    
+    Rows are read from the database page by page while the response is
+    being sent, so memory use does not grow with the number of tickets.
+    Admins export every ticket; users only their own.
+    """
+    pages = ticket_service.export_tickets(user, created_by, category_id, status)
+    filename = f"tickets-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{format}"
+    return StreamingResponse(
+        _csv_chunks(pages) if format == "csv" else _ndjson_chunks(pages),
+        media_type="text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def _csv_chunks(pages: Iterator[List[dict]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for rows in pages:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(pages: Iterator[List[dict]]) -> Iterator[str]:
+    for rows in pages:
+        yield "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+
+@router.get("/changes", response_model=schemas.TicketChangesOut)
+def list_ticket_changes(
+    since: Optional[str] = Query(None, description="Sync token returned by the previous call"),
+    limit: int = Query(settings.SYNC_PAGE_SIZE, ge=1, le=1000),
+    ticket_service: TicketService = Depends(get_ticket_service),
+    user: User = Depends(get_current_user)
+):
+    """
+    Delta sync: tickets created or updated and tickets deleted since `since`
+    
+    Without a token the call returns the full list (paged by `limit`). Keep
+    calling with `next_token` while `has_more` is true.
+    """
+    return ticket_service.list_changes(user, since, limit)
+
+
+@router.get("/replica")
+def ticket_replica_status(
+    replica: TicketReplica = Depends(get_ticket_replica),
+    _: User = Depends(require_admin)
+):
+    """
+    State of the in-process tickets replica: size, lag behind the database
+    and how many reads it served versus sent to the database
+    
+    Access: Admin only
+    """
+    return replica.snapshot()
+
+
+@router.get("/stream")
+async def stream_ticket_events(
+    request: Request,
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    events: TicketEventBus = Depends(get_ticket_events),
+    user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events feed of ticket changes (created, updated, closed, deleted)
+    
+    Admins receive every event, users only events for their own tickets.
+    Resume with the `Last-Event-ID` header or `last_event_id` query parameter;
+    a `reset` event means the history no longer covers that id (evicted, or
+    issued before a restart or by another worker) and the client should
+    reload the list.
+    """
+    resume_from = last_event_id or last_event_id_header
+    cursor = events.last_id if resume_from is None else events.parse_client_id(resume_from)
+    if cursor is None:
+        cursor = events.last_id + 1  # past the end: the first read reports the gap
+
+    async def event_stream():
+        nonlocal cursor
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            waiter = events.waiter()
+            pending, gap = events.events_after(cursor)
+            if gap:
+                if not pending:
+                    cursor = events.last_id
+                yield f"event: reset\ndata: {json.dumps({'last_event_id': events.client_id(events.last_id)})}\n\n"
+            for event in pending:
+                cursor = event.id
+                if event.visible_to(user):
+                    yield (f"id: {events.client_id(event.id)}\nevent: ticket.{event.kind}\n"
+                           f"data: {json.dumps(event.to_dict())}\n\n")
+            if pending:
+                continue
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/{tid}", response_model=schemas.TicketOut)
 def get_ticket(
     tid: int, 
+    expand: set = Depends(ticket_expand),
     ticket_service: TicketService = Depends(get_ticket_service), 
     user: User = Depends(get_current_user)
 ):
-    return ticket_service.get_ticket(tid, user)
+    return ticket_service.expand([ticket_service.get_ticket(tid, user)], expand)[0]
 
 
 @router.put("/{tid}", response_model=schemas.TicketOut)
@@ -51,9 +257,9 @@ def update_ticket(
 def close_ticket(
     tid: int, 
     ticket_service: TicketService = Depends(get_ticket_service), 
-    _: User = Depends(require_admin)
+    user: User = Depends(require_admin)
 ):
-    return ticket_service.close_ticket(tid)
+    return ticket_service.close_ticket(tid, user)
 
 
 @router.delete("/{tid}")
@@ -65,24 +271,93 @@ def delete_ticket(
     return ticket_service.delete_ticket(tid, user)
 
 
-@router.post("/{tid}/ai-response", response_model=schemas.AIResponseOut)
+@router.get("/{tid}/similar", response_model=list[schemas.SimilarTicketOut])
+def list_similar_tickets(
+    tid: int,
+    limit: int = Query(5, ge=1, le=50),
+    min_score: float = Query(0.2, ge=0, le=1),
+    ticket_service: TicketService = Depends(get_ticket_service),
+    index: SimilarityIndex = Depends(get_similarity_index),
+    user: User = Depends(get_current_user)
+):
+    """
+    Tickets with a similar title/description, best match first
+    
+    Useful to flag duplicates. Users only see their own tickets.
+    """
+    ticket = ticket_service.get_ticket(tid, user)
+    if not index.ready:
+        raise HTTPException(status_code=503, detail="Similarity index is still loading")
+    if tid not in index:
+        index.upsert(ticket.model_dump(mode="json"))
+    
+    where = None if user.role == Role.ADMIN else (lambda meta: meta["created_by"] == user.id)
+    return [
+        schemas.SimilarTicketOut(score=round(score, 4), **{k: meta[k] for k in ("id", "title", "status", "has_response")})
+        for meta, score in index.query(ticket_id=tid, limit=limit, min_score=min_score, where=where)
+    ]
+
+
+@router.post(
+    "/{tid}/ai-response",
+    response_model=schemas.AIResponseOut,
+    responses={202: {"model": schemas.AIJobOut, "description": "Job queued (mode=async)"}}
+)
+@bulkhead("ai")
 def generate_ai_response(
     tid: int,
+    mode: str = Query("sync", pattern="^(sync|async)$"),
+    apply: bool = Query(False, description="Store the result on the ticket response (admin only, async mode)"),
+    reuse: bool = Query(True, description="Answer from a highly similar resolved ticket when one exists (sync mode)"),
     ticket_service: TicketService = Depends(get_ticket_service),
     groq_service: GroqService = Depends(get_groq_service),
+    ai_jobs: AIJobQueue = Depends(get_ai_jobs),
+    index: SimilarityIndex = Depends(get_similarity_index),
     user: User = Depends(get_current_user)
 ):
     # Get the ticket by ID (no access control for AI responses)
     ticket = ticket_service.get_ticket_by_id(tid)
     
+    if mode == "async":
+        if apply and user.role != Role.ADMIN:
+            raise HTTPException(status_code=403, detail="Only administrators can store ticket responses")
+        job = ai_jobs.submit(ticket, user, apply_to_ticket=apply)
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(job),
+            headers={"Location": f"/ai/jobs/{job.id}"}
+        )
+    
+    # Reuse the answer of a near-identical resolved ticket instead of calling the LLM,
+    # only from tickets the caller may read
+    is_admin = user.role == Role.ADMIN
+    if reuse and index.ready and settings.SIMILARITY_REUSE_THRESHOLD > 0:
+        matches = index.query(
+            text=f"{ticket.title} {ticket.title} {ticket.description}",
+            limit=1,
+            min_score=settings.SIMILARITY_REUSE_THRESHOLD,
+            where=lambda meta: (meta["id"] != tid and meta["has_response"] and meta["status"] == "closed"
+                                and (is_admin or meta["created_by"] == user.id))
+        )
+        if matches:
+            similar = ticket_service.get_ticket_by_id(matches[0][0]["id"])
+            # The index metadata may lag behind the table; check again on the fresh row
+            if similar.response and (is_admin or similar.created_by == user.id):
+                return schemas.AIResponseOut(
+                    response=similar.response,
+                    used_model=f"similar-ticket:{similar.id}" if is_admin else "similar-ticket",
+                    generated_at=datetime.now()
+                )
+    
     # Generate AI response using ticket title and description
-    ai_response = groq_service.generate_ticket_response(
+    ai_response, used_model = groq_service.generate_ticket_completion(
         title=ticket.title,
-        description=ticket.description
+        description=ticket.description,
+        priority=ticket.priority
     )
     
     return schemas.AIResponseOut(
         response=ai_response,
-        used_model=settings.GROQ_MODEL,
+        used_model=used_model,
         generated_at=datetime.now()
     )
\ No newline at end of file
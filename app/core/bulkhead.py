@@ -0,0 +1,210 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Type
+
+import anyio
+from anyio.to_thread import run_sync
+from fastapi import HTTPException, status
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .deadline import check_deadline, current_request
+
+
+class Bulkhead:
+    """A worker pool of its own for one class of sync endpoints.
+
+    FastAPI runs every sync endpoint on AnyIO's shared threadpool, so when
+    Groq slows down, AI requests hold every thread and logins queue behind
+    them. Endpoints run through a Bulkhead instead take one of its `size`
+    slots; at most `max_queue` requests wait for a slot, for up to
+    `queue_timeout` seconds, and the rest are turned away with 503 and
+    Retry-After right away, so a slow dependency only degrades its own routes.
+    `deadline` is the default request deadline of the routes in the pool.
+    """
+
+    def __init__(self, name: str, size: int, max_queue: int, queue_timeout: float, deadline: float = 0):
+        self.name = name
+        self.size = size
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.deadline = deadline
+        # Created on first use: older AnyIO versions need a running event loop
+        self._slots: Optional[anyio.CapacityLimiter] = None
+        self._threads: Optional[anyio.CapacityLimiter] = None
+        self.in_use = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._wait_seconds = 0.0
+        self._admitted = 0
+
+    def _limiters(self):
+        if self._slots is None:
+            self._slots = anyio.CapacityLimiter(self.size)
+            # Same size, so never contended; keeps these threads off the default limiter
+            self._threads = anyio.CapacityLimiter(self.size)
+        return self._slots, self._threads
+
+    def _busy(self, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Server busy ({self.name}): {detail}",
+            headers={"Retry-After": "1"}
+        )
+
+    async def run(self, func: Callable, *args, **kwargs):
+        """Run `func` on one of this pool's threads, waiting for a slot if needed"""
+        slots, threads = self._limiters()
+        if slots.available_tokens == 0 and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise self._busy("too many requests waiting")
+        context = current_request()
+        remaining = context.remaining() if context is not None else None
+        wait = self.queue_timeout if remaining is None else max(min(self.queue_timeout, remaining), 0)
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        started = time.monotonic()
+        try:
+            with anyio.fail_after(wait):
+                await slots.acquire()
+        except TimeoutError:
+            if context is not None:
+                context.check("queue")  # 504 when it was the request deadline that ran out
+            self.timed_out += 1
+            raise self._busy(f"no worker free within {self.queue_timeout}s")
+        finally:
+            self.waiting -= 1
+        self._wait_seconds += time.monotonic() - started
+        self._admitted += 1
+        self.in_use += 1
+        try:
+            # The client may have gone while the request was queued
+            check_deadline("queue")
+            return await run_sync(functools.partial(func, *args, **kwargs), limiter=threads)
+        finally:
+            self.in_use -= 1
+            self.completed += 1
+            slots.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "size": self.size,
+            "in_use": self.in_use,
+            "saturation": round(self.in_use / self.size, 3) if self.size else None,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "peak_waiting": self.peak_waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_ms": round(self._wait_seconds / self._admitted * 1000, 2) if self._admitted else 0.0
+        }
+
+
+bulkheads: Dict[str, Bulkhead] = {
+    "ai": Bulkhead("ai", settings.BULKHEAD_AI_SIZE, settings.BULKHEAD_AI_QUEUE,
+                   settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS, settings.REQUEST_DEADLINE_AI_SECONDS),
+    "auth": Bulkhead("auth", settings.BULKHEAD_AUTH_SIZE, settings.BULKHEAD_AUTH_QUEUE,
+                     settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS, settings.REQUEST_DEADLINE_AUTH_SECONDS),
+    "crud": Bulkhead("crud", settings.BULKHEAD_CRUD_SIZE, settings.BULKHEAD_CRUD_QUEUE,
+                     settings.BULKHEAD_QUEUE_TIMEOUT_SECONDS, settings.REQUEST_DEADLINE_CRUD_SECONDS),
+}
+
+
+# Pool of the route being served, so its blocking dependencies run there too
+_route_pool: ContextVar[Optional[str]] = ContextVar("route_pool", default=None)
+
+
+def get_bulkheads() -> Dict[str, Bulkhead]:
+    return bulkheads
+
+
+def _set_deadline(pool: Bulkhead, deadline: Optional[float]) -> None:
+    context = current_request()
+    if context is not None:
+        context.set_timeout(pool.deadline if deadline is None else deadline)
+
+
+async def run_in_route_pool(func: Callable, *args, **kwargs):
+    """Run a blocking dependency in the pool of the route being served, or on
+    the shared threadpool outside a bulkhead route or with BULKHEAD_ENABLED=false.
+
+    FastAPI runs sync dependencies on AnyIO's shared threadpool whatever the
+    route's pool, so a dependency that does I/O (the user lookup of
+    get_current_user) is an async function that offloads through here instead.
+    """
+    pool = bulkheads.get(_route_pool.get())
+    if pool is None or not settings.BULKHEAD_ENABLED:
+        return await run_in_threadpool(func, *args, **kwargs)
+    return await pool.run(func, *args, **kwargs)
+
+
+def bulkhead(name: str, deadline: Optional[float] = None) -> Callable:
+    """Run a sync endpoint in the `name` pool under the pool's request deadline,
+    or `deadline` seconds (0 for none). With BULKHEAD_ENABLED=false the endpoint
+    runs on the shared threadpool, still with its deadline.
+
+    Goes below the router decorator, so the router registers the wrapper:
+
+        @router.post("/login")
+        @bulkhead("auth")
+        def login(...): ...
+
+    Only the endpoint body moves to the pool; sync dependencies stay on the
+    shared threadpool, so those that block go through `run_in_route_pool`.
+    """
+    pool = bulkheads[name]
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            return func
+
+        @functools.wraps(func)  # FastAPI reads the dependencies from the wrapped signature
+        async def endpoint(*args, **kwargs):
+            _set_deadline(pool, deadline)
+            if not settings.BULKHEAD_ENABLED:
+                return await run_in_threadpool(func, *args, **kwargs)
+            return await pool.run(func, *args, **kwargs)
+
+        endpoint.bulkhead = (name, deadline)
+        return endpoint
+
+    return decorator
+
+
+def bulkhead_route(name: str) -> Type[APIRoute]:
+    """Route class running every sync endpoint of a router in the `name` pool,
+    except those already assigned to another pool with @bulkhead.
+
+    The pool and its deadline are in place before the dependencies are solved,
+    so `run_in_route_pool` dependencies share the endpoint's pool and deadline.
+    """
+
+    class BulkheadRoute(APIRoute):
+        def __init__(self, path: str, endpoint: Callable, **kwargs):
+            endpoint = bulkhead(name)(endpoint)
+            # Read by get_route_handler, which APIRoute.__init__ calls
+            self.pool_name, self.deadline = getattr(endpoint, "bulkhead", (name, None))
+            super().__init__(path, endpoint, **kwargs)
+
+        def get_route_handler(self) -> Callable:
+            handler = super().get_route_handler()
+            pool, deadline = bulkheads[self.pool_name], self.deadline
+
+            async def route_handler(request):
+                _set_deadline(pool, deadline)
+                token = _route_pool.set(pool.name)
+                try:
+                    return await handler(request)
+                finally:
+                    _route_pool.reset(token)
+
+            return route_handler
+
+    return BulkheadRoute
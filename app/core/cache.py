@@ -0,0 +1,482 @@
+import json
+import logging
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Storage interface shared by every cache backend.
+
+    Values must be JSON serializable (plain dicts/lists coming from Supabase).
+    `shared` backends are visible to every worker, so the `Cache` facade keeps a
+    small per-process near cache in front of them and uses the invalidation
+    channel to drop stale local copies.
+    """
+
+    shared = False
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Set `key` only if it is absent (or expired); True when this call stored it"""
+        raise NotImplementedError
+
+    def publish_invalidation(self, keys: Iterable[str]) -> None:
+        """Broadcast invalidated keys to the other workers"""
+
+    def poll_invalidations(self) -> List[str]:
+        """Return keys invalidated by other workers since the last poll"""
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+class LRUCacheBackend(CacheBackend):
+    """Per-process LRU cache with TTL"""
+
+    def __init__(self, max_entries: int = 10000, default_ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        ttl = ttl if ttl is not None else self.default_ttl
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                return False
+            self._data[key] = (now + ttl if ttl else None, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Cache shared by the workers of one host through a SQLite file in WAL mode.
+
+    Invalidations are appended to a log table; each worker polls the rows it
+    has not seen yet.
+    """
+
+    shared = True
+    _LOG_RETENTION_SECONDS = 300
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._last_prune = 0.0
+        conn = self._conn()
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS cache_invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            """
+        )
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM cache_invalidations").fetchone()
+        self._last_invalidation_id = row[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), expires_at)
+        )
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._conn().executemany("DELETE FROM cache_entries WHERE key = ?", [(k,) for k in keys])
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        conn = self._conn()
+        conn.execute("DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), now + ttl if ttl else None)
+        )
+        return cursor.rowcount == 1
+
+    def publish_invalidation(self, keys: Iterable[str]) -> None:
+        now = time.time()
+        conn = self._conn()
+        conn.executemany(
+            "INSERT INTO cache_invalidations (key, created_at) VALUES (?, ?)",
+            [(k, now) for k in keys]
+        )
+        if now - self._last_prune > self._LOG_RETENTION_SECONDS:
+            self._last_prune = now
+            conn.execute(
+                "DELETE FROM cache_invalidations WHERE created_at < ?",
+                (now - self._LOG_RETENTION_SECONDS,)
+            )
+            conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+
+    def poll_invalidations(self) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT id, key FROM cache_invalidations WHERE id > ? ORDER BY id",
+            (self._last_invalidation_id,)
+        ).fetchall()
+        if rows:
+            self._last_invalidation_id = rows[-1][0]
+        return [key for _, key in rows]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RedisProtocolError(Exception):
+    pass
+
+
+class _RespConnection:
+    """Minimal blocking RESP2 client, enough for GET/SET/DEL/PUBLISH/SUBSCRIBE.
+
+    Speaks the plain Redis wire protocol, so it works against Redis, Valkey,
+    KeyDB or any local RESP-compatible stand-in.
+    """
+
+    def __init__(self, host: str, port: int, password: Optional[str] = None,
+                 db: int = 0, timeout: Optional[float] = 2.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.reader = self.sock.makefile("rb")
+        if password:
+            self.command("AUTH", password)
+        if db:
+            self.command("SELECT", db)
+
+    def send(self, *args) -> None:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self.sock.sendall(b"".join(parts))
+
+    def read(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise RedisProtocolError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self.reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self.read() for _ in range(length)]
+        raise RedisProtocolError(f"unexpected reply: {line!r}")
+
+    def command(self, *args):
+        self.send(*args)
+        return self.read()
+
+    def close(self) -> None:
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisCacheBackend(CacheBackend):
+    """Cache shared by every worker through a Redis-protocol server.
+
+    Invalidations are broadcast with PUBLISH and received by a background
+    SUBSCRIBE thread.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, channel: str = "praja:cache:invalidate"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.channel = channel
+        self._local = threading.local()
+        self._pending: deque = deque(maxlen=10000)
+        self._stopped = threading.Event()
+        self._subscriber = threading.Thread(target=self._subscribe_loop, name="cache-invalidation", daemon=True)
+        self._subscriber.start()
+
+    def _connect(self, timeout: Optional[float] = 2.0) -> _RespConnection:
+        return _RespConnection(self.host, self.port, self.password, self.db, timeout)
+
+    def _command(self, *args):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        try:
+            return conn.command(*args)
+        except (OSError, ConnectionError):
+            conn.close()
+            self._local.conn = None
+            raise
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._command("GET", key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        payload = json.dumps(value, default=str)
+        if ttl:
+            self._command("SET", key, payload, "PX", int(ttl * 1000))
+        else:
+            self._command("SET", key, payload)
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self._command("DEL", *keys)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        payload = json.dumps(value, default=str)
+        if ttl:
+            return self._command("SET", key, payload, "NX", "PX", int(ttl * 1000)) is not None
+        return self._command("SET", key, payload, "NX") is not None
+
+    def publish_invalidation(self, keys: Iterable[str]) -> None:
+        self._command("PUBLISH", self.channel, json.dumps(list(keys)))
+
+    def poll_invalidations(self) -> List[str]:
+        keys = []
+        while self._pending:
+            keys.append(self._pending.popleft())
+        return keys
+
+    def _subscribe_loop(self) -> None:
+        backoff = 0.5
+        while not self._stopped.is_set():
+            conn = None
+            try:
+                conn = self._connect(timeout=None)
+                conn.command("SUBSCRIBE", self.channel)
+                backoff = 0.5
+                while not self._stopped.is_set():
+                    message = conn.read()
+                    if isinstance(message, list) and len(message) == 3 and message[0] == b"message":
+                        self._pending.extend(json.loads(message[2]))
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscriber disconnected: {e}")
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def close(self) -> None:
+        self._stopped.set()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+
+
+class Cache:
+    """Facade used by the services.
+
+    Wraps a backend with key namespacing, a short-lived per-process near cache
+    for shared backends, and cross-worker invalidation. Backend failures are
+    logged and treated as misses so the cache can never break a request.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str = "praja",
+                 default_ttl: Optional[float] = None, near_ttl: float = 5,
+                 near_max_entries: int = 2000, poll_interval: float = 0.5):
+        self.backend = backend
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.near_ttl = near_ttl
+        self.near = LRUCacheBackend(near_max_entries, default_ttl=near_ttl) if backend.shared else None
+        self.poll_interval = poll_interval
+        self._last_poll = 0.0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _sync_invalidations(self) -> None:
+        if self.near is None:
+            return
+        now = time.monotonic()
+        if now - self._last_poll < self.poll_interval:
+            return
+        self._last_poll = now
+        try:
+            keys = self.backend.poll_invalidations()
+        except Exception as e:
+            logger.warning(f"Cache invalidation poll failed: {e}")
+            self.near.clear()
+            return
+        if keys:
+            self.near.delete(*keys)
+
+    def get(self, key: str) -> Optional[Any]:
+        full_key = self._key(key)
+        self._sync_invalidations()
+        if self.near is not None:
+            value = self.near.get(full_key)
+            if value is not None:
+                return value
+        try:
+            value = self.backend.get(full_key)
+        except Exception as e:
+            logger.warning(f"Cache get failed for {full_key}: {e}")
+            return None
+        if value is not None and self.near is not None:
+            self.near.set(full_key, value)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        full_key = self._key(key)
+        ttl = ttl if ttl is not None else self.default_ttl
+        try:
+            self.backend.set(full_key, value, ttl)
+        except Exception as e:
+            logger.warning(f"Cache set failed for {full_key}: {e}")
+            return
+        if self.near is not None:
+            self.near.set(full_key, value, min(ttl, self.near_ttl) if ttl else None)
+
+    def get_or_load(self, key: str, loader: Callable[[], Optional[Any]], ttl: Optional[float] = None) -> Optional[Any]:
+        """Return the cached value, calling `loader` on a miss. `None` results are not cached."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        """Drop keys here and in every other worker"""
+        full_keys = [self._key(k) for k in keys if k]
+        if not full_keys:
+            return
+        if self.near is not None:
+            self.near.delete(*full_keys)
+        try:
+            self.backend.delete(*full_keys)
+            self.backend.publish_invalidation(full_keys)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {full_keys}: {e}")
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def build_cache_backend(kind: str, url: str = "") -> CacheBackend:
+    kind = kind.lower()
+    if kind == "memory":
+        return LRUCacheBackend(settings.CACHE_MAX_ENTRIES)
+    if kind == "sqlite":
+        return SQLiteCacheBackend(url or "praja_cache.sqlite3")
+    if kind == "redis":
+        return RedisCacheBackend(url or "redis://localhost:6379/0")
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+_cache: Optional[Cache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = Cache(
+                    build_cache_backend(settings.CACHE_BACKEND, settings.CACHE_URL),
+                    default_ttl=settings.CACHE_DEFAULT_TTL_SECONDS,
+                    near_ttl=settings.CACHE_NEAR_TTL_SECONDS
+                )
+    return _cache
@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+
+_COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "application/problem+json"
+)
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type == "text/event-stream":
+        # SSE must reach the client event by event
+        return False
+    return content_type.startswith("text/") or content_type in _COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression as a pure ASGI middleware.
+
+    Complete responses of at least `minimum_size` bytes are compressed in one
+    go; streamed responses (exports) are compressed chunk by chunk with a sync
+    flush so the client keeps receiving data. Responses marked
+    `Cache-Control: public` keep their compressed bytes in a small LRU keyed
+    by a hash of the body, so a hot list is not recompressed on every hit.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4, cache_entries: int = 256, cache_max_body: int = 1 << 20):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_entries = cache_entries
+        self.cache_max_body = cache_max_body
+        self._cache: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(self, encoding, send).send)
+
+    def _negotiate(self, accept_encoding: str) -> Optional[str]:
+        """Preferred supported encoding from Accept-Encoding (q-values honoured, br wins ties)"""
+        weights = {}
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.strip().partition(";")
+            q = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    q = float(params[2:])
+                except ValueError:
+                    q = 0.0
+            weights[name.strip()] = q
+        candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+        best = max(candidates, key=lambda name: weights.get(name, weights.get("*", 0.0)))
+        return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+    def compress(self, body: bytes, encoding: str, cacheable: bool) -> bytes:
+        key = None
+        if cacheable and self.cache_entries and len(body) <= self.cache_max_body:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+        if encoding == "br":
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        if key is not None:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return compressed
+
+    def stream_compressor(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return lambda data: compressor.process(data) + compressor.flush(), compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+class _CompressingSender:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start: Optional[Message] = None
+        self.mode: Optional[str] = None
+        self.compress_chunk = None
+        self.finish = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.mode is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            if not _compressible(headers) or (not more_body and len(body) < self.middleware.minimum_size):
+                self.mode = "identity"
+            elif not more_body:
+                cacheable = self.start["status"] == 200 and "public" in headers.get("cache-control", "")
+                compressed = self.middleware.compress(body, self.encoding, cacheable)
+                headers["Content-Encoding"] = self.encoding
+                headers["Content-Length"] = str(len(compressed))
+                headers.add_vary_header("Accept-Encoding")
+                await self._flush_start()
+                await self._send({"type": "http.response.body", "body": compressed})
+                self.mode = "done"
+                return
+            else:
+                self.mode = "stream"
+                self.compress_chunk, self.finish = self.middleware.stream_compressor(self.encoding)
+                headers["Content-Encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["content-length"]
+
+        await self._flush_start()
+        if self.mode == "stream":
+            data = self.compress_chunk(body) if body else b""
+            if not more_body:
+                data += self.finish()
+            await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+        else:
+            await self._send(message)
+
+    async def _flush_start(self) -> None:
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self._send(start)
@@ -7,6 +7,14 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     SUPABASE_SERVICE_ROLE_KEY: str
+    
+    # Data access backend: supabase (PostgREST), postgres (direct, pooled) or sqlite (local)
+    DATABASE_BACKEND: str = "supabase"
+    DATABASE_URL: str = ""
+    DATABASE_POOL_MIN_SIZE: int = 1
+    DATABASE_POOL_MAX_SIZE: int = 10
+    DATABASE_PREPARE_THRESHOLD: int = 5  # negative disables prepared statements (pgbouncer)
+    DATABASE_SQLITE_PATH: str = "praja_local.sqlite3"
     JWT_SECRET: str
     JWT_ALG: str = "HS256"
     JWT_EXPIRES_MIN: int = 60
@@ -15,6 +23,23 @@ class Settings(BaseSettings):
     # Groq AI configuration
     GROQ_API_KEY: str
     GROQ_MODEL: str = "llama3-8b-8192"
+    GROQ_PROMPT_VERSION: str = "v2"
+    GROQ_INPUT_TOKEN_BUDGET: int = 400
+    GROQ_MAX_TOKENS_LOW: int = 384
+    GROQ_MAX_TOKENS_MEDIUM: int = 640
+    GROQ_MAX_TOKENS_HIGH: int = 1024
+    GROQ_MODEL_CHAIN: str = ""  # comma-separated, most capable first; empty = GROQ_MODEL only
+    GROQ_LARGE_INPUT_TOKENS: int = 1000
+    GROQ_TIMEOUT_SECONDS: float = 20.0
+    GROQ_UNHEALTHY_ERROR_RATE: float = 0.5
+    GROQ_UNHEALTHY_COOLDOWN_SECONDS: float = 30.0  # then one call probes the demoted model
+    GROQ_HEDGE_ENABLED: bool = True
+    GROQ_HEDGE_DEFAULT_DELAY_SECONDS: float = 4.0
+    GROQ_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    GROQ_HEDGE_MAX_WORKERS: int = 0  # 0 = two per concurrent caller (AI pool + AI job workers)
+    GROQ_MODE: str = "live"  # live, record (live + save to the cassette) or replay (cassette only, offline)
+    GROQ_BASE_URL: str = ""  # empty = Groq's API; e.g. http://localhost:8090 for scripts/groq_stub.py
+    GROQ_CASSETTE_PATH: str = "groq_cassette.jsonl"
     
     # CORS configuration
     ALLOWED_ORIGINS: List[str] = [
@@ -30,10 +55,122 @@ class Settings(BaseSettings):
     CSRF_PROTECTION_ENABLED: bool = True
     SECURE_COOKIES: bool = True
     
+    # Login throttling (checked before the user lookup and bcrypt)
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_WINDOW_SECONDS: float = 300
+    LOGIN_MAX_ATTEMPTS_PER_EMAIL: int = 5
+    LOGIN_MAX_ATTEMPTS_PER_IP: int = 30
+    LOGIN_LOCKOUT_SECONDS: float = 30
+    LOGIN_MAX_LOCKOUT_SECONDS: float = 900
+    LOGIN_THROTTLE_MAX_KEYS: int = 100000
+    
+    # Bulk user import
+    USER_IMPORT_BATCH_SIZE: int = 500
+    USER_IMPORT_MAX_ROWS: int = 50000
+    USER_IMPORT_MAX_ERRORS: int = 1000
+    USER_IMPORT_HASH_WORKERS: int = 0  # 0 = one per CPU
+    
+    # Response compression
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_CACHE_ENTRIES: int = 256
+    CATEGORIES_MAX_AGE_SECONDS: int = 60
+    
+    # Background health probes (cached for /health, /health/ready and /ai/health)
+    HEALTH_PROBE_ENABLED: bool = True
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 15
+    HEALTH_PROBE_GROQ_INTERVAL_SECONDS: float = 60
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 5
+    HEALTH_PROBE_STALE_SECONDS: float = 90  # older results count as down
+    
     # Server settings
     PORT: int = 8000
     HOST: str = "0.0.0.0"
 
+    # Cache settings (memory, sqlite or redis)
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: str = ""
+    CACHE_DEFAULT_TTL_SECONDS: int = 300
+    CACHE_NEAR_TTL_SECONDS: int = 5
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_AI_RESPONSE_TTL_SECONDS: int = 3600
+
+    # Idempotency-Key replay store (memory, sqlite or redis)
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_BACKEND: str = "memory"
+    IDEMPOTENCY_URL: str = ""
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_ENTRIES: int = 10000
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 120  # a pending key is released after this if its worker dies
+    IDEMPOTENCY_WAIT_SECONDS: float = 30
+
+    # Ticket change feed
+    TICKET_EVENTS_HISTORY: int = 1000
+    SSE_HEARTBEAT_SECONDS: int = 15
+
+    # Ticket delta sync
+    SYNC_PAGE_SIZE: int = 500
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+
+    # In-process replica of the tickets table for list/detail reads
+    TICKET_REPLICA_ENABLED: bool = False
+    TICKET_REPLICA_POLL_SECONDS: float = 2
+    TICKET_REPLICA_MAX_STALENESS_SECONDS: float = 10  # older than this, reads go to the database
+    TICKET_REPLICA_PAGE_SIZE: int = 1000
+
+    # Work queue SLA: hours an open ticket may wait, per priority
+    TICKET_SLA_HOURS_HIGH: float = 4
+    TICKET_SLA_HOURS_MEDIUM: float = 24
+    TICKET_SLA_HOURS_LOW: float = 72
+
+    # Isolated worker pools per route class: threads, requests allowed to wait, max wait
+    BULKHEAD_ENABLED: bool = True
+    BULKHEAD_AI_SIZE: int = 10
+    BULKHEAD_AI_QUEUE: int = 20
+    BULKHEAD_AUTH_SIZE: int = 4  # bcrypt is CPU-bound; about the number of cores
+    BULKHEAD_AUTH_QUEUE: int = 50
+    BULKHEAD_CRUD_SIZE: int = 20
+    BULKHEAD_CRUD_QUEUE: int = 200
+    BULKHEAD_QUEUE_TIMEOUT_SECONDS: float = 10
+
+    # Request deadlines per route class (0 = none) and cancellation on client disconnect
+    REQUEST_DEADLINE_AI_SECONDS: float = 30
+    REQUEST_DEADLINE_AUTH_SECONDS: float = 10
+    REQUEST_DEADLINE_CRUD_SECONDS: float = 15
+    REQUEST_CANCEL_ON_DISCONNECT: bool = True
+
+    # Audit log of ticket and user changes, written in background batches
+    AUDIT_ENABLED: bool = True
+    AUDIT_BATCH_SIZE: int = 100
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS: float = 0.05  # wait for room in a full queue before dropping the event
+    AUDIT_PAGE_SIZE: int = 50
+
+    # Ticket export
+    EXPORT_PAGE_SIZE: int = 1000
+
+    # Background AI jobs
+    AI_JOBS_DB_PATH: str = "praja_ai_jobs.sqlite3"
+    AI_JOBS_WORKERS: int = 4
+    AI_JOBS_MAX_QUEUE: int = 200
+    AI_JOBS_STALE_SECONDS: int = 300
+    AI_JOBS_RETENTION_HOURS: int = 24
+    AI_JOBS_MAX_WAIT_SECONDS: int = 30
+
+    # Auto-triage of new tickets
+    AI_TRIAGE_ENABLED: bool = True
+    AI_TRIAGE_BATCH_SIZE: int = 8
+    AI_TRIAGE_BATCH_WAIT_SECONDS: float = 5
+    AI_TRIAGE_MAX_QUEUE: int = 1000
+
+    # Local similarity index over tickets
+    SIMILARITY_INDEX_ENABLED: bool = True
+    SIMILARITY_DIM: int = 262144
+    SIMILARITY_REUSE_THRESHOLD: float = 0.9
+
     class Config:
         env_file = ".env"
         extra = "ignore"  # Ignore extra environment variables
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+
+# Not a registered status; the nginx convention for "client closed request", only ever seen in logs
+CLIENT_CLOSED_REQUEST = 499
+
+
+class RequestCancelled(HTTPException):
+    """Raised at a checkpoint once the request is past its deadline or its client is gone"""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        if reason == "deadline":
+            super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Request deadline exceeded")
+        else:
+            super().__init__(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+
+
+class CancellationStats:
+    def __init__(self):
+        self.deadlines_exceeded = 0
+        self.disconnects = 0
+        # checkpoint ("groq", "database", "queue") -> calls skipped because of a cancelled request
+        self.cancelled: Dict[str, int] = {}
+
+    def snapshot(self) -> dict:
+        return {
+            "deadlines_exceeded": self.deadlines_exceeded,
+            "client_disconnects": self.disconnects,
+            "cancelled_calls": dict(self.cancelled)
+        }
+
+
+cancellation_stats = CancellationStats()
+
+
+class RequestContext:
+    """Deadline and cancellation state of one HTTP request.
+
+    Sync code cannot be interrupted from outside its thread, so cancellation
+    is cooperative: Groq and database calls go through `check` first, and
+    network timeouts are capped to `remaining()`. The context travels with
+    contextvars into the worker thread running the endpoint.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.deadline: Optional[float] = None
+        self.cancelled: Optional[str] = None  # "deadline" or "disconnect"
+        self.finished = False
+
+    def set_timeout(self, seconds: float) -> None:
+        """Deadline `seconds` after the request arrived; 0 means none"""
+        self.deadline = self.started + seconds if seconds > 0 else None
+
+    def remaining(self) -> Optional[float]:
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def cancel(self, reason: str) -> None:
+        if self.cancelled is None and not self.finished:
+            self.cancelled = reason
+            if reason == "deadline":
+                cancellation_stats.deadlines_exceeded += 1
+            else:
+                cancellation_stats.disconnects += 1
+
+    def check(self, checkpoint: str) -> None:
+        if self.cancelled is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline")
+        if self.cancelled is not None:
+            cancellation_stats.cancelled[checkpoint] = cancellation_stats.cancelled.get(checkpoint, 0) + 1
+            raise RequestCancelled(self.cancelled)
+
+
+_current: ContextVar[Optional[RequestContext]] = ContextVar("request_context", default=None)
+
+
+def current_request() -> Optional[RequestContext]:
+    return _current.get()
+
+
+def check_deadline(checkpoint: str) -> None:
+    """Raise RequestCancelled if the current request is cancelled; no-op outside requests"""
+    context = _current.get()
+    if context is not None:
+        context.check(checkpoint)
+
+
+def has_deadline() -> bool:
+    context = _current.get()
+    return context is not None and context.deadline is not None
+
+
+def capped_timeout(timeout: float, minimum: float = 0.1) -> float:
+    """`timeout`, shortened to what is left of the current request's deadline"""
+    context = _current.get()
+    remaining = context.remaining() if context is not None else None
+    if remaining is None:
+        return timeout
+    return max(min(timeout, remaining), minimum)
+
+
+class RequestDeadlineMiddleware:
+    """Gives every HTTP request a RequestContext and notices client disconnects.
+
+    A pump task is the only reader of the ASGI `receive` channel and hands
+    messages to the app through a one-slot queue, so body backpressure is
+    kept; once the client goes away before the response is complete, the
+    context is cancelled and the endpoint stops at its next checkpoint.
+    The deadline itself is set per route class by the bulkhead that runs
+    the endpoint.
+    """
+
+    def __init__(self, app, detect_disconnect: bool = True):
+        self.app = app
+        self.detect_disconnect = detect_disconnect
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        context = RequestContext()
+        token = _current.set(context)
+        try:
+            if not self.detect_disconnect:
+                await self.app(scope, receive, send)
+                return
+            await self._run_watched(context, scope, receive, send)
+        finally:
+            context.finished = True
+            _current.reset(token)
+
+    async def _run_watched(self, context: RequestContext, scope, receive, send):
+        messages: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+        async def pump():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    context.cancel("disconnect")
+                    await messages.put(message)
+                    return
+                await messages.put(message)
+
+        async def receive_from_pump():
+            message = await messages.get()
+            if message["type"] == "http.disconnect":
+                messages.put_nowait(message)  # every later receive() sees it too
+            return message
+
+        async def send_and_track(message):
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                context.finished = True
+            await send(message)
+
+        task = asyncio.create_task(pump())
+        try:
+            await self.app(scope, receive_from_pump, send_and_track)
+        finally:
+            task.cancel()
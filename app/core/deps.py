@@ -1,32 +1,42 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import Client
-from ..database.connection import get_supabase
+from ..database.connection import get_repositories
+from ..database.repository import Repositories
+from .bulkhead import run_in_route_pool
+from .cache import Cache, get_cache
 from .security import decode_token
-from ..models.user import User, Role
+from ..models.user import USER_PUBLIC_COLUMNS, User, Role
 
 bearer = HTTPBearer()
 
 
-def get_current_user(
+async def get_current_user(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
-    supabase: Client = Depends(get_supabase)
+    repos: Repositories = Depends(get_repositories),
+    cache: Cache = Depends(get_cache)
 ) -> User:
+    # Async so the cache/database lookup runs in the route's own pool, not FastAPI's shared one
+    return await run_in_route_pool(_load_user, creds, repos, cache)
+
+
+def _load_user(creds: HTTPAuthorizationCredentials, repos: Repositories, cache: Cache) -> User:
     try:
         payload = decode_token(creds.credentials)
         email = payload.get("sub")
         if not email:
             raise ValueError("invalid token")
         
-        response = supabase.table("users").select("*").eq("email", email).execute()
-        
-        if not response.data:
+        user_data = cache.get_or_load(
+            f"user:email:{email}", lambda: repos.users.find_one({"email": email}, columns=USER_PUBLIC_COLUMNS)
+        )
+        if not user_data:
             raise ValueError("user not found")
         
-        user_data = response.data[0]
         user = User.from_dict(user_data)
         return user
         
+    except HTTPException:
+        raise  # request deadline or disconnect, not a bad token
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,7 +44,7 @@ def get_current_user(
         )
 
 
-def require_admin(user: User = Depends(get_current_user)) -> User:
+async def require_admin(user: User = Depends(get_current_user)) -> User:
     if user.role != Role.ADMIN:
         raise HTTPException(status_code=403, detail="Admins only")
     return user
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .cache import CacheBackend, LRUCacheBackend, build_cache_backend
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    body = json.dumps(payload.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Replays the first response of requests sent with an Idempotency-Key.
+
+    The first request claims the key with a set-if-absent on the backend (a
+    "pending" record that expires after `lock_timeout`, in case the worker dies)
+    and stores its JSON response for `ttl` seconds once it succeeds. Duplicates
+    arriving meanwhile wait up to `wait_timeout` for the original - woken
+    directly when it runs in this process, polling the backend otherwise - and
+    get the stored response. A failed original releases the key so the client
+    can retry, and so does a response the caller's `keep` predicate rejects
+    (a degraded answer that a retry may improve on). Reusing a key with a different body is rejected with 422.
+
+    Any CacheBackend works: the in-process LRU bounds the number of keys, the
+    sqlite and redis backends share them between workers.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, lock_timeout: float, wait_timeout: float,
+                 poll_interval: float = 0.05, namespace: str = "praja:idempotency"):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.namespace = namespace
+        self._inflight: Dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+        self.replays = 0
+        self.waits = 0
+
+    def respond(self, scope: str, key: str, payload: BaseModel, handler: Callable[[], Any],
+                keep: Optional[Callable[[Any], bool]] = None) -> JSONResponse:
+        """Run `handler` once per (scope, key) and return its result as JSON.
+
+        `scope` should identify the endpoint and the caller so keys from
+        different users never collide. Replays carry `Idempotent-Replayed: true`.
+        Results for which `keep` (given the JSON body) is false are returned
+        but not stored.
+        """
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"
+            )
+        body, replayed = self.execute(
+            f"{self.namespace}:{scope}:{key}",
+            request_fingerprint(payload),
+            lambda: jsonable_encoder(handler()),
+            keep
+        )
+        return JSONResponse(content=body, headers={"Idempotent-Replayed": "true" if replayed else "false"})
+
+    def execute(self, full_key: str, fingerprint: str, handler: Callable[[], Any],
+                keep: Optional[Callable[[Any], bool]] = None) -> tuple:
+        """Return (response, replayed)"""
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        while True:
+            try:
+                claimed = self.backend.add(full_key, {"state": "pending", "fingerprint": fingerprint}, self.lock_timeout)
+                record = None if claimed else self.backend.get(full_key)
+            except Exception as e:
+                # Like the cache, a store outage must not fail the request itself
+                logger.warning(f"Idempotency store unavailable for {full_key}: {e}")
+                return handler(), False
+            if claimed:
+                break
+            if record is None:
+                continue  # expired between add() and get()
+            if record.get("fingerprint") != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request body"
+                )
+            if record.get("state") == "done":
+                self.replays += 1
+                return record["response"], True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"}
+                )
+            if not waited:
+                waited = True
+                self.waits += 1
+            with self._inflight_lock:
+                event = self._inflight.get(full_key)
+            if event is not None:
+                event.wait(remaining)
+            else:
+                time.sleep(min(self.poll_interval, remaining))
+
+        event = threading.Event()
+        with self._inflight_lock:
+            self._inflight[full_key] = event
+        try:
+            response = handler()
+        except BaseException:
+            self._safe(self.backend.delete, full_key)
+            raise
+        else:
+            if keep is not None and not keep(response):
+                self._safe(self.backend.delete, full_key)
+            else:
+                self._safe(
+                    self.backend.set, full_key,
+                    {"state": "done", "fingerprint": fingerprint, "response": response}, self.ttl
+                )
+            return response, False
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(full_key, None)
+            event.set()
+
+    @staticmethod
+    def _safe(operation: Callable, *args) -> None:
+        try:
+            operation(*args)
+        except Exception as e:
+            logger.warning(f"Idempotency store write failed: {e}")
+
+
+def build_idempotency_backend(kind: str, url: str = "") -> CacheBackend:
+    if kind.lower() == "memory":
+        return LRUCacheBackend(settings.IDEMPOTENCY_MAX_ENTRIES)
+    return build_cache_backend(kind, url)
+
+
+_store: Optional[IdempotencyStore] = None
+_store_lock = threading.Lock()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = IdempotencyStore(
+                    build_idempotency_backend(settings.IDEMPOTENCY_BACKEND, settings.IDEMPOTENCY_URL),
+                    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+                    lock_timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS,
+                    wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS
+                )
+    return _store
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+from fastapi import HTTPException, status
+
+from .config import settings
+
+
+class _Window:
+    __slots__ = ("attempts", "locked_until", "strikes", "last_lock")
+
+    def __init__(self, limit: int):
+        # Only the last `limit` timestamps matter for a sliding-window log
+        self.attempts: deque = deque(maxlen=limit)
+        self.locked_until = 0.0
+        self.strikes = 0
+        self.last_lock = 0.0
+
+
+class LoginThrottle:
+    """In-memory sliding-window limiter for login attempts.
+
+    Attempts are counted per email and per client IP before any database or
+    bcrypt work. Going over a limit locks the key for `lockout` seconds,
+    doubling on each repeated lockout up to `max_lockout`; a lock that stays
+    quiet for `max_lockout` seconds forgets its strikes. A successful login
+    clears the email's window and is taken back out of the IP's, so only
+    failures add up for everyone behind a shared NAT or proxy address.
+    Keys live in an LRU bounded by `max_keys`.
+    """
+
+    def __init__(self, window: float, max_per_email: int, max_per_ip: int, lockout: float,
+                 max_lockout: float, max_keys: int):
+        self.window = window
+        self.max_per_email = max_per_email
+        self.max_per_ip = max_per_ip
+        self.lockout = lockout
+        self.max_lockout = max_lockout
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._keys: "OrderedDict[str, _Window]" = OrderedDict()
+        self.allowed = 0
+        self.shed_email = 0
+        self.shed_ip = 0
+        self.lockouts = 0
+        self.evicted = 0
+
+    def acquire(self, email: str, client_ip: Optional[str] = None) -> float:
+        """Count a login attempt or raise 429 with Retry-After; returns the attempt's timestamp for `reset`"""
+        now = time.monotonic()
+        checks = [(f"email:{email.strip().lower()}", self.max_per_email)]
+        if client_ip:
+            checks.append((f"ip:{client_ip}", self.max_per_ip))
+
+        with self._lock:
+            for key, limit in checks:
+                retry_after = self._retry_after(key, limit, now)
+                if retry_after:
+                    if key.startswith("ip:"):
+                        self.shed_ip += 1
+                    else:
+                        self.shed_email += 1
+                    raise HTTPException(
+                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                        detail="Too many login attempts, try again later",
+                        headers={"Retry-After": str(int(retry_after + 0.999))}
+                    )
+            for key, limit in checks:
+                self._entry(key, limit).attempts.append(now)
+            self.allowed += 1
+        return now
+
+    def reset(self, email: str, client_ip: Optional[str] = None, attempt: Optional[float] = None) -> None:
+        """After a successful login: forget the email's attempts and drop `attempt` from the IP's"""
+        with self._lock:
+            self._keys.pop(f"email:{email.strip().lower()}", None)
+            entry = self._keys.get(f"ip:{client_ip}") if client_ip and attempt is not None else None
+            if entry is not None:
+                try:
+                    entry.attempts.remove(attempt)
+                except ValueError:
+                    pass  # already out of the window or cleared by a lockout
+
+    def _retry_after(self, key: str, limit: int, now: float) -> float:
+        entry = self._keys.get(key)
+        if entry is None:
+            return 0.0
+        if entry.locked_until > now:
+            return entry.locked_until - now
+        if entry.strikes and now - entry.last_lock > self.max_lockout:
+            entry.strikes = 0
+        attempts = entry.attempts
+        if len(attempts) < limit or attempts[0] <= now - self.window:
+            return 0.0
+
+        entry.strikes += 1
+        entry.last_lock = now
+        entry.locked_until = now + min(self.lockout * 2 ** (entry.strikes - 1), self.max_lockout)
+        entry.attempts.clear()
+        self.lockouts += 1
+        return entry.locked_until - now
+
+    def _entry(self, key: str, limit: int) -> _Window:
+        entry = self._keys.get(key)
+        if entry is None:
+            entry = self._keys[key] = _Window(limit)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._keys.move_to_end(key)
+        return entry
+
+    def metrics(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "allowed": self.allowed,
+                "shed_email": self.shed_email,
+                "shed_ip": self.shed_ip,
+                "lockouts": self.lockouts,
+                "tracked_keys": len(self._keys),
+                "locked_keys": sum(1 for entry in self._keys.values() if entry.locked_until > now),
+                "evicted": self.evicted
+            }
+
+
+login_throttle = LoginThrottle(
+    window=settings.LOGIN_WINDOW_SECONDS,
+    max_per_email=settings.LOGIN_MAX_ATTEMPTS_PER_EMAIL,
+    max_per_ip=settings.LOGIN_MAX_ATTEMPTS_PER_IP,
+    lockout=settings.LOGIN_LOCKOUT_SECONDS,
+    max_lockout=settings.LOGIN_MAX_LOCKOUT_SECONDS,
+    max_keys=settings.LOGIN_THROTTLE_MAX_KEYS
+)
+
+
+def get_login_throttle() -> LoginThrottle:
+    return login_throttle
@@ -1,5 +1,8 @@
+import threading
+from typing import Optional
 from supabase import create_client, Client
 from ..core.config import settings
+from .repository import Repositories
 
 
 class SupabaseConnection:
@@ -34,3 +37,36 @@ def get_supabase() -> Client:
 
 def get_supabase_admin() -> Client:
     return supabase_connection.get_service_client()
+
+
+_repositories: Optional[Repositories] = None
+_repositories_lock = threading.Lock()
+
+
+def get_repositories() -> Repositories:
+    """Repositories for the configured DATABASE_BACKEND (supabase, postgres or sqlite)"""
+    global _repositories
+    if _repositories is None:
+        with _repositories_lock:
+            if _repositories is None:
+                _repositories = build_repositories(settings.DATABASE_BACKEND)
+    return _repositories
+
+
+def build_repositories(backend: str) -> Repositories:
+    if backend == "supabase":
+        from .supabase_repository import supabase_repositories
+        return supabase_repositories(get_supabase())
+    if backend == "postgres":
+        from .sql_repository import PostgresDatabase, sql_repositories
+        db = PostgresDatabase(
+            settings.DATABASE_URL,
+            min_size=settings.DATABASE_POOL_MIN_SIZE,
+            max_size=settings.DATABASE_POOL_MAX_SIZE,
+            prepare_threshold=settings.DATABASE_PREPARE_THRESHOLD
+        )
+        return sql_repositories("postgres", db)
+    if backend == "sqlite":
+        from .sql_repository import SQLiteDatabase, sql_repositories
+        return sql_repositories("sqlite", SQLiteDatabase(settings.DATABASE_SQLITE_PATH), touch_updated_at=True)
+    raise ValueError(f"Unknown DATABASE_BACKEND: {backend}")
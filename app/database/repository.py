@@ -0,0 +1,100 @@
+import enum
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+# Filters are a dict of "column" or "column__op" -> value; op is one of
+# eq (default), neq, gt, gte, lt, lte, in, iin (case-insensitive in, for
+# strings), istartswith. "name|email__istartswith" ORs the same condition over
+# several columns. None values are ignored, so
+# optional filters can be passed straight through.
+Where = Optional[Dict[str, Any]]
+# (column, descending) pairs
+Order = Sequence[Tuple[str, bool]]
+
+OPERATORS = ("eq", "neq", "gt", "gte", "lt", "lte", "in", "iin", "istartswith")
+
+
+def parse_where(where: Where) -> List[Tuple[List[str], str, Any]]:
+    """Split a filter dict into ([columns], op, value) conditions, unwrapping enums"""
+    conditions = []
+    for key, value in (where or {}).items():
+        if value is None:
+            continue
+        columns, _, op = key.partition("__")
+        op = op or "eq"
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown filter operator: {op}")
+        if op == "iin":
+            value = [str(v.value if isinstance(v, enum.Enum) else v).lower() for v in value]
+        elif op == "in":
+            value = [v.value if isinstance(v, enum.Enum) else v for v in value]
+        elif isinstance(value, enum.Enum):
+            value = value.value
+        conditions.append((columns.split("|"), op, value))
+    return conditions
+
+
+def plain_values(values: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v.value if isinstance(v, enum.Enum) else v for k, v in values.items()}
+
+
+class Repository(ABC):
+    """Row access for one table.
+
+    Rows are plain dicts with timestamps as ISO-8601 strings, the shape the
+    models' `from_dict` constructors expect, whatever the backend.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+
+    @abstractmethod
+    def find(self, where: Where = None, columns: Optional[Sequence[str]] = None,
+             order: Order = (), limit: Optional[int] = None) -> List[dict]:
+        """Rows matching `where`, optionally projected, ordered and limited"""
+
+    @abstractmethod
+    def count(self, where: Where = None, estimated: bool = False) -> int:
+        """Number of matching rows; `estimated` may use planner statistics"""
+
+    @abstractmethod
+    def insert(self, rows: Union[dict, List[dict]]) -> List[dict]:
+        """Insert one or many rows and return them as stored"""
+
+    @abstractmethod
+    def update(self, values: dict, where: Where) -> List[dict]:
+        """Update matching rows and return them as stored"""
+
+    @abstractmethod
+    def delete(self, where: Where) -> None:
+        """Delete matching rows"""
+
+    def get(self, id: int) -> Optional[dict]:
+        rows = self.find({"id": id}, limit=1)
+        return rows[0] if rows else None
+
+    def find_one(self, where: Where, columns: Optional[Sequence[str]] = None) -> Optional[dict]:
+        rows = self.find(where, columns=columns, limit=1)
+        return rows[0] if rows else None
+
+    def exists(self, where: Where = None) -> bool:
+        return bool(self.find(where, columns=["id"], limit=1))
+
+    @staticmethod
+    def _require_filter(where: Where) -> None:
+        # An update/delete whose filters were all None must not hit every row
+        if not parse_where(where):
+            raise ValueError("update/delete requires at least one filter")
+
+
+class Repositories:
+    """The repositories the services use, all from one backend"""
+
+    def __init__(self, backend: str, users: Repository, categories: Repository,
+                 tickets: Repository, ticket_tombstones: Repository, audit_events: Repository):
+        self.backend = backend
+        self.users = users
+        self.categories = categories
+        self.tickets = tickets
+        self.ticket_tombstones = ticket_tombstones
+        self.audit_events = audit_events
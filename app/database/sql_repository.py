@@ -0,0 +1,273 @@
+import re
+import sqlite3
+import threading
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+from ..core.deadline import check_deadline
+from .repository import Order, Repository, Repositories, Where, parse_where, plain_values
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+_COMPARISONS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _ident(name: str) -> str:
+    if not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name: {name}")
+    return name
+
+
+def _like_prefix(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class SQLDatabase:
+    """Connection handling and dialect details for SQLRepository"""
+
+    placeholder = "?"
+    ilike = "LIKE"
+    now_sql = "CURRENT_TIMESTAMP"
+
+    def run(self, sql: str, params: Sequence[Any] = ()) -> List[dict]:
+        raise NotImplementedError
+
+    def in_clause(self, column: str, values: list) -> Tuple[str, list]:
+        return f"{column} IN ({', '.join([self.placeholder] * len(values))})", list(values)
+
+    def estimate(self, table: str, where_sql: str, params: list) -> Optional[int]:
+        """Planner row estimate, or None when the backend has none"""
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class PostgresDatabase(SQLDatabase):
+    """Direct Postgres access over a psycopg 3 connection pool.
+
+    psycopg prepares a statement server-side once the same SQL text has run
+    `prepare_threshold` times on a connection; queries are built so their
+    text does not depend on argument values (`= ANY(%s)` instead of IN lists).
+    Behind a transaction-mode pooler (pgbouncer, Supabase port 6543) set the
+    threshold to a negative value to disable prepared statements.
+    """
+
+    placeholder = "%s"
+    ilike = "ILIKE"
+    now_sql = "NOW()"
+
+    def __init__(self, url: str, min_size: int = 1, max_size: int = 10, prepare_threshold: int = 5):
+        try:
+            from psycopg.rows import dict_row
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            raise RuntimeError("DATABASE_BACKEND=postgres requires: pip install 'psycopg[binary,pool]'")
+        self.pool = ConnectionPool(
+            url, min_size=min_size, max_size=max_size, open=True,
+            kwargs={"row_factory": dict_row, "prepare_threshold": prepare_threshold if prepare_threshold >= 0 else None}
+        )
+
+    def run(self, sql: str, params: Sequence[Any] = ()) -> List[dict]:
+        check_deadline("database")
+        with self.pool.connection() as conn:
+            cursor = conn.execute(sql, params)
+            rows = cursor.fetchall() if cursor.description else []
+        return [{k: v.isoformat() if isinstance(v, (datetime, date)) else v for k, v in row.items()} for row in rows]
+
+    def in_clause(self, column: str, values: list) -> Tuple[str, list]:
+        return f"{column} = ANY(%s)", [list(values)]
+
+    def estimate(self, table: str, where_sql: str, params: list) -> Optional[int]:
+        rows = self.run(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM {table}{where_sql}", params)
+        plan = next(iter(rows[0].values()))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'USER',
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    description TEXT,
+    color TEXT,
+    ticket_count INTEGER NOT NULL DEFAULT 0,
+    open_ticket_count INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE TABLE IF NOT EXISTS tickets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open',
+    priority TEXT NOT NULL DEFAULT 'MEDIUM',
+    created_by INTEGER NOT NULL REFERENCES users(id),
+    category_id INTEGER NOT NULL REFERENCES categories(id),
+    response TEXT,
+    suggested_category_id INTEGER REFERENCES categories(id),
+    suggested_priority TEXT,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+    updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_created_by ON tickets(created_by);
+CREATE INDEX IF NOT EXISTS idx_tickets_category_id ON tickets(category_id);
+CREATE INDEX IF NOT EXISTS idx_tickets_updated_at ON tickets(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_tickets_open_queue ON tickets(priority, created_at, id) WHERE status = 'open';
+CREATE TRIGGER IF NOT EXISTS tickets_category_counts_insert AFTER INSERT ON tickets BEGIN
+    UPDATE categories SET ticket_count = ticket_count + 1, open_ticket_count = open_ticket_count + (NEW.status = 'open')
+    WHERE id = NEW.category_id;
+END;
+CREATE TRIGGER IF NOT EXISTS tickets_category_counts_delete AFTER DELETE ON tickets BEGIN
+    UPDATE categories SET ticket_count = ticket_count - 1, open_ticket_count = open_ticket_count - (OLD.status = 'open')
+    WHERE id = OLD.category_id;
+END;
+CREATE TRIGGER IF NOT EXISTS tickets_category_counts_update AFTER UPDATE OF category_id, status ON tickets
+WHEN OLD.category_id <> NEW.category_id OR OLD.status <> NEW.status BEGIN
+    UPDATE categories SET ticket_count = ticket_count - 1, open_ticket_count = open_ticket_count - (OLD.status = 'open')
+    WHERE id = OLD.category_id;
+    UPDATE categories SET ticket_count = ticket_count + 1, open_ticket_count = open_ticket_count + (NEW.status = 'open')
+    WHERE id = NEW.category_id;
+END;
+CREATE TABLE IF NOT EXISTS ticket_tombstones (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id INTEGER NOT NULL,
+    created_by INTEGER NOT NULL,
+    deleted_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_ticket_tombstones_created_by ON ticket_tombstones(created_by, id);
+CREATE TABLE IF NOT EXISTS audit_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL,
+    entity_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    actor_id INTEGER,
+    changes TEXT NOT NULL DEFAULT '{}',
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+CREATE INDEX IF NOT EXISTS idx_audit_events_entity ON audit_events(entity, entity_id, id);
+CREATE INDEX IF NOT EXISTS idx_audit_events_actor ON audit_events(actor_id, id);
+"""
+
+
+class SQLiteDatabase(SQLDatabase):
+    """Single-file database for local development and tests; schema is created on open"""
+
+    now_sql = "strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')"
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    def run(self, sql: str, params: Sequence[Any] = ()) -> List[dict]:
+        check_deadline("database")
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            return [dict(row) for row in cursor.fetchall()]
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class SQLRepository(Repository):
+    """Repository that builds parameterized SQL for a SQLDatabase.
+
+    `touch_column` is set to the current time on every update, for backends
+    without the updated_at trigger of the Supabase schema.
+    """
+
+    def __init__(self, db: SQLDatabase, table: str, touch_column: Optional[str] = None):
+        super().__init__(_ident(table))
+        self.db = db
+        self.touch_column = touch_column
+
+    def _where(self, where: Where) -> Tuple[str, list]:
+        clauses, params = [], []
+        p = self.db.placeholder
+        for columns, op, value in parse_where(where):
+            parts = []
+            for column in map(_ident, columns):
+                if op in ("in", "iin"):
+                    if not value:
+                        parts.append("1 = 0")
+                        continue
+                    clause, values = self.db.in_clause(f"LOWER({column})" if op == "iin" else column, value)
+                    parts.append(clause)
+                    params.extend(values)
+                elif op == "istartswith":
+                    parts.append(f"{column} {self.db.ilike} {p} ESCAPE '\\'")
+                    params.append(_like_prefix(str(value)))
+                else:
+                    parts.append(f"{column} {_COMPARISONS[op]} {p}")
+                    params.append(value)
+            clauses.append(parts[0] if len(parts) == 1 else f"({' OR '.join(parts)})")
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def find(self, where: Where = None, columns: Optional[Sequence[str]] = None,
+             order: Order = (), limit: Optional[int] = None) -> List[dict]:
+        where_sql, params = self._where(where)
+        select = ", ".join(map(_ident, columns)) if columns else "*"
+        sql = f"SELECT {select} FROM {self.table}{where_sql}"
+        if order:
+            sql += " ORDER BY " + ", ".join(f"{_ident(column)} {'DESC' if desc else 'ASC'}" for column, desc in order)
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return self.db.run(sql, params)
+
+    def count(self, where: Where = None, estimated: bool = False) -> int:
+        where_sql, params = self._where(where)
+        if estimated:
+            estimate = self.db.estimate(self.table, where_sql, params)
+            if estimate is not None:
+                return estimate
+        return self.db.run(f"SELECT COUNT(*) AS count FROM {self.table}{where_sql}", params)[0]["count"]
+
+    def insert(self, rows: Union[dict, List[dict]]) -> List[dict]:
+        rows = [plain_values(row) for row in (rows if isinstance(rows, list) else [rows])]
+        if not rows:
+            return []
+        columns = list(rows[0])
+        values_sql = "(" + ", ".join([self.db.placeholder] * len(columns)) + ")"
+        sql = (
+            f"INSERT INTO {self.table} ({', '.join(map(_ident, columns))}) "
+            f"VALUES {', '.join([values_sql] * len(rows))} RETURNING *"
+        )
+        return self.db.run(sql, [row.get(column) for row in rows for column in columns])
+
+    def update(self, values: dict, where: Where) -> List[dict]:
+        self._require_filter(where)
+        values = plain_values(values)
+        assignments = [f"{_ident(column)} = {self.db.placeholder}" for column in values]
+        if self.touch_column and self.touch_column not in values:
+            assignments.append(f"{self.touch_column} = {self.db.now_sql}")
+        where_sql, params = self._where(where)
+        sql = f"UPDATE {self.table} SET {', '.join(assignments)}{where_sql} RETURNING *"
+        return self.db.run(sql, list(values.values()) + params)
+
+    def delete(self, where: Where) -> None:
+        self._require_filter(where)
+        where_sql, params = self._where(where)
+        self.db.run(f"DELETE FROM {self.table}{where_sql}", params)
+
+
+def sql_repositories(backend: str, db: SQLDatabase, touch_updated_at: bool = False) -> Repositories:
+    return Repositories(
+        backend,
+        users=SQLRepository(db, "users"),
+        categories=SQLRepository(db, "categories"),
+        tickets=SQLRepository(db, "tickets", touch_column="updated_at" if touch_updated_at else None),
+        ticket_tombstones=SQLRepository(db, "ticket_tombstones"),
+        audit_events=SQLRepository(db, "audit_events")
+    )
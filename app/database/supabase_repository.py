@@ -0,0 +1,92 @@
+from typing import List, Optional, Sequence, Union
+
+from postgrest.types import CountMethod
+from supabase import Client
+
+from ..core.deadline import check_deadline
+from .repository import Order, Repository, Repositories, Where, parse_where, plain_values
+
+
+class SupabaseRepository(Repository):
+    """Repository over the PostgREST API through supabase-py.
+
+    Counts come from PostgREST's Content-Range header, so at most one row is
+    transferred whatever the size of the result set.
+    """
+
+    def __init__(self, client: Client, table: str):
+        super().__init__(table)
+        self.client = client
+
+    @staticmethod
+    def _execute(query):
+        check_deadline("database")
+        return query.execute()
+
+    def _filtered(self, query, where: Where):
+        for columns, op, value in parse_where(where):
+            if op == "iin" and not value:
+                query = query.in_(columns[0], [])
+            elif len(columns) > 1 or op == "iin":
+                # postgrest-py has no or_() yet; add the or=(...) param directly.
+                # PostgREST has no lower(), so iin ORs one ilike per value.
+                values = value if op == "iin" else [value]
+                parts = ",".join(f"{column}.{self._operator(op, v)}" for column in columns for v in values)
+                query.params = query.params.add("or", f"({parts})")
+            elif op == "in":
+                query = query.in_(columns[0], value)
+            elif op == "istartswith":
+                query = query.ilike(columns[0], f"{value}*")
+            else:
+                query = getattr(query, op)(columns[0], value)
+        return query
+
+    @staticmethod
+    def _operator(op: str, value) -> str:
+        if op == "istartswith":
+            return f"ilike.{value}*"
+        if op == "iin":
+            # one value: escape LIKE wildcards and quote it. PostgREST still reads
+            # * as %, so callers that need exact matches re-check the rows.
+            pattern = str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            return 'ilike."{}"'.format(pattern.replace("\\", "\\\\").replace('"', '\\"'))
+        if op == "in":
+            return f"in.({','.join(str(v) for v in value)})"
+        return f"{op}.{value}"
+
+    def find(self, where: Where = None, columns: Optional[Sequence[str]] = None,
+             order: Order = (), limit: Optional[int] = None) -> List[dict]:
+        query = self._filtered(self.client.table(self.table).select(",".join(columns) if columns else "*"), where)
+        for column, desc in order:
+            query = query.order(column, desc=desc)
+        if limit is not None:
+            query = query.limit(limit)
+        return self._execute(query).data
+
+    def count(self, where: Where = None, estimated: bool = False) -> int:
+        method = CountMethod.estimated if estimated else CountMethod.exact
+        response = self._execute(self._filtered(self.client.table(self.table).select("id", count=method), where).limit(1))
+        return response.count or 0
+
+    def insert(self, rows: Union[dict, List[dict]]) -> List[dict]:
+        payload = [plain_values(row) for row in rows] if isinstance(rows, list) else plain_values(rows)
+        return self._execute(self.client.table(self.table).insert(payload)).data
+
+    def update(self, values: dict, where: Where) -> List[dict]:
+        self._require_filter(where)
+        return self._execute(self._filtered(self.client.table(self.table).update(plain_values(values)), where)).data
+
+    def delete(self, where: Where) -> None:
+        self._require_filter(where)
+        self._execute(self._filtered(self.client.table(self.table).delete(), where))
+
+
+def supabase_repositories(client: Client) -> Repositories:
+    return Repositories(
+        "supabase",
+        users=SupabaseRepository(client, "users"),
+        categories=SupabaseRepository(client, "categories"),
+        tickets=SupabaseRepository(client, "tickets"),
+        ticket_tombstones=SupabaseRepository(client, "ticket_tombstones"),
+        audit_events=SupabaseRepository(client, "audit_events")
+    )
@@ -1,9 +1,20 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from .api import auth, categories, tickets, ai
+from .api import auth, categories, tickets, ai, audit
 from .core.security_middleware import SecurityMiddleware
+from .core.compression import CompressionMiddleware
+from .core.deadline import RequestDeadlineMiddleware, cancellation_stats
 from .core.config import settings
+from .services.ai_jobs import get_ai_jobs
+from .services.triage_service import get_triage_queue
+from .services.similarity_index import start_similarity_index
+from .services.ticket_replica import get_ticket_replica
+from .services.health_prober import get_health_prober
+from .services.audit_log import get_audit_log
+from .core.bulkhead import get_bulkheads
+from .services.user_import import shutdown_hash_pool
 import os
 
 app = FastAPI(
@@ -45,10 +56,47 @@ app.add_middleware(
     expose_headers=["X-CSRF-Token"]
 )
 
+app.add_middleware(RequestDeadlineMiddleware, detect_disconnect=settings.REQUEST_CANCEL_ON_DISCONNECT)
+
+# Added last so it wraps everything else and compresses the final body
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        cache_entries=settings.COMPRESSION_CACHE_ENTRIES
+    )
+
 app.include_router(auth.router)
 app.include_router(categories.router)
 app.include_router(tickets.router)
 app.include_router(ai.router)
+app.include_router(audit.router)
+
+
+@app.on_event("startup")
+def start_background_workers():
+    get_ai_jobs().start()
+    if settings.AI_TRIAGE_ENABLED:
+        get_triage_queue().start()
+    if settings.SIMILARITY_INDEX_ENABLED:
+        start_similarity_index()
+    if settings.TICKET_REPLICA_ENABLED:
+        get_ticket_replica().start()
+    get_health_prober().start()
+    get_audit_log().start()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    get_ai_jobs().stop()
+    get_triage_queue().stop()
+    get_ticket_replica().stop()
+    get_health_prober().stop()
+    # Last, so events recorded while the other workers stopped are flushed too
+    get_audit_log().stop()
+    shutdown_hash_pool()
 
 
 @app.get("/", tags=["Root"])
@@ -65,8 +113,10 @@ def root():
 
 @app.get("/health", tags=["Health"])
 def health_check():
+    """Overall status from the cached background probes; never calls a dependency"""
     return {
-        "status": "healthy",
+        "status": get_health_prober().status(),
+        "checks": get_health_prober().results(),
         "environment": settings.ENV,
         "render_detected": bool(os.getenv("RENDER")),
         "cors_origins": settings.ALLOWED_ORIGINS,
@@ -74,3 +124,29 @@ def health_check():
         "port": os.getenv("PORT", "8000"),
         "host": settings.HOST
     }
+
+
+@app.get("/health/live", tags=["Health"])
+def liveness():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+def readiness():
+    """Readiness: the database answered the last background probe (503 otherwise)"""
+    ready, checks = get_health_prober().readiness()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": checks}
+    )
+
+
+@app.get("/health/pools", tags=["Health"])
+def worker_pools():
+    """Saturation of the per-route-class worker pools (ai, auth, crud) and cancelled requests"""
+    return {
+        "enabled": settings.BULKHEAD_ENABLED,
+        "pools": {name: pool.snapshot() for name, pool in get_bulkheads().items()},
+        "cancellations": cancellation_stats.snapshot()
+    }
@@ -15,4 +15,12 @@ class TicketStatus(str, enum.Enum):
 class TicketPriority(str, enum.Enum):
     LOW = "LOW"
     MEDIUM = "MEDIUM"
-    HIGH = "HIGH"
\ No newline at end of file
+    HIGH = "HIGH"
+
+    @property
+    def rank(self) -> int:
+        """Numeric urgency, higher first (the string values sort alphabetically)"""
+        return _PRIORITY_RANK[self.value]
+
+
+_PRIORITY_RANK = {"LOW": 1, "MEDIUM": 2, "HIGH": 3}
\ No newline at end of file
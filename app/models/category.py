@@ -2,12 +2,15 @@ from datetime import datetime
 
 
 class Category:
-    def __init__(self, id: int, name: str, description: str = None, color: str = None, created_at: datetime = None):
+    def __init__(self, id: int, name: str, description: str = None, color: str = None, created_at: datetime = None,
+                 ticket_count: int = 0, open_ticket_count: int = 0):
         self.id = id
         self.name = name
         self.description = description
         self.color = color
         self.created_at = created_at
+        self.ticket_count = ticket_count
+        self.open_ticket_count = open_ticket_count
 
     @classmethod
     def from_dict(cls, data: dict):
@@ -16,5 +19,7 @@ class Category:
             name=data['name'],
             description=data.get('description'),
             color=data.get('color'),
-            created_at=datetime.fromisoformat(data['created_at'].replace('Z', '+00:00')) if data.get('created_at') else None
+            created_at=datetime.fromisoformat(data['created_at'].replace('Z', '+00:00')) if data.get('created_at') else None,
+            ticket_count=data.get('ticket_count') or 0,
+            open_ticket_count=data.get('open_ticket_count') or 0
         )
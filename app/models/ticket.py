@@ -5,7 +5,8 @@ from .base import TicketStatus, TicketPriority
 class Ticket:
     def __init__(self, id: int, title: str, description: str, status: TicketStatus,
                  created_by: int, category_id: int, priority: TicketPriority = None,
-                 response: str = None, created_at: datetime = None, updated_at: datetime = None):
+                 response: str = None, created_at: datetime = None, updated_at: datetime = None,
+                 suggested_category_id: int = None, suggested_priority: TicketPriority = None):
         self.id = id
         self.title = title
         self.description = description
@@ -16,6 +17,8 @@ class Ticket:
         self.response = response
         self.created_at = created_at
         self.updated_at = updated_at
+        self.suggested_category_id = suggested_category_id
+        self.suggested_priority = suggested_priority
 
     @classmethod
     def from_dict(cls, data: dict):
@@ -29,5 +32,7 @@ class Ticket:
             priority=TicketPriority(data.get('priority', 'MEDIUM')),
             response=data.get('response'),
             created_at=datetime.fromisoformat(data['created_at'].replace('Z', '+00:00')) if data.get('created_at') else None,
-            updated_at=datetime.fromisoformat(data['updated_at'].replace('Z', '+00:00')) if data.get('updated_at') else None
+            updated_at=datetime.fromisoformat(data['updated_at'].replace('Z', '+00:00')) if data.get('updated_at') else None,
+            suggested_category_id=data.get('suggested_category_id'),
+            suggested_priority=TicketPriority(data['suggested_priority']) if data.get('suggested_priority') else None
         )
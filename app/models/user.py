@@ -1,9 +1,13 @@
 from datetime import datetime
+from typing import Optional
 from .base import Role
 
+# Every column but password_hash: what listings and the user caches read
+USER_PUBLIC_COLUMNS = ["id", "name", "email", "role", "created_at"]
+
 
 class User:
-    def __init__(self, id: int, name: str, email: str, password_hash: str,
+    def __init__(self, id: int, name: str, email: str, password_hash: Optional[str],
                  role: Role, created_at: datetime):
         self.id = id
         self.name = name
@@ -18,7 +22,7 @@ class User:
             id=data['id'],
             name=data['name'],
             email=data['email'],
-            password_hash=data['password_hash'],
+            password_hash=data.get('password_hash'),
             role=Role(data['role']),
             created_at=datetime.fromisoformat(data['created_at'].replace('Z', '+00:00'))
         )
@@ -0,0 +1,348 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from ..api.schemas import AIJobOut
+from ..core.config import settings
+from ..models.base import TicketPriority
+from ..models.user import User, Role
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+
+class AIJobStore:
+    """Durable job table in a local SQLite file (WAL), shared by the workers of one host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS ai_jobs (
+                id TEXT PRIMARY KEY,
+                ticket_id INTEGER NOT NULL,
+                created_by INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                description TEXT NOT NULL,
+                priority TEXT,
+                apply_to_ticket INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                response TEXT,
+                used_model TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_ai_jobs_status ON ai_jobs(status, created_at);
+            """
+        )
+        columns = {row["name"] for row in self._conn().execute("PRAGMA table_info(ai_jobs)")}
+        if "priority" not in columns:
+            self._conn().execute("ALTER TABLE ai_jobs ADD COLUMN priority TEXT")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def insert(self, job: dict) -> None:
+        columns = ", ".join(job)
+        placeholders = ", ".join("?" for _ in job)
+        self._conn().execute(f"INSERT INTO ai_jobs ({columns}) VALUES ({placeholders})", tuple(job.values()))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM ai_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, job_id: str, stale_before: float) -> bool:
+        """Atomically move a job to running; stale running jobs can be reclaimed"""
+        cursor = self._conn().execute(
+            "UPDATE ai_jobs SET status = ?, started_at = ? "
+            "WHERE id = ? AND (status = ? OR (status = ? AND started_at < ?))",
+            (RUNNING, time.time(), job_id, PENDING, RUNNING, stale_before)
+        )
+        return cursor.rowcount == 1
+
+    def finish(self, job_id: str, status: str, response: Optional[str] = None,
+               used_model: Optional[str] = None, error: Optional[str] = None) -> None:
+        self._conn().execute(
+            "UPDATE ai_jobs SET status = ?, response = ?, used_model = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, response, used_model, error, time.time(), job_id)
+        )
+
+    def unfinished(self, stale_before: float) -> List[str]:
+        rows = self._conn().execute(
+            "SELECT id FROM ai_jobs WHERE status = ? OR (status = ? AND started_at < ?) ORDER BY created_at",
+            (PENDING, RUNNING, stale_before)
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+    def purge(self, finished_before: float) -> None:
+        self._conn().execute(
+            "DELETE FROM ai_jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (DONE, FAILED, finished_before)
+        )
+
+
+class AIJobQueue:
+    """Bounded worker pool running Groq generations outside the request cycle.
+
+    Jobs are persisted before being queued, so pending work survives a
+    restart and is re-queued by `start()`. Waiters long-poll through asyncio
+    futures resolved by the workers, with a periodic store check for jobs
+    finished by another process.
+    """
+
+    def __init__(self, store: AIJobStore, workers: int, max_queue: int):
+        self.store = store
+        self.workers = workers
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max_queue)
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        # Set while the store holds pending jobs that did not fit in the queue
+        self._backlog = False
+        self._recover_lock = threading.Lock()
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._waiters_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats_lock = threading.Lock()
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._queue_wait: deque = deque(maxlen=500)
+        self._run_time: deque = deque(maxlen=500)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self.store.purge(time.time() - settings.AI_JOBS_RETENTION_HOURS * 3600)
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ai-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        recovered = self._recover()
+        if recovered:
+            logger.info(f"Recovered {recovered} pending AI job(s)")
+
+    def _recover(self) -> int:
+        """Queue unfinished jobs from the store, as many as fit; the workers call
+        it again once the queue drains while some are left behind"""
+        with self._recover_lock:
+            queued = 0
+            self._backlog = False
+            for job_id in self.store.unfinished(self._stale_before()):
+                try:
+                    self._queue.put_nowait(job_id)
+                except queue.Full:
+                    logger.warning("AI job queue full while recovering; the rest stays pending until it drains")
+                    self._backlog = True
+                    break
+                queued += 1
+            return queued
+
+    def stop(self) -> None:
+        """Stop the workers after their current job; queued jobs stay pending in the store"""
+        self._stop.set()
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)  # wakes an idle worker right away
+            except queue.Full:
+                break  # busy workers see the stop event after their current job
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def submit(self, ticket, user: User, apply_to_ticket: bool = False) -> AIJobOut:
+        job = {
+            "id": uuid.uuid4().hex,
+            "ticket_id": ticket.id,
+            "created_by": user.id,
+            "title": ticket.title,
+            "description": ticket.description,
+            "priority": ticket.priority.value if ticket.priority else None,
+            "apply_to_ticket": int(apply_to_ticket),
+            "status": PENDING,
+            "created_at": time.time()
+        }
+        if self._queue.full():
+            with self._stats_lock:
+                self._rejected += 1
+            raise HTTPException(status_code=503, detail="AI job queue is full, try again later")
+        self.store.insert(job)
+        try:
+            self._queue.put_nowait(job["id"])
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            self.store.finish(job["id"], FAILED, error="queue full")
+            raise HTTPException(status_code=503, detail="AI job queue is full, try again later")
+        return self._to_out(self.store.get(job["id"]))
+
+    def get(self, job_id: str, user: User) -> dict:
+        job = self.store.get(job_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if user.role != Role.ADMIN and job["created_by"] != user.id:
+            raise HTTPException(status_code=403, detail="Forbidden")
+        return job
+
+    async def wait(self, job_id: str, user: User, timeout: float) -> AIJobOut:
+        """Long-poll: return once the job is finished or `timeout` elapses"""
+        self._loop = asyncio.get_running_loop()
+        deadline = time.monotonic() + timeout
+        while True:
+            future = self._loop.create_future()
+            with self._waiters_lock:
+                self._waiters.setdefault(job_id, []).append(future)
+            try:
+                job = self.get(job_id, user)
+                remaining = deadline - time.monotonic()
+                if job["status"] in (DONE, FAILED) or remaining <= 0:
+                    return self._to_out(job)
+                try:
+                    await asyncio.wait_for(future, min(remaining, 1.0))
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                with self._waiters_lock:
+                    waiters = self._waiters.get(job_id, [])
+                    if future in waiters:
+                        waiters.remove(future)
+                    if not waiters:
+                        self._waiters.pop(job_id, None)
+
+    def metrics(self) -> dict:
+        queue_wait = list(self._queue_wait)
+        run_time = list(self._run_time)
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "running": self._running,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "queue_wait_seconds": {"p50": _percentile(queue_wait, 0.5), "p95": _percentile(queue_wait, 0.95)},
+            "run_seconds": {"p50": _percentile(run_time, 0.5), "p95": _percentile(run_time, 0.95)}
+        }
+
+    def _stale_before(self) -> float:
+        return time.time() - settings.AI_JOBS_STALE_SECONDS
+
+    def _work(self) -> None:
+        from ..database.connection import get_repositories
+        from .groq_service import FALLBACK_MODEL, GroqService
+        from .ticket_service import TicketService
+
+        groq_service = None
+        while not self._stop.is_set():
+            try:
+                job_id = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if self._backlog:
+                    self._recover()
+                continue
+            if job_id is None:
+                return
+            if not self.store.claim(job_id, self._stale_before()):
+                continue
+            job = self.store.get(job_id)
+            started = time.time()
+            with self._stats_lock:
+                self._running += 1
+                self._queue_wait.append(started - job["created_at"])
+            try:
+                if groq_service is None:
+                    groq_service = GroqService()
+                priority = TicketPriority(job["priority"]) if job["priority"] else None
+                response, used_model = groq_service.generate_ticket_completion(
+                    job["title"], job["description"], priority
+                )
+                if used_model == FALLBACK_MODEL:
+                    # The canned answer must never end up stored on a ticket
+                    raise RuntimeError("AI service unavailable, no model produced a response")
+                if job["apply_to_ticket"]:
+                    TicketService(get_repositories()).set_response(job["ticket_id"], response)
+                self.store.finish(job_id, DONE, response=response, used_model=used_model)
+                succeeded = True
+            except Exception as e:
+                logger.error(f"AI job {job_id} failed: {e}")
+                self.store.finish(job_id, FAILED, error=str(e))
+                succeeded = False
+            with self._stats_lock:
+                self._running -= 1
+                self._completed += succeeded
+                self._failed += not succeeded
+                self._run_time.append(time.time() - started)
+            self._notify(job_id)
+
+    def _notify(self, job_id: str) -> None:
+        with self._waiters_lock:
+            waiters = self._waiters.pop(job_id, [])
+        loop = self._loop
+        if not waiters or loop is None or loop.is_closed():
+            return
+        for future in waiters:
+            loop.call_soon_threadsafe(lambda f=future: f.done() or f.set_result(None))
+
+    @staticmethod
+    def _to_out(job: dict) -> AIJobOut:
+        def ts(value):
+            return datetime.fromtimestamp(value, tz=timezone.utc) if value else None
+
+        return AIJobOut(
+            id=job["id"],
+            ticket_id=job["ticket_id"],
+            status=job["status"],
+            response=job["response"],
+            used_model=job["used_model"],
+            error=job["error"],
+            created_at=ts(job["created_at"]),
+            started_at=ts(job["started_at"]),
+            finished_at=ts(job["finished_at"])
+        )
+
+
+_ai_jobs: Optional[AIJobQueue] = None
+_ai_jobs_lock = threading.Lock()
+
+
+def get_ai_jobs() -> AIJobQueue:
+    global _ai_jobs
+    if _ai_jobs is None:
+        with _ai_jobs_lock:
+            if _ai_jobs is None:
+                _ai_jobs = AIJobQueue(
+                    AIJobStore(settings.AI_JOBS_DB_PATH),
+                    workers=settings.AI_JOBS_WORKERS,
+                    max_queue=settings.AI_JOBS_MAX_QUEUE
+                )
+    return _ai_jobs
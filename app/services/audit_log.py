@@ -0,0 +1,180 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from ..api.schemas import AuditEventOut, AuditPageOut
+from ..core.config import settings
+from ..database.repository import Repositories
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    """Who changed what, written off the request path.
+
+    `record` only appends a compact event to a bounded in-memory queue; a
+    background thread writes them to `audit_events` in one insert per batch,
+    as soon as `batch_size` events are waiting or `flush_interval` seconds
+    after the first one. When the queue is full (the database is slow or
+    down) `record` blocks for up to `enqueue_timeout` seconds, then drops the
+    event and counts it, so auditing never stalls a write for long. `stop`
+    flushes what is still queued.
+    """
+
+    def __init__(self, batch_size: int = 100, flush_interval: float = 1.0, max_queue: int = 10000,
+                 enqueue_timeout: float = 0.05, max_retries: int = 3, enabled: bool = True):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_flush_ms: Optional[float] = None
+
+    def record(self, entity: str, entity_id: int, action: str, actor: Optional[User] = None,
+               changes: Optional[dict] = None) -> bool:
+        """Queue an event; False when it was dropped because the queue stayed full"""
+        if not self.enabled:
+            return False
+        event = {
+            "entity": entity,
+            "entity_id": entity_id,
+            "action": action,
+            "actor_id": actor.id if actor else None,
+            "changes": json.dumps(changes or {}, ensure_ascii=False, default=str),
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.warning(f"Audit queue full, dropped {action} #{entity_id}")
+            return False
+
+    def _next_batch(self, wait: bool) -> List[dict]:
+        """Up to batch_size events; waits for the first, then up to flush_interval for the rest"""
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval) if wait else self._queue.get_nowait())
+        except queue.Empty:
+            return batch
+        deadline = time.monotonic() + (self.flush_interval if wait else 0)
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, repos: Repositories, batch: List[dict]) -> None:
+        for attempt in range(self.max_retries):
+            started = time.monotonic()
+            try:
+                repos.audit_events.insert(batch)
+            except Exception as e:
+                logger.error(f"Audit flush of {len(batch)} event(s) failed (attempt {attempt + 1}): {e}")
+                if self._stop.wait(0.5 * 2 ** attempt) and attempt:
+                    break  # shutting down: one retry only
+                continue
+            self.written += len(batch)
+            self.batches += 1
+            self.last_flush_ms = round((time.monotonic() - started) * 1000, 1)
+            return
+        self.failed += len(batch)
+
+    def flush(self, repos: Repositories) -> int:
+        """Write everything queued now; returns the number of events taken from the queue"""
+        taken = 0
+        while True:
+            batch = self._next_batch(wait=False)
+            if not batch:
+                return taken
+            taken += len(batch)
+            self._write(repos, batch)
+
+    def start(self) -> None:
+        from ..database.connection import get_repositories
+
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            repos = get_repositories()
+            while not self._stop.is_set():
+                batch = self._next_batch(wait=True)
+                if batch:
+                    self._write(repos, batch)
+            self.flush(repos)
+
+        self._thread = threading.Thread(target=run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=30)
+        self._thread = None
+
+    def page(self, repos: Repositories, entity: Optional[str] = None, entity_id: Optional[int] = None,
+             actor_id: Optional[int] = None, action: Optional[str] = None, cursor: Optional[int] = None,
+             limit: int = 50) -> AuditPageOut:
+        """Written events, newest first; `cursor` is the last id of the previous page.
+        Events still queued (up to flush_interval old) are not visible yet."""
+        rows = repos.audit_events.find(
+            {"entity": entity, "entity_id": entity_id, "actor_id": actor_id, "action": action, "id__lt": cursor},
+            order=[("id", True)],
+            limit=limit + 1
+        )
+        events = [AuditEventOut(**dict(row, changes=json.loads(row["changes"] or "{}"))) for row in rows[:limit]]
+        return AuditPageOut(events=events, next_cursor=events[-1].id if len(rows) > limit else None)
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_ms
+        }
+
+
+def diff(before: dict, after: dict, hidden=()) -> dict:
+    """{field: [old, new]} for the fields of `after` that changed; `hidden` fields only say they did"""
+    changes = {}
+    for field, value in after.items():
+        old = before.get(field)
+        if field in hidden:
+            changes[field] = "changed"
+        elif old != value:
+            changes[field] = [old, value]
+    return changes
+
+
+audit_log = AuditLog(
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_queue=settings.AUDIT_QUEUE_SIZE,
+    enqueue_timeout=settings.AUDIT_ENQUEUE_TIMEOUT_SECONDS,
+    enabled=settings.AUDIT_ENABLED
+)
+
+
+def get_audit_log() -> AuditLog:
+    return audit_log
@@ -1,21 +1,41 @@
+from datetime import datetime
 from typing import List, Optional
-from supabase import Client
 from fastapi import HTTPException
+import base64
+import binascii
+import json
+import re
 
-from ..models.user import User, Role
+from ..models.user import USER_PUBLIC_COLUMNS, User, Role
+from ..core.cache import Cache, get_cache
+from ..core.config import settings
+from ..core.login_throttle import LoginThrottle, get_login_throttle
+from ..database.repository import Repositories
 from ..core.security import hash_password, verify_password, create_access_token
-from ..api.schemas import UserCreate, UserUpdate, UserOut, TokenOut
+from ..api.schemas import UserCreate, UserUpdate, UserOut, TokenOut, UserDirectoryOut
+from .audit_log import AuditLog, diff, get_audit_log
+
+# Characters with meaning inside a PostgREST or=(...) filter or a LIKE pattern
+_SEARCH_UNSAFE = re.compile(r'[,()"*%\\]')
 
 
 class AuthService:
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
+    def __init__(self, repos: Repositories, cache: Optional[Cache] = None,
+                 throttle: Optional[LoginThrottle] = None, audit: Optional[AuditLog] = None):
+        self.repos = repos
+        self.cache = cache or get_cache()
+        self.throttle = throttle or get_login_throttle()
+        self.audit = audit or get_audit_log()
+
+    def _invalidate_user(self, user: User, *extra_emails: str) -> None:
+        keys = [f"user:id:{user.id}", f"user:email:{user.email}"]
+        keys.extend(f"user:email:{email}" for email in extra_emails)
+        self.cache.invalidate(*keys)
 
     def register_user(self, user_data: UserCreate) -> UserOut:
         """Register a new user"""
         # Check if user already exists
-        existing_user = self.supabase.table("users").select("*").eq("email", user_data.email).execute()
-        if existing_user.data:
+        if self.repos.users.exists({"email": user_data.email}):
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Create user data
@@ -27,12 +47,12 @@ class AuthService:
         }
         
         # Insert user
-        response = self.supabase.table("users").insert(user_dict).execute()
+        rows = self.repos.users.insert(user_dict)
         
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=500, detail="Failed to create user")
         
-        user = User.from_dict(response.data[0])
+        user = User.from_dict(rows[0])
         return UserOut(
             id=user.id,
             name=user.name,
@@ -41,21 +61,25 @@ class AuthService:
             created_at=user.created_at
         )
 
-    def authenticate_user(self, email: str, password: str) -> TokenOut:
+    def authenticate_user(self, email: str, password: str, client_ip: Optional[str] = None) -> TokenOut:
         """Authenticate user and return token"""
-        # Find user by email
-        response = self.supabase.table("users").select("*").eq("email", email).execute()
+        # Shed brute-force bursts before any database or bcrypt work
+        attempt = self.throttle.acquire(email, client_ip) if settings.LOGIN_THROTTLE_ENABLED else None
         
-        if not response.data:
+        # Find user by email; uncached, the password hash never goes into the cache
+        user_data = self.repos.users.find_one({"email": email})
+        if not user_data:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        user_data = response.data[0]
         user = User.from_dict(user_data)
         
         # Verify password
         if not verify_password(password, user.password_hash):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
+        if attempt is not None:
+            self.throttle.reset(email, client_ip, attempt)
+        
         # Create token
         token = create_access_token(sub=user.email, role=user.role.value)
         return {
@@ -66,29 +90,63 @@ class AuthService:
 
     def get_all_users(self) -> List[UserOut]:
         """Get all users (admin only)"""
-        response = self.supabase.table("users").select("*").order("created_at", desc=True).execute()
-        
-        users = []
-        for user_data in response.data:
-            user = User.from_dict(user_data)
-            users.append(UserOut(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-                role=user.role,
-                created_at=user.created_at
-            ))
+        rows = self.repos.users.find(columns=USER_PUBLIC_COLUMNS, order=[("created_at", True)])
+        return [self._user_out(user_data) for user_data in rows]
+
+    def list_users_page(self, cursor: Optional[str] = None, limit: int = 50,
+                        search: Optional[str] = None, role: Optional[Role] = None) -> UserDirectoryOut:
+        """One page of the user directory, newest first (admin only)
         
-        return users
+        Keyset pagination on id, so every page costs the same no matter how
+        deep the admin scrolls. `search` is a case-insensitive prefix match on
+        name or email.
+        """
+        search = _SEARCH_UNSAFE.sub("", search or "").strip()
+        where = {
+            "id__lt": self._decode_cursor(cursor) if cursor else None,
+            "role": role,
+            "name|email__istartswith": search or None
+        }
+        rows = self.repos.users.find(where, columns=USER_PUBLIC_COLUMNS, order=[("id", True)], limit=limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return UserDirectoryOut(
+            users=[self._user_out(row) for row in rows],
+            next_cursor=self._encode_cursor(rows[-1]["id"]) if has_more else None,
+            has_more=has_more
+        )
+
+    @staticmethod
+    def _user_out(data: dict) -> UserOut:
+        return UserOut(
+            id=data["id"],
+            name=data["name"],
+            email=data["email"],
+            role=Role(data["role"]),
+            created_at=datetime.fromisoformat(data["created_at"].replace("Z", "+00:00"))
+        )
+
+    @staticmethod
+    def _encode_cursor(last_id: int) -> str:
+        return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> int:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            return int(payload["id"])
+        except (ValueError, TypeError, KeyError, binascii.Error):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
 
     def get_user_by_id(self, user_id: int) -> UserOut:
         """Get user by ID (admin only)"""
-        response = self.supabase.table("users").select("*").eq("id", user_id).execute()
-        
-        if not response.data:
+        user_data = self.cache.get_or_load(
+            f"user:id:{user_id}", lambda: self.repos.users.find_one({"id": user_id}, columns=USER_PUBLIC_COLUMNS)
+        )
+        if not user_data:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user = User.from_dict(response.data[0])
+        user = User.from_dict(user_data)
         return UserOut(
             id=user.id,
             name=user.name,
@@ -97,21 +155,19 @@ class AuthService:
             created_at=user.created_at
         )
 
-    def delete_user(self, user_id: int) -> dict:
+    def delete_user(self, user_id: int, current_user: Optional[User] = None) -> dict:
         """Delete user (admin only)"""
         # Check if user exists
-        response = self.supabase.table("users").select("*").eq("id", user_id).execute()
+        user_row = self.repos.users.get(user_id)
         
-        if not response.data:
+        if not user_row:
             raise HTTPException(status_code=404, detail="User not found")
         
-        user_to_delete = User.from_dict(response.data[0])
+        user_to_delete = User.from_dict(user_row)
         
         # Check if user has tickets
-        tickets_response = self.supabase.table("tickets").select("id").eq("created_by", user_id).execute()
-        print(tickets_response.data.__str__())
-        if tickets_response.data:
-            ticket_count = len(tickets_response.data)
+        ticket_count = self.repos.tickets.count({"created_by": user_id})
+        if ticket_count:
             raise HTTPException(
                 status_code=400, 
                 detail=f"Cannot delete user: User has {ticket_count} ticket(s) associated. Please resolve or transfer the tickets first."
@@ -119,15 +175,18 @@ class AuthService:
         
         # Prevent deletion of last admin
         if user_to_delete.role == Role.ADMIN:
-            admin_count = self.supabase.table("users").select("id").eq("role", "ADMIN").execute()
-            if len(admin_count.data) <= 1:
+            if self.repos.users.count({"role": Role.ADMIN}) <= 1:
                 raise HTTPException(
                     status_code=400, 
                     detail="Cannot delete the last administrator"
                 )
         
         # Delete user
-        self.supabase.table("users").delete().eq("id", user_id).execute()
+        self.repos.users.delete({"id": user_id})
+        self._invalidate_user(user_to_delete)
+        self.audit.record("user", user_id, "user.deleted", current_user, {
+            "name": user_to_delete.name, "email": user_to_delete.email, "role": user_to_delete.role.value
+        })
         
         return {
             "message": "User deleted successfully",
@@ -151,12 +210,12 @@ class AuthService:
     def update_user(self, user_id: int, user_data: UserUpdate, current_user: User) -> UserOut:
         """Update user information (admin only, or users updating themselves)"""
         # Check if user exists
-        response = self.supabase.table("users").select("*").eq("id", user_id).execute()
+        user_row = self.repos.users.get(user_id)
         
-        if not response.data:
+        if not user_row:
             raise HTTPException(status_code=404, detail="User not found")
         
-        existing_user = User.from_dict(response.data[0])
+        existing_user = User.from_dict(user_row)
         
         # Authorization: admins can update anyone, users can only update themselves
         if current_user.role != Role.ADMIN and current_user.id != user_id:
@@ -168,8 +227,8 @@ class AuthService:
             if value is not None:
                 if field == "email":
                     # Check if new email already exists (but not for same user)
-                    email_check = self.supabase.table("users").select("*").eq("email", value).execute()
-                    if email_check.data and email_check.data[0]['id'] != user_id:
+                    email_owner = self.repos.users.find_one({"email": value}, columns=["id"])
+                    if email_owner and email_owner['id'] != user_id:
                         raise HTTPException(status_code=400, detail="Email already in use")
                     update_data[field] = value
                 elif field == "password":
@@ -181,8 +240,7 @@ class AuthService:
                         raise HTTPException(status_code=403, detail="Only administrators can change user roles")
                     # Prevent changing the last admin to non-admin
                     if existing_user.role == Role.ADMIN and value != Role.ADMIN:
-                        admin_count = self.supabase.table("users").select("id").eq("role", "ADMIN").execute()
-                        if len(admin_count.data) <= 1:
+                        if self.repos.users.count({"role": Role.ADMIN}) <= 1:
                             raise HTTPException(
                                 status_code=400, 
                                 detail="Cannot change role of the last administrator"
@@ -202,12 +260,15 @@ class AuthService:
             )
         
         # Update user
-        response = self.supabase.table("users").update(update_data).eq("id", user_id).execute()
+        rows = self.repos.users.update(update_data, {"id": user_id})
         
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=500, detail="Failed to update user")
         
-        updated_user = User.from_dict(response.data[0])
+        updated_user = User.from_dict(rows[0])
+        self._invalidate_user(existing_user, updated_user.email)
+        self.audit.record("user", user_id, "user.updated", current_user,
+                          diff(user_row, update_data, hidden=("password_hash",)))
         return UserOut(
             id=updated_user.id,
             name=updated_user.name,
@@ -1,28 +1,41 @@
-from typing import List
-from supabase import Client
+from typing import List, Optional
 from fastapi import HTTPException
 
 from ..models.category import Category
+from ..core.cache import Cache, get_cache
+from ..database.repository import Repositories
 from ..api.schemas import CategoryCreate, CategoryOut
 
 
 class CategoryService:
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
+    def __init__(self, repos: Repositories, cache: Optional[Cache] = None):
+        self.repos = repos
+        self.cache = cache or get_cache()
+
+    def _invalidate_category(self, category_id: Optional[int] = None) -> None:
+        keys = ["categories:all"]
+        if category_id is not None:
+            keys.append(f"category:{category_id}")
+        self.cache.invalidate(*keys)
 
     def list_categories(self) -> List[CategoryOut]:
         """List all categories"""
-        response = self.supabase.table("categories").select("*").order("created_at", desc=True).execute()
+        rows = self.cache.get_or_load(
+            "categories:all",
+            lambda: self.repos.categories.find(order=[("created_at", True)])
+        )
         
         categories = []
-        for cat_data in response.data:
+        for cat_data in rows or []:
             cat = Category.from_dict(cat_data)
             categories.append(CategoryOut(
                 id=cat.id,
                 name=cat.name,
                 description=cat.description or "Categoria",
                 color=cat.color or "#3b82f6",
-                created_at=cat.created_at
+                created_at=cat.created_at,
+                ticket_count=cat.ticket_count,
+                open_ticket_count=cat.open_ticket_count
             ))
         
         return categories
@@ -30,8 +43,7 @@ class CategoryService:
     def create_category(self, category_data: CategoryCreate) -> CategoryOut:
         """Create a new category"""
         # Check if category already exists
-        existing = self.supabase.table("categories").select("*").eq("name", category_data.name).execute()
-        if existing.data:
+        if self.repos.categories.exists({"name": category_data.name}):
             raise HTTPException(status_code=400, detail="Category exists")
         
         # Create category data
@@ -40,41 +52,33 @@ class CategoryService:
             "description": category_data.description,
             "color": category_data.color
         }
-        response = self.supabase.table("categories").insert(cat_dict).execute()
+        rows = self.repos.categories.insert(cat_dict)
         
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=500, detail="Failed to create category")
         
-        cat = Category.from_dict(response.data[0])
-        return CategoryOut(
-            id=cat.id,
-            name=cat.name,
-            description=cat.description,
-            color=cat.color,
-            created_at=cat.created_at
-        )
+        cat = Category.from_dict(rows[0])
+        self._invalidate_category()
+        return self._category_out(cat)
 
     def get_category(self, category_id: int) -> CategoryOut:
         """Get category by ID"""
-        response = self.supabase.table("categories").select("*").eq("id", category_id).execute()
+        cat_data = self.get_category_row(category_id)
         
-        if not response.data:
+        if not cat_data:
             raise HTTPException(status_code=404, detail="Not found")
         
-        cat = Category.from_dict(response.data[0])
-        return CategoryOut(
-            id=cat.id,
-            name=cat.name,
-            description=cat.description,
-            color=cat.color,
-            created_at=cat.created_at
-        )
+        cat = Category.from_dict(cat_data)
+        return self._category_out(cat)
+
+    def get_category_row(self, category_id: int) -> Optional[dict]:
+        """Get the raw category row, served from cache when possible"""
+        return self.cache.get_or_load(f"category:{category_id}", lambda: self.repos.categories.get(category_id))
 
     def update_category(self, category_id: int, category_data: CategoryCreate) -> CategoryOut:
         """Update an existing category"""
         # Check if category exists
-        existing = self.supabase.table("categories").select("*").eq("id", category_id).execute()
-        if not existing.data:
+        if not self.repos.categories.exists({"id": category_id}):
             raise HTTPException(status_code=404, detail="Not found")
         
         # Update category data
@@ -83,27 +87,45 @@ class CategoryService:
             "description": category_data.description,
             "color": category_data.color
         }
-        response = self.supabase.table("categories").update(update_data).eq("id", category_id).execute()
+        rows = self.repos.categories.update(update_data, {"id": category_id})
         
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=500, detail="Failed to update category")
         
-        cat = Category.from_dict(response.data[0])
-        return CategoryOut(
-            id=cat.id,
-            name=cat.name,
-            description=cat.description,
-            color=cat.color,
-            created_at=cat.created_at
-        )
+        cat = Category.from_dict(rows[0])
+        self._invalidate_category(category_id)
+        return self._category_out(cat)
 
     def delete_category(self, category_id: int) -> dict:
-        """Delete a category"""
-        # Check if category exists
-        existing = self.supabase.table("categories").select("*").eq("id", category_id).execute()
-        if not existing.data:
+        """Delete a category that has no tickets"""
+        # Read the counters from the database, not the cache
+        category = self.repos.categories.find_one({"id": category_id}, columns=["id", "ticket_count"])
+        if not category:
             raise HTTPException(status_code=404, detail="Not found")
         
+        if category["ticket_count"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Category has {category['ticket_count']} ticket(s); move or delete them first"
+            )
+        
         # Delete category
-        self.supabase.table("categories").delete().eq("id", category_id).execute()
+        self.repos.categories.delete({"id": category_id})
+        self._invalidate_category(category_id)
         return {"ok": True}
+
+    def invalidate_counters(self, *category_ids: int) -> None:
+        """Drop cached rows whose ticket counters changed (the database triggers keep the counts)"""
+        self.cache.invalidate("categories:all", *[f"category:{cid}" for cid in set(category_ids) if cid is not None])
+
+    @staticmethod
+    def _category_out(cat: Category) -> CategoryOut:
+        return CategoryOut(
+            id=cat.id,
+            name=cat.name,
+            description=cat.description,
+            color=cat.color,
+            created_at=cat.created_at,
+            ticket_count=cat.ticket_count,
+            open_ticket_count=cat.open_ticket_count
+        )
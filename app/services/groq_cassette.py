@@ -0,0 +1,101 @@
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+# Request fields that decide what the model answers; timeouts and stream flags do not
+_KEY_FIELDS = ("model", "messages", "temperature", "max_tokens", "top_p", "response_format")
+
+
+def completion_key(params: dict) -> str:
+    body = json.dumps({field: params.get(field) for field in _KEY_FIELDS}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def response_kind(params: dict) -> str:
+    """"json_object" for JSON-mode requests (triage), "text" otherwise"""
+    return ((params.get("response_format") or {}).get("type")) or "text"
+
+
+class GroqCassette:
+    """Recorded Groq chat completions, one JSON object per line.
+
+    Each entry holds the request key, model, kind, the completion as returned
+    by the API and the latency it took. `lookup` returns the completion
+    recorded for exactly the same request; when there is none, it cycles
+    through the recordings of the same kind, so replays still answer inputs
+    that were never recorded (load tests with generated tickets).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._by_kind: Dict[str, List[dict]] = {}
+        self._cycles: Dict[str, Iterator[dict]] = {}
+        self.hits = 0
+        self.misses = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add(self, entry: dict) -> None:
+        self._entries[entry["key"]] = entry
+        self._by_kind.setdefault(entry["kind"], []).append(entry)
+        self._cycles.pop(entry["kind"], None)
+
+    def models(self) -> List[str]:
+        return sorted({entry["model"] for entry in self._entries.values()})
+
+    def record(self, params: dict, completion: dict, latency: float) -> None:
+        entry = {
+            "key": completion_key(params),
+            "model": params.get("model"),
+            "kind": response_kind(params),
+            "latency": round(latency, 4),
+            "recorded_at": time.time(),
+            "messages": params.get("messages"),
+            "completion": completion
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._add(entry)
+
+    def lookup(self, params: dict) -> Optional[dict]:
+        """The recorded entry for this request, or another one of the same kind"""
+        with self._lock:
+            entry = self._entries.get(completion_key(params))
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+            kind = response_kind(params)
+            if not self._by_kind.get(kind):
+                return None
+            if kind not in self._cycles:
+                self._cycles[kind] = itertools.cycle(self._by_kind[kind])
+            return next(self._cycles[kind])
+
+
+_cassette: Optional[GroqCassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_groq_cassette() -> GroqCassette:
+    global _cassette
+    if _cassette is None:
+        from ..core.config import settings
+
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = GroqCassette(settings.GROQ_CASSETTE_PATH)
+    return _cassette
@@ -1,89 +1,361 @@
-from typing import Optional
-from groq import Groq
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from typing import Dict, List, Optional, Set, Tuple
+from groq import APITimeoutError, Groq
+from groq.types.chat import ChatCompletion
 from fastapi import HTTPException
+import hashlib
+import json
 import logging
+import threading
+import time
 
+from ..core.cache import Cache, get_cache
 from ..core.config import settings
+from ..core.deadline import RequestCancelled, capped_timeout, check_deadline, has_deadline
+from ..models.base import TicketPriority
+from .groq_cassette import get_groq_cassette
+from .model_router import ModelRouter, get_model_router
+from .prompt_budget import (
+    PromptTemplate, compact_text, estimate_tokens, get_prompt_template, max_tokens_for, usage_stats
+)
 
 logger = logging.getLogger(__name__)
 
+FALLBACK_MODEL = "fallback"
+
+
+def _hedge_workers() -> int:
+    """Two threads (primary + hedge) for every caller that can be hedging at once.
+
+    Calls never queue for a thread (see `_submit_hedge`); with a smaller pool
+    hedges are simply skipped more often under load.
+    """
+    callers = settings.BULKHEAD_AI_SIZE + settings.AI_JOBS_WORKERS
+    if settings.GROQ_HEDGE_MAX_WORKERS <= 0:
+        return 2 * callers
+    if settings.GROQ_HEDGE_MAX_WORKERS < 2 * callers:
+        logger.warning(
+            f"GROQ_HEDGE_MAX_WORKERS={settings.GROQ_HEDGE_MAX_WORKERS} is below two per AI caller "
+            f"({2 * callers}); hedges will be skipped under load"
+        )
+    return settings.GROQ_HEDGE_MAX_WORKERS
+
+
+# Shared by all GroqService instances; runs the primary and hedge attempts
+_hedge_workers_count = _hedge_workers()
+_hedge_executor = ThreadPoolExecutor(max_workers=_hedge_workers_count, thread_name_prefix="groq-hedge")
+# One slot per executor thread, held until the call finishes - including the losing
+# call of a race, which cannot be cancelled - so submissions never queue
+_hedge_slots = threading.BoundedSemaphore(_hedge_workers_count)
+
+
+def _submit_hedge(fn, *args, **kwargs) -> Optional[Future]:
+    """Run `fn` on a free executor thread, or None when every thread is busy"""
+    if not _hedge_slots.acquire(blocking=False):
+        return None
+    try:
+        future = _hedge_executor.submit(fn, *args, **kwargs)
+    except BaseException:
+        _hedge_slots.release()
+        raise
+    future.add_done_callback(lambda _: _hedge_slots.release())
+    return future
+
+# Also shared: building a client sets up an SSL context, tens of ms of CPU per request
+_client: Optional[Groq] = None
+_client_lock = threading.Lock()
+
+
+def _shared_client() -> Groq:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = Groq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL or None)
+    return _client
+
 
 class GroqService:
-    def __init__(self):
+    def __init__(self, cache: Optional[Cache] = None, router: Optional[ModelRouter] = None):
         """Initialize Groq client with API key from settings"""
         try:
-            self.client = Groq(api_key=settings.GROQ_API_KEY)
+            self.client = _shared_client()
+            self.mode = settings.GROQ_MODE.lower()
             self.model = settings.GROQ_MODEL
+            self.cache = cache or get_cache()
+            self.router = router or get_model_router()
         except Exception as e:
             logger.error(f"Failed to initialize Groq client: {e}")
             raise HTTPException(status_code=500, detail="AI service initialization failed")
 
-    def generate_ticket_response(self, title: str, description: str) -> str:
+    def generate_ticket_response(self, title: str, description: str,
+                                 priority: Optional[TicketPriority] = None) -> str:
         """
         Generate an automatic response for a support ticket using Groq AI
         
         Args:
             title: The ticket title
             description: The ticket description
+            priority: The ticket priority, used to size the completion budget
             
         Returns:
             AI generated response as string
         """
+        return self.generate_ticket_completion(title, description, priority)[0]
+
+    def generate_ticket_completion(self, title: str, description: str,
+                                   priority: Optional[TicketPriority] = None) -> Tuple[str, str]:
+        """
+        Same as generate_ticket_response, also returning the model that answered
+        
+        The model is picked by the router from priority and input size, falling
+        back down the chain on errors or timeouts.
+        
+        Returns:
+            (response, model) - model is "fallback" when every model failed
+        """
+        template = get_prompt_template()
+        max_tokens = max_tokens_for(priority)
+        models = self.router.route(priority, estimate_tokens(description))
+        cache_key = self._response_cache_key(title, description, template.version, max_tokens, models[0])
+        cached = self.cache.get(cache_key)
+        if isinstance(cached, dict):
+            return cached["response"], cached["model"]
+
         try:
-            # Create a comprehensive prompt for the AI
-            prompt = self._build_support_prompt(title, description)
-            print(prompt)
+            # Trim oversized input to the prompt budget before building the prompt
+            description = compact_text(description, settings.GROQ_INPUT_TOKEN_BUDGET)
+            prompt = self._build_support_prompt(title, description, template)
+            estimated_prompt_tokens = estimate_tokens(template.system) + estimate_tokens(prompt)
+            
             # Call Groq API
-            chat_completion = self.client.chat.completions.create(
+            started = time.monotonic()
+            chat_completion, model = self._complete(
+                models,
+                hedge=settings.GROQ_HEDGE_ENABLED,
                 messages=[
                     {
                         "role": "system",
-                        "content": "Você é um assistente de suporte técnico especializado. "
-                                 "Responda de forma profissional, clara e útil em português brasileiro. "
-                                 "Forneça soluções práticas e, quando necessário, sugira próximos passos."
+                        "content": template.system
                     },
                     {
                         "role": "user", 
                         "content": prompt
                     }
                 ],
-                model=self.model,
                 temperature=0.7,
-                max_tokens=1024,
+                max_tokens=max_tokens,
                 top_p=1,
                 stream=False
             )
+            self._record_usage(chat_completion, template, model, time.monotonic() - started, estimated_prompt_tokens)
             
             response = chat_completion.choices[0].message.content
 
-            print (response)
             if not response or response.strip() == "":
-                return self._get_fallback_response()
-                
-            return response.strip()
+                return self._get_fallback_response(), FALLBACK_MODEL
             
+            response = response.strip()
+            self.cache.set(cache_key, {"response": response, "model": model},
+                           ttl=settings.CACHE_AI_RESPONSE_TTL_SECONDS)
+            return response, model
+
+        except RequestCancelled as e:
+            if e.reason != "deadline":
+                raise  # the client is gone; nothing to answer
+            logger.warning("AI response not ready within the request deadline, using fallback")
+            return self._get_fallback_response(), FALLBACK_MODEL
         except Exception as e:
             logger.error(f"Error generating AI response: {e}")
             # Return a fallback response instead of failing
-            return self._get_fallback_response()
+            return self._get_fallback_response(), FALLBACK_MODEL
+
+    def suggest_triage(self, tickets: List[dict], categories: List[dict]) -> Dict[int, dict]:
+        """
+        Suggest a category and priority for several tickets in one completion
+        
+        Args:
+            tickets: dicts with id, title and description
+            categories: dicts with id, name and description
+            
+        Returns:
+            Mapping of ticket id to {"category_id": int, "priority": str};
+            tickets the model could not classify are left out
+        """
+        category_lines = "\n".join(
+            f"- {c['id']}: {c['name']}" + (f" ({c['description']})" if c.get("description") else "")
+            for c in categories
+        )
+        ticket_lines = "\n".join(
+            json.dumps({"id": t["id"], "title": t["title"], "description": t["description"][:500]}, ensure_ascii=False)
+            for t in tickets
+        )
+        prompt = f"""Classifique cada ticket de suporte abaixo.
+
+Categorias disponíveis (id: nome):
+{category_lines}
+
+Prioridades: LOW, MEDIUM, HIGH
 
-    def _build_support_prompt(self, title: str, description: str) -> str:
-        """Build a comprehensive prompt for the AI support agent"""
-        return f"""
-Analise o seguinte ticket de suporte e forneça uma resposta útil e profissional:
+Tickets (um JSON por linha):
+{ticket_lines}
 
-**TÍTULO:** {title}
+Responda apenas com JSON no formato:
+{{"tickets": [{{"id": <id do ticket>, "category_id": <id da categoria>, "priority": "LOW|MEDIUM|HIGH"}}]}}"""
 
-**DESCRIÇÃO:** {description}
+        chat_completion, _ = self._complete(
+            self.router.route(TicketPriority.LOW, estimate_tokens(ticket_lines)),
+            hedge=False,
+            messages=[
+                {"role": "system", "content": "Você classifica tickets de suporte e responde somente JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0,
+            max_tokens=32 + 24 * len(tickets),
+            response_format={"type": "json_object"},
+            stream=False
+        )
+        
+        content = chat_completion.choices[0].message.content or "{}"
+        valid_categories = {c["id"] for c in categories}
+        valid_tickets = {t["id"] for t in tickets}
+        suggestions = {}
+        for item in json.loads(content).get("tickets", []):
+            try:
+                ticket_id = int(item["id"])
+                category_id = int(item["category_id"])
+                priority = str(item["priority"]).upper()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if ticket_id in valid_tickets and category_id in valid_categories and priority in ("LOW", "MEDIUM", "HIGH"):
+                suggestions[ticket_id] = {"category_id": category_id, "priority": priority}
+        return suggestions
+
+    def _complete(self, models: List[str], hedge: bool, **params) -> Tuple[object, str]:
+        """Run a chat completion down the model chain, optionally hedging the first model"""
+        attempted: Set[str] = set()
+        last_error: Optional[Exception] = None
+        for model in models:
+            if model in attempted:
+                continue
+            # No further attempt once the request is past its deadline or its client left
+            check_deadline("groq")
+            try:
+                if hedge and not attempted:
+                    return self._hedged_call(model, attempted, **params)
+                attempted.add(model)
+                return self._call(model, **params), model
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Groq model {model} failed, trying next in chain: {e}")
+        raise last_error
+
+    def _hedged_call(self, primary: str, attempted: Set[str], **params) -> Tuple[object, str]:
+        """Call `primary`; if it is still running after its p95 latency, race the fastest other model.
 
-Por favor, forneça:
-1. Uma análise do problema reportado
-2. Possíveis soluções ou passos para resolver
-3. Informações adicionais que podem ser úteis
-4. Se necessário, sugira quando escalar para suporte humano
+        With every executor thread busy (often with losing calls still running
+        out their timeout) the call is made without a hedge instead of queueing.
+        """
+        attempted.add(primary)
+        hedge_model = self.router.hedge_model(primary)
+        if hedge_model is None:
+            return self._call(primary, **params), primary
+
+        if has_deadline():
+            # The executor threads do not inherit the request context; fix the timeout here
+            params = dict(params, timeout=capped_timeout(settings.GROQ_TIMEOUT_SECONDS))
+        first = _submit_hedge(self._call, primary, **params)
+        if first is None:
+            self.router.hedges_skipped += 1
+            return self._call(primary, **params), primary
+        try:
+            return first.result(timeout=self.router.hedge_delay(primary)), primary
+        except FuturesTimeout:
+            pass
 
-Mantenha a resposta concisa mas completa, e use um tom profissional e empático.
-"""
+        check_deadline("groq")
+        second = _submit_hedge(self._call, hedge_model, **params)
+        if second is None:
+            self.router.hedges_skipped += 1
+            return first.result(), primary
+        self.router.hedges += 1
+        attempted.add(hedge_model)
+        futures = {first: primary, second: hedge_model}
+        error: Optional[Exception] = None
+        # The slower call is left to finish in the background; its latency still feeds the stats
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                error = e
+                continue
+            if future is second:
+                self.router.hedge_wins += 1
+            return result, futures[future]
+        raise error
+
+    def _call(self, model: str, timeout: Optional[float] = None, **params):
+        """Single completion against `model`, feeding the router's latency/error stats.
+
+        Within a request with a deadline the timeout is cut to the time left and
+        the SDK's own retries are off, so the call never outlives the request.
+        Running out of such a cut timeout says nothing about the model and is
+        not counted as one of its errors.
+        """
+        client = self.client
+        if timeout is None and has_deadline():
+            timeout = capped_timeout(settings.GROQ_TIMEOUT_SECONDS)
+        if timeout is None:
+            timeout = settings.GROQ_TIMEOUT_SECONDS
+        else:
+            client = client.with_options(max_retries=0)
+        started = time.monotonic()
+        try:
+            if self.mode == "replay":
+                chat_completion = self._replay(model, **params)
+            else:
+                chat_completion = client.chat.completions.create(model=model, timeout=timeout, **params)
+        except Exception as e:
+            if not (isinstance(e, APITimeoutError) and timeout < settings.GROQ_TIMEOUT_SECONDS):
+                self.router.stats(model).record(time.monotonic() - started, ok=False, error=str(e))
+            raise
+        latency = time.monotonic() - started
+        self.router.stats(model).record(latency, ok=True)
+        if self.mode == "record":
+            try:
+                get_groq_cassette().record(dict(params, model=model), chat_completion.model_dump(mode="json"), latency)
+            except Exception as e:
+                logger.warning(f"Failed to record Groq completion: {e}")
+        return chat_completion
+
+    def _replay(self, model: str, **params) -> ChatCompletion:
+        """Completion from the cassette (GROQ_MODE=replay); never touches the network"""
+        entry = get_groq_cassette().lookup(dict(params, model=model))
+        if entry is None:
+            raise RuntimeError(f"No recorded completion in {settings.GROQ_CASSETTE_PATH} for model {model}")
+        # construct() like the SDK does for API responses: recordings keep nulls the schema rejects
+        return ChatCompletion.construct(**dict(entry["completion"], model=model))
+
+    def _response_cache_key(self, title: str, description: str, prompt_version: str, max_tokens: int,
+                            model: str) -> str:
+        key = f"{model}\0{prompt_version}\0{max_tokens}\0{title}\0{description}"
+        return f"ai:response:{hashlib.sha256(key.encode()).hexdigest()}"
+
+    def _build_support_prompt(self, title: str, description: str, template: PromptTemplate) -> str:
+        """Build the prompt for the AI support agent from a versioned template"""
+        return template.render(title=title, description=description)
+
+    def _record_usage(self, chat_completion, template: PromptTemplate, model: str, latency: float,
+                      estimated_prompt_tokens: int) -> None:
+        usage = getattr(chat_completion, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or estimated_prompt_tokens
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        usage_stats.record(template.version, model, prompt_tokens, completion_tokens,
+                           latency, estimated_prompt_tokens)
+        logger.info(
+            f"Groq completion model={model} prompt={template.version} "
+            f"prompt_tokens={prompt_tokens} completion_tokens={completion_tokens} latency={latency:.2f}s"
+        )
 
     def _get_fallback_response(self) -> str:
         """Return a fallback response when AI generation fails"""
@@ -98,16 +370,16 @@ Enquanto isso, você pode:
 
 Agradecemos sua paciência!"""
 
+    def list_models(self, timeout: Optional[float] = None) -> List[str]:
+        """Ids of the models available to this API key (no tokens spent)"""
+        if self.mode == "replay":
+            return sorted(set(self.router.chain) | set(get_groq_cassette().models()))
+        return [model.id for model in self.client.models.list(timeout=timeout or settings.GROQ_TIMEOUT_SECONDS).data]
+
     def health_check(self) -> bool:
-        """Check if the Groq service is healthy and accessible"""
+        """Check if the Groq service is reachable and the configured model is available"""
         try:
-            # Simple test call to verify API connectivity
-            test_completion = self.client.chat.completions.create(
-                messages=[{"role": "user", "content": "test"}],
-                model=self.model,
-                max_tokens=10
-            )
-            return bool(test_completion.choices[0].message.content)
+            return self.model in self.list_models()
         except Exception as e:
             logger.error(f"Groq health check failed: {e}")
             return False
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _Check:
+    def __init__(self, name: str, probe: Callable[[], Optional[dict]], interval: float, critical: bool):
+        self.name = name
+        self.probe = probe
+        self.interval = interval
+        self.critical = critical
+        self.next_run = 0.0
+        self.future: Optional[Future] = None
+        self.started_at = 0.0
+        self.timed_out = False
+        self.result: Optional[dict] = None
+        self.checked_at = 0.0
+        self.consecutive_failures = 0
+
+
+class HealthProber:
+    """Probes dependencies in the background and caches the outcome.
+
+    Each registered check runs every `interval` seconds on a small pool; a
+    check still running after `timeout` is reported down without waiting for
+    it, and is not started again until it returns. Health endpoints read the
+    cached results, so probes from load balancers never reach Supabase or
+    Groq. A result older than `stale_after` seconds counts as down.
+    """
+
+    def __init__(self, timeout: float, stale_after: float):
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._checks: Dict[str, _Check] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register(self, name: str, probe: Callable[[], Optional[dict]], interval: float, critical: bool = True) -> None:
+        """`probe` raises on failure and may return extra details; `critical` checks gate readiness"""
+        self._checks[name] = _Check(name, probe, interval, critical)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=max(len(self._checks), 1), thread_name_prefix="health-probe")
+        self._thread = threading.Thread(target=self._run, name="health-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for check in self._checks.values():
+                if check.future is not None and not check.future.done():
+                    if not check.timed_out and now - check.started_at > self.timeout:
+                        check.timed_out = True
+                        self._store(check, False, now - check.started_at, f"timed out after {self.timeout}s")
+                    continue
+                if now >= check.next_run:
+                    check.started_at = now
+                    check.timed_out = False
+                    check.next_run = now + check.interval
+                    check.future = self._executor.submit(self._probe, check)
+            self._stop.wait(0.25)
+
+    def _probe(self, check: _Check) -> None:
+        started = time.monotonic()
+        try:
+            details = check.probe() or {}
+            ok, error = True, None
+        except Exception as e:
+            details, ok, error = {}, False, str(e) or type(e).__name__
+        latency = time.monotonic() - started
+        if not check.timed_out or ok:
+            self._store(check, ok, latency, error, details)
+
+    def _store(self, check: _Check, ok: bool, latency: float, error: Optional[str], details: dict = None) -> None:
+        with self._lock:
+            check.consecutive_failures = 0 if ok else check.consecutive_failures + 1
+            check.checked_at = time.monotonic()
+            check.result = {
+                "status": "up" if ok else "down",
+                "latency_ms": round(latency * 1000, 1),
+                "checked_at": datetime.now(timezone.utc).isoformat(),
+                "error": error,
+                "consecutive_failures": check.consecutive_failures,
+                **(details or {})
+            }
+        if not ok:
+            logger.warning(f"Health check {check.name} failed: {error}")
+
+    def result(self, name: str) -> dict:
+        """Cached result of one check; `pending` before its first run, `down` once stale"""
+        check = self._checks.get(name)
+        if check is None:
+            return {"status": "disabled"}
+        with self._lock:
+            if check.result is None:
+                return {"status": "pending"}
+            result = dict(check.result)
+            age = time.monotonic() - check.checked_at
+        result["age_seconds"] = round(age, 1)
+        if age > max(self.stale_after, check.interval * 2):
+            result["status"] = "down"
+            result["error"] = result["error"] or "stale result"
+        return result
+
+    def results(self) -> Dict[str, dict]:
+        return {name: self.result(name) for name in self._checks}
+
+    def readiness(self) -> Tuple[bool, Dict[str, dict]]:
+        """Ready when every critical check is up"""
+        results = self.results()
+        ready = all(results[name]["status"] == "up" for name, check in self._checks.items() if check.critical)
+        return ready, results
+
+    def status(self) -> str:
+        """healthy, degraded (a non-critical check is down), unhealthy or starting"""
+        ready, results = self.readiness()
+        if not ready:
+            pending = any(r["status"] == "pending" for r in results.values())
+            return "starting" if pending else "unhealthy"
+        return "healthy" if all(r["status"] == "up" for r in results.values()) else "degraded"
+
+
+def _probe_database() -> dict:
+    from ..database.connection import get_repositories
+
+    repos = get_repositories()
+    repos.categories.find(columns=["id"], limit=1)
+    return {"backend": repos.backend}
+
+
+def _probe_groq() -> dict:
+    from .groq_service import GroqService
+    from .model_router import get_model_router
+
+    available = GroqService().list_models(timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+    missing = [m for m in get_model_router().chain if m not in available]
+    if missing:
+        raise RuntimeError(f"configured model(s) not available: {', '.join(missing)}")
+    return {"models": get_model_router().chain}
+
+
+def _build_prober() -> HealthProber:
+    prober = HealthProber(
+        timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+        stale_after=settings.HEALTH_PROBE_STALE_SECONDS
+    )
+    if not settings.HEALTH_PROBE_ENABLED:
+        return prober
+    prober.register("database", _probe_database, settings.HEALTH_PROBE_INTERVAL_SECONDS, critical=True)
+    # Ticket creation falls back to a canned answer without Groq, so it only degrades
+    prober.register("groq", _probe_groq, settings.HEALTH_PROBE_GROQ_INTERVAL_SECONDS, critical=False)
+    return prober
+
+
+health_prober = _build_prober()
+
+
+def get_health_prober() -> HealthProber:
+    return health_prober
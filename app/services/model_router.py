@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from ..core.config import settings
+from ..models.base import TicketPriority
+
+
+class ModelStats:
+    """Rolling latency and error statistics for one model.
+
+    An unhealthy model gets no traffic, so its window would never recover on
+    its own: once it has been quiet for GROQ_UNHEALTHY_COOLDOWN_SECONDS,
+    `try_probe` admits one call, and a success clears the error history.
+    """
+
+    def __init__(self, window: int = 200):
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=window)
+        self._outcomes: deque = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self._probe_at = 0.0
+        self.probes = 0
+
+    def record(self, latency: float, ok: bool, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.calls += 1
+            if ok and self._probe_at:
+                self._outcomes.clear()  # the probe succeeded: start afresh
+            self._probe_at = 0.0
+            self._outcomes.append(ok)
+            if ok:
+                self._latencies.append(latency)
+            else:
+                self.errors += 1
+                self.last_error = error
+                self.last_error_at = time.time()
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(int(len(ordered) * pct), len(ordered) - 1)]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._outcomes:
+                return 0.0
+            return self._outcomes.count(False) / len(self._outcomes)
+
+    def healthy(self) -> bool:
+        with self._lock:
+            samples = len(self._outcomes)
+        return samples < 5 or self.error_rate() < settings.GROQ_UNHEALTHY_ERROR_RATE
+
+    def try_probe(self) -> bool:
+        """Admit one call to an unhealthy model after the cooldown; False while one is out"""
+        now = time.time()
+        with self._lock:
+            quiet_since = max(self.last_error_at or 0.0, self._probe_at)
+            if now - quiet_since < settings.GROQ_UNHEALTHY_COOLDOWN_SECONDS:
+                return False
+            self._probe_at = now
+            self.probes += 1
+            return True
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate(), 3),
+            "p50_seconds": self.percentile(0.5),
+            "p95_seconds": self.percentile(0.95),
+            "healthy": self.healthy(),
+            "probes": self.probes,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at
+        }
+
+
+class ModelRouter:
+    """Chooses the model chain for a Groq call.
+
+    `chain` is ordered from most capable to fastest. HIGH priority tickets and
+    large inputs start at the most capable model, LOW at the fastest and
+    MEDIUM in between; the remaining models follow as fallbacks, and models
+    with a high recent error rate are moved to the end, except for the
+    occasional probe call that checks whether they recovered.
+    """
+
+    def __init__(self, chain: List[str]):
+        self.chain = chain
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0  # hedge executor saturated
+
+    def stats(self, model: str) -> ModelStats:
+        with self._lock:
+            if model not in self._stats:
+                self._stats[model] = ModelStats()
+            return self._stats[model]
+
+    def route(self, priority: Optional[TicketPriority] = None, input_tokens: int = 0) -> List[str]:
+        if priority == TicketPriority.HIGH or input_tokens >= settings.GROQ_LARGE_INPUT_TOKENS:
+            start = 0
+        elif priority == TicketPriority.LOW:
+            start = len(self.chain) - 1
+        else:
+            start = min(1, len(self.chain) - 1)
+        ordered = self.chain[start:] + list(reversed(self.chain[:start]))
+        healthy = [m for m in ordered if self.stats(m).healthy() or self.stats(m).try_probe()]
+        return healthy + [m for m in ordered if m not in healthy]
+
+    def hedge_model(self, primary: str) -> Optional[str]:
+        """Healthy model other than `primary` with the lowest median latency
+        (the fastest configured one until there are samples)"""
+        candidates = [m for m in reversed(self.chain) if m != primary and self.stats(m).healthy()]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda m: self.stats(m).percentile(0.5) or float("inf"))
+
+    def hedge_delay(self, model: str) -> float:
+        """How long to wait on `model` before hedging: its observed p95 latency"""
+        p95 = self.stats(model).percentile(0.95)
+        if p95 is None:
+            return settings.GROQ_HEDGE_DEFAULT_DELAY_SECONDS
+        return max(p95, settings.GROQ_HEDGE_MIN_DELAY_SECONDS)
+
+    def snapshot(self) -> dict:
+        return {
+            "chain": self.chain,
+            "hedging": settings.GROQ_HEDGE_ENABLED,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedges_skipped": self.hedges_skipped,
+            "models": {model: self.stats(model).snapshot() for model in self.chain}
+        }
+
+
+def _configured_chain() -> List[str]:
+    chain = [m.strip() for m in settings.GROQ_MODEL_CHAIN.split(",") if m.strip()]
+    return chain or [settings.GROQ_MODEL]
+
+
+model_router = ModelRouter(_configured_chain())
+
+
+def get_model_router() -> ModelRouter:
+    return model_router
@@ -0,0 +1,149 @@
+import math
+import re
+import threading
+from typing import Dict, Optional
+
+from ..core.config import settings
+from ..models.base import TicketPriority
+
+
+class PromptTemplate:
+    def __init__(self, version: str, system: str, user: str):
+        self.version = version
+        self.system = system
+        self.user = user
+
+    def render(self, title: str, description: str) -> str:
+        return self.user.format(title=title, description=description)
+
+
+PROMPT_TEMPLATES: Dict[str, PromptTemplate] = {
+    "v1": PromptTemplate(
+        version="v1",
+        system=(
+            "Você é um assistente de suporte técnico especializado. "
+            "Responda de forma profissional, clara e útil em português brasileiro. "
+            "Forneça soluções práticas e, quando necessário, sugira próximos passos."
+        ),
+        user="""
+Analise o seguinte ticket de suporte e forneça uma resposta útil e profissional:
+
+**TÍTULO:** {title}
+
+**DESCRIÇÃO:** {description}
+
+Por favor, forneça:
+1. Uma análise do problema reportado
+2. Possíveis soluções ou passos para resolver
+3. Informações adicionais que podem ser úteis
+4. Se necessário, sugira quando escalar para suporte humano
+
+Mantenha a resposta concisa mas completa, e use um tom profissional e empático.
+"""
+    ),
+    "v2": PromptTemplate(
+        version="v2",
+        system=(
+            "Assistente de suporte técnico. Responda em português brasileiro, "
+            "tom profissional e empático, com passos práticos."
+        ),
+        user=(
+            "Ticket: {title}\n"
+            "Descrição: {description}\n\n"
+            "Responda com: análise breve, passos para resolver e quando escalar para suporte humano."
+        )
+    ),
+}
+
+
+def get_prompt_template(version: Optional[str] = None) -> PromptTemplate:
+    return PROMPT_TEMPLATES.get(version or settings.GROQ_PROMPT_VERSION, PROMPT_TEMPLATES["v1"])
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for Llama-family tokenizers on Portuguese text (~3.5 chars per token)"""
+    return math.ceil(len(text) / 3.5) if text else 0
+
+
+def max_tokens_for(priority: Optional[TicketPriority]) -> int:
+    """Completion budget by ticket priority"""
+    return {
+        TicketPriority.LOW: settings.GROQ_MAX_TOKENS_LOW,
+        TicketPriority.MEDIUM: settings.GROQ_MAX_TOKENS_MEDIUM,
+        TicketPriority.HIGH: settings.GROQ_MAX_TOKENS_HIGH,
+    }.get(priority, settings.GROQ_MAX_TOKENS_MEDIUM)
+
+
+def compact_text(text: str, max_tokens: int) -> str:
+    """Fit `text` into roughly `max_tokens` tokens.
+
+    Collapses whitespace and repeated lines first (pasted logs are the usual
+    culprit); if still too long, keeps the beginning and the end, where the
+    problem statement and the latest error tend to be, cut on sentence
+    boundaries when possible.
+    """
+    seen = set()
+    lines = []
+    for line in text.splitlines():
+        line = re.sub(r"\s+", " ", line).strip()
+        if line and line not in seen:
+            seen.add(line)
+            lines.append(line)
+    text = "\n".join(lines)
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    max_chars = int(max_tokens * 3.5)
+    head_chars = int(max_chars * 0.7)
+    tail_chars = max_chars - head_chars
+    head = text[:head_chars]
+    tail = text[-tail_chars:]
+    head_cut = max(head.rfind(". "), head.rfind("\n"))
+    if head_cut > head_chars // 2:
+        head = head[:head_cut + 1]
+    tail_cut = min([i for i in (tail.find(". "), tail.find("\n")) if i >= 0], default=-1)
+    if 0 <= tail_cut < tail_chars // 2:
+        tail = tail[tail_cut + 1:]
+    return f"{head.strip()}\n[...]\n{tail.strip()}"
+
+
+class UsageStats:
+    """Prompt/completion token totals per prompt version and model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[tuple, dict] = {}
+
+    def record(self, version: str, model: str, prompt_tokens: int, completion_tokens: int,
+               latency: float, estimated_prompt_tokens: int) -> None:
+        with self._lock:
+            entry = self._stats.setdefault((version, model), {
+                "prompt_version": version,
+                "model": model,
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "estimated_prompt_tokens": 0,
+                "latency_seconds": 0.0
+            })
+            entry["calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["estimated_prompt_tokens"] += estimated_prompt_tokens
+            entry["latency_seconds"] += latency
+
+    def snapshot(self) -> list:
+        with self._lock:
+            result = []
+            for entry in self._stats.values():
+                calls = entry["calls"] or 1
+                result.append({
+                    **entry,
+                    "avg_prompt_tokens": round(entry["prompt_tokens"] / calls, 1),
+                    "avg_completion_tokens": round(entry["completion_tokens"] / calls, 1),
+                    "avg_latency_seconds": round(entry["latency_seconds"] / calls, 3)
+                })
+            return result
+
+
+usage_stats = UsageStats()
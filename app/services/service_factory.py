@@ -1,28 +1,43 @@
 from fastapi import Depends
-from supabase import Client
-
-from ..database.connection import get_supabase
+from ..core.cache import Cache, get_cache
+from ..database.connection import get_repositories
+from ..database.repository import Repositories
 from .auth_service import AuthService
 from .category_service import CategoryService
 from .ticket_service import TicketService
 from .groq_service import GroqService
+from .user_import import UserImporter
 
 
-def get_auth_service(supabase: Client = Depends(get_supabase)) -> AuthService:
+def get_auth_service(
+    repos: Repositories = Depends(get_repositories),
+    cache: Cache = Depends(get_cache)
+) -> AuthService:
     """Dependency to get AuthService instance"""
-    return AuthService(supabase)
+    return AuthService(repos, cache)
 
 
-def get_category_service(supabase: Client = Depends(get_supabase)) -> CategoryService:
+def get_category_service(
+    repos: Repositories = Depends(get_repositories),
+    cache: Cache = Depends(get_cache)
+) -> CategoryService:
     """Dependency to get CategoryService instance"""
-    return CategoryService(supabase)
+    return CategoryService(repos, cache)
 
 
-def get_ticket_service(supabase: Client = Depends(get_supabase)) -> TicketService:
+def get_ticket_service(
+    repos: Repositories = Depends(get_repositories),
+    cache: Cache = Depends(get_cache)
+) -> TicketService:
     """Dependency to get TicketService instance"""
-    return TicketService(supabase)
+    return TicketService(repos, cache)
 
 
-def get_groq_service() -> GroqService:
+def get_groq_service(cache: Cache = Depends(get_cache)) -> GroqService:
     """Dependency to get GroqService instance"""
-    return GroqService()
+    return GroqService(cache)
+
+
+def get_user_importer(repos: Repositories = Depends(get_repositories)) -> UserImporter:
+    """Dependency to get a UserImporter for one import request"""
+    return UserImporter(repos)
@@ -0,0 +1,226 @@
+import logging
+import math
+import re
+import threading
+import unicodedata
+import zlib
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..database.repository import Repositories
+from .ticket_events import TicketEvent, TicketEventBus, get_ticket_events
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a o as os um uma uns umas de da do das dos em na no nas nos por para com sem que se "
+    "e ou mas como ao aos pelo pela pelos pelas eu meu minha nao sim ja esta estou foi ser "
+    "ter tem the and or to of in on for is it".split()
+)
+
+
+def _tokens(text: str) -> List[str]:
+    text = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode()
+    words = [w for w in _TOKEN_RE.findall(text) if len(w) > 1 and w not in _STOPWORDS]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class SimilarityIndex:
+    """In-process hashed TF-IDF index over ticket title and description.
+
+    Terms (unigrams and bigrams) are hashed into `dim` signed buckets and each
+    ticket is stored as a sparse vector of log-scaled term frequencies in
+    flat, append-only NumPy arrays. IDF weights come from per-bucket document
+    frequencies kept up to date on every add/remove, so the index grows
+    incrementally and is never rebuilt; removed entries are compacted away
+    once they make up half of the arrays. A query is two `bincount`
+    reductions over the stored non-zeros.
+    """
+
+    def __init__(self, dim: int = 2 ** 18, initial_capacity: int = 65536):
+        self.dim = dim
+        self._lock = threading.RLock()
+        self._buckets = np.zeros(initial_capacity, dtype=np.int32)
+        self._values = np.zeros(initial_capacity, dtype=np.float32)
+        self._owners = np.zeros(initial_capacity, dtype=np.int32)
+        self._nnz = 0
+        self._garbage = 0
+        self._df = np.zeros(dim, dtype=np.float32)
+        self._slot_of: Dict[int, int] = {}
+        self._slots: List[Optional[dict]] = []
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, ticket_id: int) -> bool:
+        return ticket_id in self._slot_of
+
+    def _vectorize(self, text: str) -> Dict[int, float]:
+        vector: Dict[int, float] = {}
+        for term, count in Counter(_tokens(text)).items():
+            h = zlib.crc32(term.encode())
+            sign = 1.0 if h & 0x80000000 else -1.0
+            bucket = h % self.dim
+            vector[bucket] = vector.get(bucket, 0.0) + sign * (1.0 + math.log(count))
+        return {b: v for b, v in vector.items() if v != 0}
+
+    def _idf_squared(self) -> np.ndarray:
+        idf = np.log((1.0 + len(self._slot_of)) / (1.0 + self._df)) + 1.0
+        return idf * idf
+
+    def _append(self, slot: int, buckets: np.ndarray, values: np.ndarray) -> None:
+        needed = self._nnz + len(buckets)
+        if needed > len(self._buckets):
+            capacity = max(needed, len(self._buckets) * 2)
+            for name in ("_buckets", "_values", "_owners"):
+                array = getattr(self, name)
+                grown = np.zeros(capacity, dtype=array.dtype)
+                grown[:self._nnz] = array[:self._nnz]
+                setattr(self, name, grown)
+        self._buckets[self._nnz:needed] = buckets
+        self._values[self._nnz:needed] = values
+        self._owners[self._nnz:needed] = slot
+        self._nnz = needed
+
+    def _compact(self) -> None:
+        live = np.array([meta is not None for meta in self._slots], dtype=bool)
+        keep = live[self._owners[:self._nnz]]
+        remap = np.cumsum(live) - 1
+        self._buckets = self._buckets[:self._nnz][keep].copy()
+        self._values = self._values[:self._nnz][keep].copy()
+        self._owners = remap[self._owners[:self._nnz][keep]].astype(np.int32)
+        self._nnz = len(self._buckets)
+        self._garbage = 0
+        self._slots = [meta for meta in self._slots if meta is not None]
+        self._slot_of = {meta["id"]: slot for slot, meta in enumerate(self._slots)}
+
+    def upsert(self, ticket: dict) -> None:
+        vector = self._vectorize(f"{ticket['title']} {ticket['title']} {ticket['description']}")
+        buckets = np.fromiter(vector.keys(), dtype=np.int32, count=len(vector))
+        values = np.fromiter(vector.values(), dtype=np.float32, count=len(vector))
+        meta = {
+            "id": ticket["id"],
+            "title": ticket["title"],
+            "status": ticket.get("status"),
+            "created_by": ticket.get("created_by"),
+            "has_response": bool(ticket.get("response")),
+            "nnz": len(vector),
+            "buckets": buckets
+        }
+        with self._lock:
+            self.remove(ticket["id"])
+            slot = len(self._slots)
+            self._slots.append(meta)
+            self._slot_of[ticket["id"]] = slot
+            self._append(slot, buckets, values)
+            self._df[buckets] += 1
+
+    def remove(self, ticket_id: int) -> None:
+        with self._lock:
+            slot = self._slot_of.pop(ticket_id, None)
+            if slot is None:
+                return
+            meta = self._slots[slot]
+            self._slots[slot] = None
+            self._df[meta["buckets"]] -= 1
+            self._garbage += meta["nnz"]
+            if self._garbage > self._nnz // 2:
+                self._compact()
+
+    def query(self, text: str = None, ticket_id: int = None, limit: int = 5, min_score: float = 0.0,
+              where: Optional[Callable[[dict], bool]] = None) -> List[Tuple[dict, float]]:
+        """Most similar tickets to a text or an indexed ticket, best first"""
+        with self._lock:
+            if ticket_id is not None:
+                slot = self._slot_of.get(ticket_id)
+                if slot is None:
+                    return []
+                entries = self._owners[:self._nnz] == slot
+                vector = dict(zip(self._buckets[:self._nnz][entries].tolist(), self._values[:self._nnz][entries].tolist()))
+            else:
+                vector = self._vectorize(text or "")
+            if not self._slot_of or not vector:
+                return []
+
+            weights = self._idf_squared()
+            query = np.zeros(self.dim, dtype=np.float32)
+            query[list(vector)] = list(vector.values())
+            weighted_query = query * weights
+            buckets = self._buckets[:self._nnz]
+            values = self._values[:self._nnz]
+            owners = self._owners[:self._nnz]
+            slots = len(self._slots)
+
+            dots = np.bincount(owners, weights=values * weighted_query[buckets], minlength=slots)
+            norms = np.sqrt(np.bincount(owners, weights=values * values * weights[buckets], minlength=slots))
+            norms *= math.sqrt(float(query @ weighted_query))
+            scores = np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+            if ticket_id is not None:
+                scores[self._slot_of[ticket_id]] = 0.0
+
+            results = []
+            for slot in np.argsort(-scores):
+                score = float(scores[slot])
+                if score < min_score or score <= 0 or len(results) >= limit:
+                    break
+                meta = self._slots[int(slot)]
+                if meta is not None and (where is None or where(meta)):
+                    results.append((meta, score))
+            return results
+
+    def seed(self, repos: Repositories, page_size: int = 1000) -> None:
+        """Load every ticket, paging by id"""
+        last_id = 0
+        while True:
+            rows = repos.tickets.find(
+                {"id__gt": last_id},
+                columns=["id", "title", "description", "status", "created_by", "response"],
+                order=[("id", False)],
+                limit=page_size
+            )
+            for row in rows:
+                self.upsert(row)
+            if len(rows) < page_size:
+                break
+            last_id = rows[-1]["id"]
+        self.ready = True
+        logger.info(f"Similarity index seeded with {len(self)} ticket(s)")
+
+    def on_event(self, event: TicketEvent) -> None:
+        if event.kind == "deleted":
+            self.remove(event.ticket["id"])
+        else:
+            self.upsert(event.ticket)
+
+    def start(self, events: TicketEventBus) -> None:
+        """Follow ticket events and seed from the database in the background"""
+        from ..database.connection import get_repositories
+
+        events.subscribe(self.on_event)
+
+        def run_seed():
+            try:
+                self.seed(get_repositories())
+            except Exception as e:
+                logger.error(f"Failed to seed similarity index: {e}")
+
+        threading.Thread(target=run_seed, name="similarity-seed", daemon=True).start()
+
+
+_similarity_index: Optional[SimilarityIndex] = None
+
+
+def get_similarity_index() -> SimilarityIndex:
+    global _similarity_index
+    if _similarity_index is None:
+        _similarity_index = SimilarityIndex(settings.SIMILARITY_DIM)
+    return _similarity_index
+
+
+def start_similarity_index() -> None:
+    get_similarity_index().start(get_ticket_events())
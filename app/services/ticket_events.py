@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Callable, List, Optional, Tuple
+
+from ..api.schemas import TicketOut
+from ..core.config import settings
+from ..models.user import User, Role
+
+logger = logging.getLogger(__name__)
+
+
+class TicketEvent:
+    def __init__(self, id: int, kind: str, ticket: dict, actor_id: Optional[int] = None,
+                 created_at: float = None):
+        self.id = id
+        self.kind = kind
+        self.ticket = ticket
+        self.actor_id = actor_id
+        self.created_at = created_at or time.time()
+
+    def visible_to(self, user: User) -> bool:
+        """Same visibility rules as TicketService.list_tickets"""
+        return user.role == Role.ADMIN or self.ticket.get("created_by") == user.id
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.kind,
+            "ticket": self.ticket,
+            "actor_id": self.actor_id,
+            "created_at": self.created_at
+        }
+
+
+class TicketEventBus:
+    """In-process change feed for ticket mutations.
+
+    Events get a monotonic id and are kept in a bounded history so subscribers
+    can resume from a last seen id. Ids restart with every process and differ
+    between workers, so the ids handed to clients carry the bus's `epoch`;
+    an id from another epoch cannot be resumed from. Synchronous listeners run inline on
+    publish; async subscribers all wait on one shared future, so an idle
+    subscriber costs a suspended coroutine and nothing else.
+    """
+
+    def __init__(self, history_size: int = 1000):
+        self._lock = threading.Lock()
+        self._history: deque = deque(maxlen=history_size)
+        self._next_id = 1
+        self.epoch = uuid.uuid4().hex[:8]
+        self._listeners: List[Callable[[TicketEvent], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._waiter: Optional[asyncio.Future] = None
+
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+    def client_id(self, event_id: int) -> str:
+        """Event id as sent to clients: `<epoch>-<id>`"""
+        return f"{self.epoch}-{event_id}"
+
+    def parse_client_id(self, value: str) -> Optional[int]:
+        """The id to resume after, or None when `value` is not from this bus's epoch"""
+        epoch, _, number = value.strip().rpartition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+
+    def subscribe(self, listener: Callable[[TicketEvent], None]) -> None:
+        """Register a synchronous callback invoked for every published event"""
+        self._listeners.append(listener)
+
+    def publish(self, kind: str, ticket: TicketOut, actor: Optional[User] = None) -> TicketEvent:
+        with self._lock:
+            event = TicketEvent(
+                id=self._next_id,
+                kind=kind,
+                ticket=ticket.model_dump(mode="json"),
+                actor_id=actor.id if actor else None
+            )
+            self._next_id += 1
+            self._history.append(event)
+
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Ticket event listener failed for {kind} #{ticket.id}: {e}")
+
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:
+                pass
+        return event
+
+    def events_after(self, last_id: int) -> Tuple[List[TicketEvent], bool]:
+        """Return the events newer than `last_id` and whether the caller missed some:
+        already evicted, or `last_id` is ahead of this bus (another process's id)"""
+        with self._lock:
+            if last_id > self._next_id - 1:
+                return [], True
+            if not self._history:
+                return [], False
+            first_id = self._history[0].id
+            gap = last_id < first_id - 1
+            start = max(last_id - first_id + 1, 0)
+            return list(islice(self._history, start, None)), gap
+
+    def waiter(self) -> asyncio.Future:
+        """Future resolved on the next publish; must be called from the event loop"""
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        if self._waiter is None or self._waiter.done():
+            self._waiter = loop.create_future()
+        return self._waiter
+
+    def _wake(self) -> None:
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+
+ticket_events = TicketEventBus(settings.TICKET_EVENTS_HISTORY)
+
+
+def get_ticket_events() -> TicketEventBus:
+    return ticket_events
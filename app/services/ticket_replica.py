@@ -0,0 +1,323 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..api.schemas import TicketOut
+from ..core.config import settings
+from ..database.repository import Repositories
+from ..models.base import TicketStatus
+from .ticket_events import TicketEvent, TicketEventBus, get_ticket_events
+
+logger = logging.getLogger(__name__)
+
+
+class TicketReplica:
+    """In-process copy of the tickets table for list and detail reads.
+
+    Rows are kept as ready-made TicketOut objects with hash indexes on
+    created_by, status and category_id, a sorted (created_at, id) index and
+    the open tickets in work-queue order (priority rank, then age).
+    Writes made through this worker arrive at once through the ticket event
+    bus; writes from other workers or straight to the database are picked up
+    by polling rows with a newer `updated_at` and new tombstones every
+    `poll_interval` seconds.
+
+    The replica only answers while it is `fresh` - seeded, with a successful
+    poll within `max_staleness` seconds - otherwise callers read the database.
+    """
+
+    _INDEXED = ("created_by", "status", "category_id")
+
+    def __init__(self, poll_interval: float = 2, max_staleness: float = 10, page_size: int = 1000,
+                 events: Optional[TicketEventBus] = None):
+        self.poll_interval = poll_interval
+        self.max_staleness = max_staleness
+        self.page_size = page_size
+        self.events = events or get_ticket_events()
+        self._lock = threading.RLock()
+        self._rows: Dict[int, TicketOut] = {}
+        self._indexes: Dict[str, Dict[object, Set[int]]] = {name: {} for name in self._INDEXED}
+        # (created_at timestamp, id); floats, as aware datetimes compare much slower
+        self._by_created: List[Tuple[float, int]] = []
+        self._created_key: Dict[int, Tuple[float, int]] = {}
+        # Open tickets as (-priority rank, created_at timestamp, id): the work queue order
+        self._queue: List[Tuple[int, float, int]] = []
+        # Ids are never reused, so a deleted id must not come back from a poll
+        # that read the row just before the delete
+        self._deleted: Set[int] = set()
+        self._deleted_order: deque = deque()
+        self._updated_watermark: Optional[str] = None
+        # Ids already applied at exactly the watermark timestamp, skipped by the next poll
+        self._watermark_ids: Set[int] = set()
+        self._tombstone_watermark = 0
+        self._synced_at = 0.0
+        self.seeded = False
+        self.hits = 0
+        self.fallbacks = 0
+        self._subscribed = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.seeded and time.monotonic() - self._synced_at <= self.max_staleness
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # Reads
+
+    def get(self, ticket_id: int) -> Optional[TicketOut]:
+        """The ticket, or None when it is unknown or the replica is stale"""
+        if not self.fresh:
+            self.fallbacks += 1
+            return None
+        ticket = self._rows.get(ticket_id)
+        if ticket is None:
+            # Possibly created by another worker since the last poll
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return ticket
+
+    def list(self, created_by: Optional[int] = None, status: Optional[str] = None,
+             category_id: Optional[int] = None, newest_first: bool = True,
+             limit: Optional[int] = None) -> Optional[List[TicketOut]]:
+        """Matching tickets ordered by created_at, or None when the replica is stale"""
+        if not self.fresh:
+            self.fallbacks += 1
+            return None
+        filters = {"created_by": created_by, "status": status, "category_id": category_id}
+        with self._lock:
+            candidates = None
+            for name, value in sorted(
+                ((n, v) for n, v in filters.items() if v is not None),
+                key=lambda item: len(self._indexes[item[0]].get(item[1], ()))
+            ):
+                ids = self._indexes[name].get(value, set())
+                candidates = set(ids) if candidates is None else candidates & ids
+                if not candidates:
+                    break
+            if candidates is None:
+                ordered = reversed(self._by_created) if newest_first else iter(self._by_created)
+                ids = [ticket_id for _, ticket_id in ordered]
+            else:
+                ids = sorted(candidates, key=self._created_key.__getitem__, reverse=newest_first)
+            if limit is not None:
+                ids = ids[:limit]
+            tickets = [self._rows[ticket_id] for ticket_id in ids]
+        self.hits += 1
+        return tickets
+
+    def queue(self, after: Optional[Tuple[int, float, int]], limit: int,
+              category_id: Optional[int] = None) -> Optional[List[TicketOut]]:
+        """Open tickets after the `after` queue key, most urgent and oldest first,
+        or None when the replica is stale"""
+        if not self.fresh:
+            self.fallbacks += 1
+            return None
+        tickets = []
+        with self._lock:
+            position = bisect.bisect_right(self._queue, after) if after else 0
+            while position < len(self._queue) and len(tickets) < limit:
+                ticket = self._rows[self._queue[position][2]]
+                if category_id is None or ticket.category_id == category_id:
+                    tickets.append(ticket)
+                position += 1
+        self.hits += 1
+        return tickets
+
+    # Writes
+
+    def upsert(self, row: dict) -> None:
+        ticket = TicketOut.model_validate(row)
+        with self._lock:
+            if ticket.id in self._deleted:
+                return
+            current = self._rows.get(ticket.id)
+            if current is not None:
+                if current.updated_at > ticket.updated_at:
+                    return  # a poll that raced with a newer event
+                self._unindex(current)
+            self._rows[ticket.id] = ticket
+            for name in self._INDEXED:
+                self._indexes[name].setdefault(self._index_key(ticket, name), set()).add(ticket.id)
+            key = (ticket.created_at.timestamp(), ticket.id)
+            self._created_key[ticket.id] = key
+            bisect.insort(self._by_created, key)
+            if ticket.status == TicketStatus.open:
+                bisect.insort(self._queue, (-ticket.priority.rank,) + key)
+
+    def remove(self, ticket_id: int) -> None:
+        with self._lock:
+            if ticket_id not in self._deleted:
+                self._deleted.add(ticket_id)
+                self._deleted_order.append(ticket_id)
+                while len(self._deleted_order) > 100000:
+                    self._deleted.discard(self._deleted_order.popleft())
+            ticket = self._rows.pop(ticket_id, None)
+            if ticket is not None:
+                self._unindex(ticket)
+
+    def _unindex(self, ticket: TicketOut) -> None:
+        for name in self._INDEXED:
+            bucket = self._indexes[name].get(self._index_key(ticket, name))
+            if bucket is not None:
+                bucket.discard(ticket.id)
+                if not bucket:
+                    del self._indexes[name][self._index_key(ticket, name)]
+        key = self._created_key.pop(ticket.id)
+        position = bisect.bisect_left(self._by_created, key)
+        if position < len(self._by_created) and self._by_created[position] == key:
+            del self._by_created[position]
+        if ticket.status == TicketStatus.open:
+            queue_key = (-ticket.priority.rank,) + key
+            position = bisect.bisect_left(self._queue, queue_key)
+            if position < len(self._queue) and self._queue[position] == queue_key:
+                del self._queue[position]
+
+    @staticmethod
+    def _index_key(ticket: TicketOut, name: str):
+        value = getattr(ticket, name)
+        return getattr(value, "value", value)
+
+    def on_event(self, event: TicketEvent) -> None:
+        if event.kind == "deleted":
+            self.remove(event.ticket["id"])
+        else:
+            self.upsert(event.ticket)
+
+    # Synchronisation
+
+    def seed(self, repos: Repositories) -> None:
+        """Load every ticket, paging by id; the first poll picks up what changed meanwhile"""
+        started = time.monotonic()
+        latest = repos.tickets.find(columns=["updated_at"], order=[("updated_at", True)], limit=1)
+        tombstone = repos.ticket_tombstones.find(columns=["id"], order=[("id", True)], limit=1)
+        watermark = latest[0]["updated_at"] if latest else None
+        watermark_ids = set()
+        last_id = 0
+        while True:
+            rows = repos.tickets.find({"id__gt": last_id}, order=[("id", False)], limit=self.page_size)
+            for row in rows:
+                self.upsert(row)
+                if row["updated_at"] == watermark:
+                    watermark_ids.add(row["id"])
+            if len(rows) < self.page_size:
+                break
+            last_id = rows[-1]["id"]
+        self._updated_watermark, self._watermark_ids = watermark, watermark_ids
+        self._tombstone_watermark = tombstone[0]["id"] if tombstone else 0
+        self._synced_at = started
+        self.seeded = True
+        logger.info(f"Ticket replica seeded with {len(self)} ticket(s)")
+
+    def poll(self, repos: Repositories) -> None:
+        """Apply rows updated since the watermark and tickets deleted since the last tombstone"""
+        started = time.monotonic()
+        # gte: rows sharing the watermark timestamp may have been written after the last poll
+        since, inclusive = self._updated_watermark, True
+        while True:
+            rows = repos.tickets.find(
+                {"updated_at__gte" if inclusive else "updated_at__gt": since},
+                order=[("updated_at", False), ("id", False)],
+                limit=self.page_size
+            )
+            for row in rows:
+                if not (row["updated_at"] == self._updated_watermark and row["id"] in self._watermark_ids):
+                    self.upsert(row)
+            if rows:
+                since = rows[-1]["updated_at"]
+                if since != self._updated_watermark:
+                    self._updated_watermark, self._watermark_ids = since, set()
+                self._watermark_ids.update(row["id"] for row in rows if row["updated_at"] == since)
+            if len(rows) < self.page_size:
+                break
+            inclusive = rows[0]["updated_at"] != since
+            if not inclusive:
+                # A full page on one timestamp; drain it by id, then move strictly past it
+                self._poll_same_timestamp(repos, since, rows[-1]["id"])
+        while True:
+            tombstones = repos.ticket_tombstones.find(
+                {"id__gt": self._tombstone_watermark},
+                columns=["id", "ticket_id"],
+                order=[("id", False)],
+                limit=self.page_size
+            )
+            for tombstone in tombstones:
+                self.remove(tombstone["ticket_id"])
+            if tombstones:
+                self._tombstone_watermark = tombstones[-1]["id"]
+            if len(tombstones) < self.page_size:
+                break
+        self._synced_at = started
+
+    def _poll_same_timestamp(self, repos: Repositories, updated_at: str, after_id: int) -> None:
+        while True:
+            rows = repos.tickets.find(
+                {"updated_at": updated_at, "id__gt": after_id}, order=[("id", False)], limit=self.page_size
+            )
+            for row in rows:
+                self.upsert(row)
+            self._watermark_ids.update(row["id"] for row in rows)
+            if len(rows) < self.page_size:
+                return
+            after_id = rows[-1]["id"]
+
+    def start(self) -> None:
+        """Follow ticket events, then seed and poll in a background thread"""
+        from ..database.connection import get_repositories
+
+        if self._thread is not None:
+            return
+        if not self._subscribed:
+            self.events.subscribe(self.on_event)
+            self._subscribed = True
+        self._stop.clear()
+
+        def run():
+            repos = get_repositories()
+            while not self._stop.is_set():
+                try:
+                    if self.seeded:
+                        self.poll(repos)
+                    else:
+                        self.seed(repos)
+                except Exception as e:
+                    logger.error(f"Ticket replica sync failed: {e}")
+                self._stop.wait(self.poll_interval)
+
+        self._thread = threading.Thread(target=run, name="ticket-replica", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": settings.TICKET_REPLICA_ENABLED,
+            "seeded": self.seeded,
+            "fresh": self.fresh,
+            "tickets": len(self),
+            "lag_seconds": round(time.monotonic() - self._synced_at, 3) if self.seeded else None,
+            "hits": self.hits,
+            "fallbacks": self.fallbacks
+        }
+
+
+ticket_replica = TicketReplica(
+    poll_interval=settings.TICKET_REPLICA_POLL_SECONDS,
+    max_staleness=settings.TICKET_REPLICA_MAX_STALENESS_SECONDS,
+    page_size=settings.TICKET_REPLICA_PAGE_SIZE
+)
+
+
+def get_ticket_replica() -> TicketReplica:
+    return ticket_replica
@@ -1,46 +1,237 @@
-from typing import List
-from supabase import Client
+from typing import Iterator, List, Optional, Set
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
+import base64
+import binascii
+import json
+import logging
 
 from ..models.user import User, Role
 from ..models.ticket import Ticket, TicketStatus
-from ..api.schemas import TicketCreate, TicketUpdate, TicketOut
+from ..models.base import TicketPriority
+from ..api.schemas import (
+    TicketCreate, TicketUpdate, TicketOut, TicketChangesOut, TicketTombstoneOut, TicketCountOut,
+    TicketQueueItem, TicketQueueOut, TicketCreatorOut, TicketCategoryOut
+)
+from ..core.cache import Cache, get_cache
+from ..core.config import settings
+from ..database.repository import Repositories
+from .audit_log import AuditLog, diff, get_audit_log
+from .category_service import CategoryService
+from .ticket_events import TicketEventBus, get_ticket_events
+from .ticket_replica import TicketReplica, get_ticket_replica
+
+logger = logging.getLogger(__name__)
+
+# Columns written by the export, in output order
+EXPORT_COLUMNS = [
+    "id", "title", "description", "status", "priority", "created_by", "category_id",
+    "response", "created_at", "updated_at", "suggested_category_id", "suggested_priority"
+]
 
 
 class TicketService:
-    def __init__(self, supabase: Client):
-        self.supabase = supabase
+    def __init__(self, repos: Repositories, cache: Optional[Cache] = None,
+                 events: Optional[TicketEventBus] = None, replica: Optional[TicketReplica] = None,
+                 audit: Optional[AuditLog] = None):
+        self.repos = repos
+        self.cache = cache or get_cache()
+        self.events = events or get_ticket_events()
+        self.replica = replica or get_ticket_replica()
+        self.audit = audit or get_audit_log()
 
     def list_tickets(self, user: User) -> List[TicketOut]:
         """List tickets based on user role"""
-        if user.role == Role.ADMIN:
-            response = self.supabase.table("tickets").select("*").order("created_at", desc=True).execute()
-        else:
-            response = self.supabase.table("tickets").select("*").eq("created_by", user.id).order("created_at", desc=True).execute()
+        tickets = self.replica.list(created_by=None if user.role == Role.ADMIN else user.id)
+        if tickets is not None:
+            return tickets
+        
+        where = None if user.role == Role.ADMIN else {"created_by": user.id}
+        rows = self.repos.tickets.find(where, order=[("created_at", True)])
         
         tickets = []
-        for ticket_data in response.data:
+        for ticket_data in rows:
             ticket = Ticket.from_dict(ticket_data)
-            tickets.append(TicketOut(
-                id=ticket.id,
-                title=ticket.title,
-                description=ticket.description,
-                status=ticket.status,
-                priority=ticket.priority,
-                created_by=ticket.created_by,
-                category_id=ticket.category_id,
-                response=ticket.response,
-                created_at=ticket.created_at,
-                updated_at=ticket.updated_at
-            ))
+            tickets.append(self._ticket_out(ticket))
         
         return tickets
 
+    def list_changes(self, user: User, since: Optional[str] = None, limit: int = None) -> TicketChangesOut:
+        """Return tickets changed and deleted since a sync token, plus the next token"""
+        limit = limit or settings.SYNC_PAGE_SIZE
+        cursor = self._decode_sync_token(since) if since else None
+        
+        if cursor:
+            issued_at = datetime.fromtimestamp(cursor["i"], tz=timezone.utc)
+            if datetime.now(timezone.utc) - issued_at > timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+                raise HTTPException(status_code=410, detail="Sync token expired, reload the full ticket list")
+            updated_since, seen_ids, tombstone_id = cursor["u"], set(cursor["s"]), cursor["d"]
+        else:
+            updated_since, seen_ids, tombstone_id = None, set(), None
+        
+        # A first full sync only needs the current tombstone position; read it
+        # before the tickets so a ticket deleted in between comes back as deleted
+        first_sync = tombstone_id is None
+        if first_sync:
+            latest = self.repos.ticket_tombstones.find(columns=["id"], order=[("id", True)], limit=1)
+            tombstone_id = latest[0]["id"] if latest else 0
+        
+        # Changed tickets, oldest first; rows sharing the cursor timestamp were
+        # already delivered and are listed in the token
+        owner = None if user.role == Role.ADMIN else user.id
+        rows = self.repos.tickets.find(
+            {"created_by": owner, "updated_at__gte": updated_since},
+            order=[("updated_at", False), ("id", False)],
+            limit=limit + len(seen_ids) + 1
+        )
+        rows = [row for row in rows if not (row["updated_at"] == updated_since and row["id"] in seen_ids)]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        
+        if rows:
+            last_updated = rows[-1]["updated_at"]
+            boundary_ids = {row["id"] for row in rows if row["updated_at"] == last_updated}
+            if last_updated == updated_since:
+                boundary_ids |= seen_ids
+            updated_since, seen_ids = last_updated, boundary_ids
+        
+        # Tombstones
+        deleted = []
+        if not first_sync:
+            tombstones = self.repos.ticket_tombstones.find(
+                {"id__gt": tombstone_id, "created_by": owner}, order=[("id", False)], limit=limit + 1
+            )
+            has_more = has_more or len(tombstones) > limit
+            for row in tombstones[:limit]:
+                tombstone_id = row["id"]
+                deleted.append(TicketTombstoneOut(id=row["ticket_id"], deleted_at=row["deleted_at"]))
+        
+        return TicketChangesOut(
+            changes=[self._ticket_out(Ticket.from_dict(row)) for row in rows],
+            deleted=deleted,
+            next_token=self._encode_sync_token(updated_since, seen_ids, tombstone_id),
+            has_more=has_more
+        )
+
+    def ticket_queue(self, cursor: Optional[str] = None, limit: int = 50,
+                     category_id: Optional[int] = None) -> TicketQueueOut:
+        """Open tickets in work order: priority rank, then oldest first, with SLA flags"""
+        after = self._decode_queue_cursor(cursor) if cursor else None
+        replica_after = None
+        if after:
+            priority, created_at, last_id = after
+            replica_after = (-priority.rank, datetime.fromisoformat(created_at.replace("Z", "+00:00")).timestamp(), last_id)
+        
+        tickets = self.replica.queue(replica_after, limit + 1, category_id)
+        if tickets is not None:
+            has_more = len(tickets) > limit
+            tickets = tickets[:limit]
+            last = tickets[-1] if tickets else None
+            last_key = (last.priority, last.created_at.isoformat(), last.id) if last else None
+        else:
+            rows = self._queue_rows(after, limit + 1, category_id)
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            tickets = [self._ticket_out(Ticket.from_dict(row)) for row in rows]
+            # Keep the database's own timestamp text so the next page compares like with like
+            last_key = (TicketPriority(rows[-1]["priority"]), rows[-1]["created_at"], rows[-1]["id"]) if rows else None
+        
+        now = datetime.now(timezone.utc)
+        return TicketQueueOut(
+            tickets=[self._queue_item(ticket, now) for ticket in tickets],
+            next_cursor=self._encode_queue_cursor(*last_key) if has_more else None,
+            has_more=has_more
+        )
+
+    def _queue_rows(self, after: Optional[tuple], limit: int, category_id: Optional[int]) -> List[dict]:
+        """One (status, priority, created_at, id) index range per priority, most urgent first"""
+        priorities = sorted(TicketPriority, key=lambda p: p.rank, reverse=True)
+        if after:
+            priorities = [p for p in priorities if p.rank <= after[0].rank]
+        rows = []
+        for priority in priorities:
+            where = {"status": TicketStatus.open, "priority": priority, "category_id": category_id}
+            if after and priority == after[0]:
+                # Rest of the cursor's timestamp, then strictly later ones
+                rows += self.repos.tickets.find(
+                    {**where, "created_at": after[1], "id__gt": after[2]}, order=[("id", False)], limit=limit - len(rows)
+                )
+                where["created_at__gt"] = after[1]
+            if len(rows) >= limit:
+                break
+            rows += self.repos.tickets.find(where, order=[("created_at", False), ("id", False)], limit=limit - len(rows))
+            if len(rows) >= limit:
+                break
+        return rows
+
+    @staticmethod
+    def _queue_item(ticket: TicketOut, now: datetime) -> TicketQueueItem:
+        sla_hours = {
+            TicketPriority.HIGH: settings.TICKET_SLA_HOURS_HIGH,
+            TicketPriority.MEDIUM: settings.TICKET_SLA_HOURS_MEDIUM,
+            TicketPriority.LOW: settings.TICKET_SLA_HOURS_LOW
+        }[ticket.priority]
+        created_at = ticket.created_at if ticket.created_at.tzinfo else ticket.created_at.replace(tzinfo=timezone.utc)
+        sla_due_at = created_at + timedelta(hours=sla_hours)
+        return TicketQueueItem(
+            **ticket.model_dump(),
+            priority_rank=ticket.priority.rank,
+            age_seconds=int((now - created_at).total_seconds()),
+            sla_due_at=sla_due_at,
+            sla_breached=now > sla_due_at
+        )
+
+    def count_tickets(self, user: User, created_by: Optional[int] = None, category_id: Optional[int] = None,
+                      status: Optional[TicketStatus] = None, estimated: bool = False) -> TicketCountOut:
+        """Count tickets per user and/or category without fetching them"""
+        if user.role != Role.ADMIN:
+            if created_by is not None and created_by != user.id:
+                raise HTTPException(status_code=403, detail="Forbidden")
+            created_by = user.id
+        
+        filters = {"created_by": created_by, "category_id": category_id, "status": status}
+        return TicketCountOut(
+            count=self.repos.tickets.count(filters, estimated=estimated),
+            estimated=estimated,
+            created_by=created_by,
+            category_id=category_id,
+            status=status
+        )
+
+    def export_tickets(self, user: User, created_by: Optional[int] = None, category_id: Optional[int] = None,
+                       status: Optional[TicketStatus] = None, page_size: int = None) -> Iterator[List[dict]]:
+        """Pages of raw ticket rows (EXPORT_COLUMNS) in id order
+        
+        Access is checked here, before the first page is read. Pages are
+        fetched lazily with keyset pagination on id, so only one page is held
+        in memory and late pages cost the same as early ones.
+        """
+        if user.role != Role.ADMIN:
+            if created_by is not None and created_by != user.id:
+                raise HTTPException(status_code=403, detail="Forbidden")
+            created_by = user.id
+        page_size = page_size or settings.EXPORT_PAGE_SIZE
+        filters = {"created_by": created_by, "category_id": category_id, "status": status}
+        
+        def pages():
+            last_id = 0
+            while True:
+                rows = self.repos.tickets.find(
+                    {**filters, "id__gt": last_id}, columns=EXPORT_COLUMNS, order=[("id", False)], limit=page_size
+                )
+                if rows:
+                    yield rows
+                if len(rows) < page_size:
+                    return
+                last_id = rows[-1]["id"]
+        
+        return pages()
+
     def create_ticket(self, ticket_data: TicketCreate, user: User) -> TicketOut:
         """Create a new ticket"""
         # Validate category exists
-        category_response = self.supabase.table("categories").select("*").eq("id", ticket_data.category_id).execute()
-        if not category_response.data:
+        category = CategoryService(self.repos, self.cache).get_category_row(ticket_data.category_id)
+        if not category:
             raise HTTPException(status_code=400, detail="Invalid category")
         
         # Create ticket data
@@ -53,85 +244,58 @@ class TicketService:
             "status": TicketStatus.open.value
         }
         
-        response = self.supabase.table("tickets").insert(ticket_dict).execute()
+        rows = self.repos.tickets.insert(ticket_dict)
         
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=500, detail="Failed to create ticket")
         
-        ticket = Ticket.from_dict(response.data[0])
-        return TicketOut(
-            id=ticket.id,
-            title=ticket.title,
-            description=ticket.description,
-            status=ticket.status,
-            priority=ticket.priority,
-            created_by=ticket.created_by,
-            category_id=ticket.category_id,
-            response=ticket.response,
-            created_at=ticket.created_at,
-            updated_at=ticket.updated_at
-        )
+        ticket = Ticket.from_dict(rows[0])
+        ticket_out = self._ticket_out(ticket)
+        self._counters_changed(ticket.category_id)
+        self.events.publish("created", ticket_out, user)
+        return ticket_out
 
     def get_ticket(self, ticket_id: int, user: User) -> TicketOut:
         """Get ticket by ID with access control"""
-        response = self.supabase.table("tickets").select("*").eq("id", ticket_id).execute()
-        
-        if not response.data:
-            raise HTTPException(status_code=404, detail="Not found")
-        
-        ticket_data = response.data[0]
-        ticket = Ticket.from_dict(ticket_data)
+        ticket_out = self.replica.get(ticket_id)
+        if ticket_out is None:
+            ticket_data = self.repos.tickets.get(ticket_id)
+            
+            if not ticket_data:
+                raise HTTPException(status_code=404, detail="Not found")
+            
+            ticket_out = self._ticket_out(Ticket.from_dict(ticket_data))
         
         # Check access permissions
-        if user.role != Role.ADMIN and ticket.created_by != user.id:
+        if user.role != Role.ADMIN and ticket_out.created_by != user.id:
             raise HTTPException(status_code=403, detail="Forbidden")
         
-        return TicketOut(
-            id=ticket.id,
-            title=ticket.title,
-            description=ticket.description,
-            status=ticket.status,
-            priority=ticket.priority,
-            created_by=ticket.created_by,
-            category_id=ticket.category_id,
-            response=ticket.response,
-            created_at=ticket.created_at,
-            updated_at=ticket.updated_at
-        )
+        return ticket_out
 
     def get_ticket_by_id(self, ticket_id: int) -> TicketOut:
         """Get ticket by ID without access control (for internal use like AI responses)"""
-        response = self.supabase.table("tickets").select("*").eq("id", ticket_id).execute()
+        ticket_out = self.replica.get(ticket_id)
+        if ticket_out is not None:
+            return ticket_out
+        
+        ticket_data = self.repos.tickets.get(ticket_id)
         
-        if not response.data:
+        if not ticket_data:
             raise HTTPException(status_code=404, detail="Ticket not found")
         
-        ticket_data = response.data[0]
         ticket = Ticket.from_dict(ticket_data)
         
-        return TicketOut(
-            id=ticket.id,
-            title=ticket.title,
-            description=ticket.description,
-            status=ticket.status,
-            priority=ticket.priority,
-            created_by=ticket.created_by,
-            category_id=ticket.category_id,
-            response=ticket.response,
-            created_at=ticket.created_at,
-            updated_at=ticket.updated_at
-        )
+        return self._ticket_out(ticket)
 
     def update_ticket(self, ticket_id: int, ticket_data: TicketUpdate, user: User) -> TicketOut:
         """Update an existing ticket with access control"""
         # Check if ticket exists
-        response = self.supabase.table("tickets").select("*").eq("id", ticket_id).execute()
+        ticket_row = self.repos.tickets.get(ticket_id)
         
-        if not response.data:
+        if not ticket_row:
             raise HTTPException(status_code=404, detail="Not found")
         
-        ticket_dict = response.data[0]
-        ticket = Ticket.from_dict(ticket_dict)
+        ticket = Ticket.from_dict(ticket_row)
         
         # Check access permissions
         if user.role != Role.ADMIN and ticket.created_by != user.id:
@@ -150,76 +314,77 @@ class TicketService:
                     update_data[field] = value
         
         if not update_data:
-            return TicketOut(
-                id=ticket.id,
-                title=ticket.title,
-                description=ticket.description,
-                status=ticket.status,
-                priority=ticket.priority,
-                created_by=ticket.created_by,
-                category_id=ticket.category_id,
-                response=ticket.response,
-                created_at=ticket.created_at,
-                updated_at=ticket.updated_at
-            )
+            return self._ticket_out(ticket)
         
         # Update ticket
-        response = self.supabase.table("tickets").update(update_data).eq("id", ticket_id).execute()
+        rows = self.repos.tickets.update(update_data, {"id": ticket_id})
         
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=500, detail="Failed to update ticket")
         
-        updated_ticket = Ticket.from_dict(response.data[0])
-        return TicketOut(
-            id=updated_ticket.id,
-            title=updated_ticket.title,
-            description=updated_ticket.description,
-            status=updated_ticket.status,
-            priority=updated_ticket.priority,
-            created_by=updated_ticket.created_by,
-            category_id=updated_ticket.category_id,
-            response=updated_ticket.response,
-            created_at=updated_ticket.created_at,
-            updated_at=updated_ticket.updated_at
-        )
+        updated_ticket = Ticket.from_dict(rows[0])
+        ticket_out = self._ticket_out(updated_ticket)
+        closed = ticket.status != TicketStatus.closed and updated_ticket.status == TicketStatus.closed
+        if (ticket.category_id, ticket.status) != (updated_ticket.category_id, updated_ticket.status):
+            self._counters_changed(ticket.category_id, updated_ticket.category_id)
+        self.audit.record("ticket", ticket_id, "ticket.closed" if closed else "ticket.updated", user,
+                          diff(ticket_row, update_data))
+        self.events.publish("closed" if closed else "updated", ticket_out, user)
+        return ticket_out
 
-    def close_ticket(self, ticket_id: int) -> TicketOut:
+    def close_ticket(self, ticket_id: int, user: Optional[User] = None) -> TicketOut:
         """Close a ticket (admin only)"""
         # Check if ticket exists
-        response = self.supabase.table("tickets").select("*").eq("id", ticket_id).execute()
-        
-        if not response.data:
+        current = self.repos.tickets.find_one({"id": ticket_id}, columns=["id", "status"])
+        if not current:
             raise HTTPException(status_code=404, detail="Not found")
         
         # Close ticket
-        response = self.supabase.table("tickets").update({"status": TicketStatus.closed.value}).eq("id", ticket_id).execute()
+        rows = self.repos.tickets.update({"status": TicketStatus.closed}, {"id": ticket_id})
         
-        if not response.data:
+        if not rows:
             raise HTTPException(status_code=500, detail="Failed to close ticket")
         
-        ticket = Ticket.from_dict(response.data[0])
-        return TicketOut(
-            id=ticket.id,
-            title=ticket.title,
-            description=ticket.description,
-            status=ticket.status,
-            priority=ticket.priority,
-            created_by=ticket.created_by,
-            category_id=ticket.category_id,
-            response=ticket.response,
-            created_at=ticket.created_at,
-            updated_at=ticket.updated_at
-        )
+        ticket = Ticket.from_dict(rows[0])
+        ticket_out = self._ticket_out(ticket)
+        self._counters_changed(ticket.category_id)
+        self.audit.record("ticket", ticket_id, "ticket.closed", user, diff(current, {"status": TicketStatus.closed.value}))
+        self.events.publish("closed", ticket_out, user)
+        return ticket_out
+
+    def set_response(self, ticket_id: int, response_text: str) -> TicketOut:
+        """Store a generated response on a ticket (internal use by background jobs)"""
+        rows = self.repos.tickets.update({"response": response_text}, {"id": ticket_id})
+        
+        if not rows:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        
+        ticket_out = self._ticket_out(Ticket.from_dict(rows[0]))
+        self.events.publish("updated", ticket_out)
+        return ticket_out
+
+    def set_triage(self, ticket_id: int, category_id: Optional[int], priority: Optional[str]) -> Optional[TicketOut]:
+        """Store the auto-triage suggestion on a ticket (internal use by the triage worker)"""
+        rows = self.repos.tickets.update({
+            "suggested_category_id": category_id,
+            "suggested_priority": priority
+        }, {"id": ticket_id})
+        
+        if not rows:
+            return None
+        
+        ticket_out = self._ticket_out(Ticket.from_dict(rows[0]))
+        self.events.publish("updated", ticket_out)
+        return ticket_out
 
     def delete_ticket(self, ticket_id: int, user: User) -> dict:
         """Delete a ticket with access control"""
         # Check if ticket exists
-        response = self.supabase.table("tickets").select("*").eq("id", ticket_id).execute()
+        ticket_data = self.repos.tickets.get(ticket_id)
         
-        if not response.data:
+        if not ticket_data:
             raise HTTPException(status_code=404, detail="Not found")
         
-        ticket_data = response.data[0]
         ticket = Ticket.from_dict(ticket_data)
         
         # Check access permissions
@@ -227,5 +392,101 @@ class TicketService:
             raise HTTPException(status_code=403, detail="Forbidden")
         
         # Delete ticket
-        self.supabase.table("tickets").delete().eq("id", ticket_id).execute()
+        self.repos.tickets.delete({"id": ticket_id})
+        try:
+            self.repos.ticket_tombstones.insert({
+                "ticket_id": ticket.id,
+                "created_by": ticket.created_by
+            })
+        except Exception as e:
+            logger.error(f"Failed to record tombstone for ticket {ticket.id}: {e}")
+        self._counters_changed(ticket.category_id)
+        self.audit.record("ticket", ticket_id, "ticket.deleted", user, {
+            field: ticket_data.get(field) for field in ("title", "status", "priority", "created_by", "category_id")
+        })
+        self.events.publish("deleted", self._ticket_out(ticket), user)
         return {"ok": True}
+
+    def expand(self, tickets: List[TicketOut], fields: Set[str]) -> List[TicketOut]:
+        """Attach creator and/or category summaries to tickets.
+
+        Each relation costs one query for the distinct ids referenced by the
+        whole list, however many tickets share them. Returns copies, so
+        tickets shared with the replica are never modified.
+        """
+        if not fields or not tickets:
+            return tickets
+        creators, categories = {}, {}
+        if "creator" in fields:
+            ids = sorted({ticket.created_by for ticket in tickets})
+            creators = {
+                row["id"]: TicketCreatorOut(**row)
+                for row in self.repos.users.find({"id__in": ids}, columns=["id", "name", "email"])
+            }
+        if "category" in fields:
+            ids = sorted({ticket.category_id for ticket in tickets})
+            categories = {
+                row["id"]: TicketCategoryOut(**row)
+                for row in self.repos.categories.find({"id__in": ids}, columns=["id", "name", "color"])
+            }
+        return [
+            ticket.model_copy(update={
+                "creator": creators.get(ticket.created_by),
+                "category": categories.get(ticket.category_id)
+            })
+            for ticket in tickets
+        ]
+
+    def _counters_changed(self, *category_ids: int) -> None:
+        CategoryService(self.repos, self.cache).invalidate_counters(*category_ids)
+
+    def _ticket_out(self, ticket: Ticket) -> TicketOut:
+        return TicketOut(
+            id=ticket.id,
+            title=ticket.title,
+            description=ticket.description,
+            status=ticket.status,
+            priority=ticket.priority,
+            created_by=ticket.created_by,
+            category_id=ticket.category_id,
+            response=ticket.response,
+            created_at=ticket.created_at,
+            updated_at=ticket.updated_at,
+            suggested_category_id=ticket.suggested_category_id,
+            suggested_priority=ticket.suggested_priority
+        )
+
+    @staticmethod
+    def _encode_queue_cursor(priority: TicketPriority, created_at: str, last_id: int) -> str:
+        payload = {"p": priority.value, "c": created_at, "i": last_id}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_queue_cursor(cursor: str) -> tuple:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            datetime.fromisoformat(payload["c"].replace("Z", "+00:00"))
+            return TicketPriority(payload["p"]), payload["c"], int(payload["i"])
+        except (ValueError, TypeError, KeyError, AttributeError, binascii.Error):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    @staticmethod
+    def _encode_sync_token(updated_since: Optional[str], seen_ids: set, tombstone_id: int) -> str:
+        payload = {
+            "u": updated_since,
+            "s": sorted(seen_ids),
+            "d": tombstone_id,
+            "i": int(datetime.now(timezone.utc).timestamp())
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_sync_token(token: str) -> dict:
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded))
+            if not isinstance(payload, dict) or not {"u", "s", "d", "i"} <= payload.keys():
+                raise ValueError("missing fields")
+            return payload
+        except (ValueError, binascii.Error):
+            raise HTTPException(status_code=400, detail="Invalid sync token")
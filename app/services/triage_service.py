@@ -0,0 +1,124 @@
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from ..core.config import settings
+from .ticket_events import TicketEvent, TicketEventBus, get_ticket_events
+
+logger = logging.getLogger(__name__)
+
+
+class TriageQueue:
+    """Background auto-triage of newly created tickets.
+
+    Subscribes to "created" ticket events, so the create call only pays for
+    an in-memory enqueue. A worker thread groups tickets into batches (full
+    batch or max wait, whichever comes first) and classifies each batch with
+    a single Groq completion.
+    """
+
+    def __init__(self, events: TicketEventBus, batch_size: int, batch_wait: float, max_queue: int):
+        self.events = events
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._subscribed = False
+        self.triaged = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if not self._subscribed:
+            self.events.subscribe(self._on_event)
+            self._subscribed = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._work, name="ticket-triage", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop after the batch in progress; tickets still queued are not triaged"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        try:
+            self._queue.put_nowait(None)  # wakes the worker if it is idle
+        except queue.Full:
+            pass  # busy: it sees the stop event after the current batch
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def _on_event(self, event: TicketEvent) -> None:
+        if event.kind != "created" or self._thread is None:
+            return
+        try:
+            self._queue.put_nowait(event.ticket)
+        except queue.Full:
+            self.dropped += 1
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    break
+                batch.append(item)
+            self._triage(batch)
+
+    def _triage(self, tickets: List[dict]) -> None:
+        from ..database.connection import get_repositories
+        from .category_service import CategoryService
+        from .groq_service import GroqService
+        from .ticket_service import TicketService
+
+        repos = get_repositories()
+        try:
+            categories = [c.model_dump() for c in CategoryService(repos).list_categories()]
+            suggestions = GroqService().suggest_triage(tickets, categories)
+        except Exception as e:
+            logger.error(f"Auto-triage failed for {len(tickets)} ticket(s): {e}")
+            self.failed += len(tickets)
+            return
+
+        ticket_service = TicketService(repos)
+        for ticket_id, suggestion in suggestions.items():
+            try:
+                ticket_service.set_triage(ticket_id, suggestion["category_id"], suggestion["priority"])
+                self.triaged += 1
+            except Exception as e:
+                logger.error(f"Failed to store triage for ticket {ticket_id}: {e}")
+                self.failed += 1
+
+
+_triage_queue: Optional[TriageQueue] = None
+
+
+def get_triage_queue() -> TriageQueue:
+    global _triage_queue
+    if _triage_queue is None:
+        _triage_queue = TriageQueue(
+            get_ticket_events(),
+            batch_size=settings.AI_TRIAGE_BATCH_SIZE,
+            batch_wait=settings.AI_TRIAGE_BATCH_WAIT_SECONDS,
+            max_queue=settings.AI_TRIAGE_MAX_QUEUE
+        )
+    return _triage_queue
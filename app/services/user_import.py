@@ -0,0 +1,168 @@
+import codecs
+import csv
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from ..core.config import settings
+from ..core.security import hash_password
+from ..database.repository import Repositories
+from ..api.schemas import UserCreate, UserImportError, UserImportOut
+
+logger = logging.getLogger(__name__)
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_hash_pool() -> ProcessPoolExecutor:
+    """Process pool for bcrypt, created on first import"""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=settings.USER_IMPORT_HASH_WORKERS or os.cpu_count())
+    return _hash_pool
+
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
+
+async def iter_import_rows(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Union[dict, str]]]:
+    """Yield (line number, row dict) from a CSV or NDJSON body as it arrives.
+
+    CSV needs a header with name, email, password and optionally role, and
+    one record per line. Unparseable lines yield an error string instead of
+    a dict.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    header: Optional[List[str]] = None
+    buffer = ""
+    line_no = 0
+
+    def parse(line: str) -> Optional[Union[dict, str]]:
+        nonlocal header
+        if not line.strip():
+            return None
+        if fmt == "ndjson":
+            try:
+                row = json.loads(line)
+            except ValueError:
+                return "Invalid JSON"
+            return row if isinstance(row, dict) else "Expected a JSON object"
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            return None
+        return dict(zip(header, (value.strip() for value in values)))
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_no += 1
+            row = parse(line.rstrip("\r"))
+            if row is not None:
+                yield line_no, row
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        line_no += 1
+        row = parse(buffer.rstrip("\r"))
+        if row is not None:
+            yield line_no, row
+
+
+class UserImporter:
+    """Creates users in batches for one import request.
+
+    Per batch: validate rows with the same rules as registration, drop
+    emails repeated in the file or already registered (one case-insensitive `iin` query),
+    hash passwords across the process pool and insert with a single call.
+    A batch the database rejects is retried row by row so each failure is
+    attributed to its line.
+    """
+
+    def __init__(self, repos: Repositories):
+        self.repos = repos
+        self.seen_emails = set()
+        self.rows = 0
+        self.created = 0
+        self.failed = 0
+        self.errors: List[UserImportError] = []
+
+    def _error(self, line: int, email: Optional[str], detail: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.USER_IMPORT_MAX_ERRORS:
+            self.errors.append(UserImportError(line=line, email=email, detail=detail))
+
+    def import_batch(self, batch: List[Tuple[int, Union[dict, str]]]) -> None:
+        valid: List[Tuple[int, UserCreate]] = []
+        for line, row in batch:
+            self.rows += 1
+            if isinstance(row, str):
+                self._error(line, None, row)
+                continue
+            try:
+                user = UserCreate(**row)
+            except ValidationError as e:
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"])
+                self._error(line, row.get("email"), f"{field}: {error['msg']}" if field else error["msg"])
+                continue
+            email = user.email.lower()
+            if email in self.seen_emails:
+                self._error(line, user.email, "Duplicate email in file")
+                continue
+            self.seen_emails.add(email)
+            valid.append((line, user))
+        if not valid:
+            return
+
+        existing = {
+            row["email"].lower() for row in
+            self.repos.users.find({"email__iin": [u.email for _, u in valid]}, columns=["email"])
+        }
+        pending = []
+        for line, user in valid:
+            if user.email.lower() in existing:
+                self._error(line, user.email, "Email already registered")
+            else:
+                pending.append((line, user))
+        if not pending:
+            return
+
+        workers = settings.USER_IMPORT_HASH_WORKERS or os.cpu_count() or 1
+        hashes = get_hash_pool().map(
+            hash_password, [u.password for _, u in pending], chunksize=max(1, len(pending) // (workers * 4))
+        )
+        records = [
+            {"name": user.name, "email": user.email, "password_hash": password_hash, "role": user.role.value}
+            for (_, user), password_hash in zip(pending, hashes)
+        ]
+
+        try:
+            self.repos.users.insert(records)
+            self.created += len(records)
+            return
+        except Exception as e:
+            logger.warning(f"Batch insert of {len(records)} user(s) failed, retrying one by one: {e}")
+        for (line, user), record in zip(pending, records):
+            try:
+                self.repos.users.insert(record)
+                self.created += 1
+            except Exception as e:
+                self._error(line, user.email, f"Insert failed: {e}")
+
+    def result(self) -> UserImportOut:
+        return UserImportOut(
+            rows=self.rows,
+            created=self.created,
+            failed=self.failed,
+            errors=sorted(self.errors, key=lambda error: error.line),
+            errors_truncated=self.failed > len(self.errors)
+        )
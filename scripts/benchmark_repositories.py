@@ -0,0 +1,93 @@
+"""Per-query latency of the repository backends.
+
+Runs the same operations against each configured backend and prints p50/p95
+in milliseconds. SQLite always runs (temporary file); supabase runs when
+SUPABASE_URL/SUPABASE_KEY are set and postgres when DATABASE_URL is set.
+The remote backends only read, plus one insert/delete of a throwaway category.
+
+    python -m scripts.benchmark_repositories --iterations 200
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from app.database.repository import Repositories
+
+
+def _measure(fn: Callable[[], object], iterations: int) -> Dict[str, float]:
+    fn()  # warm-up: connection setup and statement preparation
+    samples: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    }
+
+
+def _seed_sqlite(repos: Repositories, tickets: int) -> None:
+    user = repos.users.insert({"name": "Benchmark", "email": "bench@example.com", "password_hash": "x"})[0]
+    category = repos.categories.insert({"name": "Benchmark", "color": "#000000"})[0]
+    rows = [
+        {"title": f"Ticket {i}", "description": "benchmark", "created_by": user["id"], "category_id": category["id"]}
+        for i in range(tickets)
+    ]
+    for start in range(0, len(rows), 500):
+        repos.tickets.insert(rows[start:start + 500])
+
+
+def run(repos: Repositories, iterations: int) -> Dict[str, Dict[str, float]]:
+    sample = repos.tickets.find(columns=["id", "created_by"], order=[("id", True)], limit=1)
+    if not sample:
+        raise RuntimeError(f"{repos.backend}: no tickets to benchmark against")
+    ticket_id, creator = sample[0]["id"], sample[0]["created_by"]
+
+    def insert_delete():
+        row = repos.categories.insert({"name": f"benchmark-{time.perf_counter_ns()}", "color": "#000000"})[0]
+        repos.categories.delete({"id": row["id"]})
+
+    return {
+        "get by id": _measure(lambda: repos.tickets.get(ticket_id), iterations),
+        "list by creator (50)": _measure(
+            lambda: repos.tickets.find({"created_by": creator}, order=[("id", True)], limit=50), iterations
+        ),
+        "count by creator": _measure(lambda: repos.tickets.count({"created_by": creator}), iterations),
+        "insert + delete": _measure(insert_delete, iterations)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--sqlite-tickets", type=int, default=10000)
+    args = parser.parse_args()
+
+    from app.database.sql_repository import SQLiteDatabase, sql_repositories
+
+    backends = {}
+    sqlite_path = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+    sqlite = sql_repositories("sqlite", SQLiteDatabase(sqlite_path), touch_updated_at=True)
+    _seed_sqlite(sqlite, args.sqlite_tickets)
+    backends["sqlite"] = sqlite
+
+    if os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY"):
+        from app.database.connection import build_repositories
+        backends["supabase"] = build_repositories("supabase")
+    if os.getenv("DATABASE_URL"):
+        from app.database.connection import build_repositories
+        backends["postgres"] = build_repositories("postgres")
+
+    print(f"{'backend':<10} {'query':<22} {'p50 ms':>9} {'p95 ms':>9}")
+    for name, repos in backends.items():
+        for query, stats in run(repos, args.iterations).items():
+            print(f"{name:<10} {query:<22} {stats['p50']:>9.2f} {stats['p95']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Groq-compatible stub server for load and soak tests of the AI path.
+
+Serves /openai/v1/chat/completions (plain and streamed) and /openai/v1/models
+from a cassette recorded with GROQ_MODE=record, so /ai/generate-response and
+/tickets/{id}/ai-response can be exercised offline without spending quota.
+Requests that were never recorded get another recording of the same kind, or
+a canned answer when the cassette is empty.
+
+Latency, streaming pace, injected 429s and timeouts and throughput limits are
+configurable; GET /stub/stats reports what was served and injected.
+
+    python -m scripts.groq_stub --port 8090 --latency lognormal:0.8,0.5 --rate-limit-rate 0.02
+    GROQ_BASE_URL=http://localhost:8090 uvicorn app.main:app
+
+Latency specs: fixed:S, uniform:LO,HI, normal:MEAN,SD, lognormal:MEDIAN,SIGMA,
+recorded[:SCALE] (the latency measured when recording, times SCALE).
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from typing import Callable, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.groq_cassette import GroqCassette, response_kind
+
+CANNED_TEXT = (
+    "Obrigado por entrar em contato. Esta é uma resposta simulada pelo stub do Groq "
+    "para testes de carga; nenhuma chamada real foi feita."
+)
+
+
+def parse_latency(spec: str, rng: random.Random) -> Callable[[Optional[float]], float]:
+    """Sampler for a latency spec; receives the recorded latency, if any"""
+    name, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if name == "fixed":
+        return lambda recorded: values[0] if values else 0.0
+    if name == "uniform":
+        return lambda recorded: rng.uniform(values[0], values[1])
+    if name == "normal":
+        return lambda recorded: max(0.0, rng.gauss(values[0], values[1]))
+    if name == "lognormal":
+        return lambda recorded: rng.lognormvariate(math.log(values[0]), values[1])
+    if name == "recorded":
+        scale = values[0] if values else 1.0
+        return lambda recorded: (recorded if recorded is not None else 0.5) * scale
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class TokenBucket:
+    """Allows `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0 when a request may pass, otherwise seconds until one may"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def _error(status: int, message: str, kind: str, retry_after: Optional[float] = None) -> JSONResponse:
+    headers = {"retry-after": f"{retry_after:.3f}"} if retry_after is not None else None
+    return JSONResponse({"error": {"message": message, "type": kind}}, status_code=status, headers=headers)
+
+
+def _canned_completion(body: dict) -> dict:
+    content = '{"tickets": []}' if response_kind(body) == "json_object" else CANNED_TEXT
+    return {
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4}
+    }
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    rng = random.Random(args.seed)
+    latency = parse_latency(args.latency, rng)
+    cassette = GroqCassette(args.cassette)
+    bucket = TokenBucket(args.max_rps, args.burst or max(args.max_rps, 1)) if args.max_rps > 0 else None
+    slots = asyncio.Semaphore(args.max_concurrency) if args.max_concurrency > 0 else None
+    stats = {
+        "requests": 0, "completed": 0, "streamed": 0, "in_flight": 0, "throttled": 0,
+        "injected_rate_limits": 0, "injected_timeouts": 0, "canned": 0
+    }
+    app = FastAPI(title="Groq stub")
+
+    @app.get("/openai/v1/models")
+    def list_models():
+        models = sorted(set(cassette.models()) | set(args.models))
+        return {"object": "list", "data": [{"id": m, "object": "model", "owned_by": "stub"} for m in models]}
+
+    @app.get("/stub/stats")
+    def stub_stats():
+        return dict(stats, cassette_entries=len(cassette), cassette_hits=cassette.hits,
+                    cassette_misses=cassette.misses)
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        if bucket is not None:
+            wait = bucket.take()
+            if wait:
+                stats["throttled"] += 1
+                return _error(429, "Rate limit reached (stub throughput limit)", "rate_limit_exceeded", wait)
+        roll = rng.random()
+        if roll < args.rate_limit_rate:
+            stats["injected_rate_limits"] += 1
+            return _error(429, "Rate limit reached (injected)", "rate_limit_exceeded", args.retry_after)
+        if roll < args.rate_limit_rate + args.timeout_rate:
+            stats["injected_timeouts"] += 1
+            await asyncio.sleep(args.hang_seconds)
+            return _error(504, "Upstream timed out (injected)", "timeout")
+
+        entry = cassette.lookup(body)
+        if entry is None:
+            stats["canned"] += 1
+        completion = dict(entry["completion"] if entry else _canned_completion(body))
+        completion.update(id=f"chatcmpl-{uuid.uuid4().hex}", object="chat.completion",
+                          created=int(time.time()), model=body.get("model"))
+        delay = latency(entry.get("latency") if entry else None)
+
+        if slots is not None:
+            await slots.acquire()
+        stats["in_flight"] += 1
+
+        def release():
+            stats["in_flight"] -= 1
+            if slots is not None:
+                slots.release()
+
+        if not body.get("stream"):
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                release()
+            stats["completed"] += 1
+            return completion
+
+        async def chunks():
+            # `delay` is the time to the first token; the rest is paced by --chunk-interval
+            try:
+                await asyncio.sleep(delay)
+                content = completion["choices"][0]["message"]["content"] or ""
+                base = {k: completion[k] for k in ("id", "created", "model")}
+                for start in range(0, len(content), args.chunk_chars):
+                    delta = {"content": content[start:start + args.chunk_chars]}
+                    if start == 0:
+                        delta["role"] = "assistant"
+                    chunk = dict(base, object="chat.completion.chunk",
+                                 choices=[{"index": 0, "delta": delta, "finish_reason": None}])
+                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    await asyncio.sleep(args.chunk_interval)
+                final = dict(base, object="chat.completion.chunk",
+                             choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+                stats["streamed"] += 1
+            finally:
+                release()
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--cassette", default="groq_cassette.jsonl", help="recorded with GROQ_MODE=record")
+    parser.add_argument("--models", nargs="*", default=["llama3-8b-8192", "llama3-70b-8192"],
+                        help="model ids listed in addition to the recorded ones")
+    parser.add_argument("--latency", default="recorded", help="latency distribution (see above)")
+    parser.add_argument("--chunk-chars", type=int, default=16, help="characters per streamed chunk")
+    parser.add_argument("--chunk-interval", type=float, default=0.02, help="seconds between streamed chunks")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after of injected 429s")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument("--hang-seconds", type=float, default=120.0, help="how long a hanging request lasts")
+    parser.add_argument("--max-rps", type=float, default=0.0, help="requests per second before 429 (0 = no limit)")
+    parser.add_argument("--burst", type=float, default=0.0, help="token bucket size (default: max-rps)")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="completions generated at once; the rest queue (0 = no limit)")
+    parser.add_argument("--seed", type=int, default=None, help="for reproducible latencies and injections")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()